@@ -0,0 +1,269 @@
+# /opt/bettybot/audio_engine.py
+from __future__ import annotations
+import io
+import os
+import subprocess
+import threading
+import time
+import wave
+from array import array
+from collections import deque
+from pathlib import Path
+
+try:
+    import fcntl
+except ImportError:          # not on Linux; the pipe just stays at its default size
+    fcntl = None
+
+# ---------- persistent audio output ----------
+# One long-lived `aplay` reading raw PCM from a pipe keeps the ALSA device
+# open for the life of the app. A writer thread feeds it one period at a time
+# from the highest-priority active stream (others hold their place), and
+# writes silence when nothing is playing so the device never underruns.
+# Sounds are converted to the engine format once (preloaded files are cached),
+# loops wrap inside the writer so there is no gap, and stop() takes effect at
+# the next period. The pipe is shrunk so the total queue ahead of the speaker
+# is roughly aplay's own buffer.
+#
+# Echo gating: every stretch of actual playback is recorded as a
+# (start, end) wall-clock interval and written to `speaking_file` on each
+# start/stop ("<start> -" while still playing). listen.sh drops captured
+# segments that overlap one, so Betty doesn't transcribe herself.
+
+PRIO_LOOP   = 0    # winner loop: background, paused while anything else plays
+PRIO_SFX    = 10   # jingle / victory
+PRIO_SPEECH = 20   # speech always wins
+
+# aplay restarts back off while it keeps dying (device missing/unplugged)
+RESTART_BACKOFF_MIN = 0.25
+RESTART_BACKOFF_MAX = 30.0
+HEALTHY_AFTER_S     = 2.0    # an aplay that lives this long ends a failure streak
+
+class Stream:
+    def __init__(self, pcm: bytes, tag: str, priority: int, loop: bool):
+        self.pcm = pcm
+        self.tag = tag
+        self.priority = priority
+        self.loop = loop
+        self.pos = 0
+        self.done = threading.Event()
+        self.started = time.monotonic()
+
+    def wait(self, timeout: float | None = None) -> bool:
+        return self.done.wait(timeout)
+
+
+class AudioEngine(threading.Thread):
+    def __init__(self, device: str, rate: int = 44100, channels: int = 2,
+                 period_ms: int = 20, buffer_ms: int = 80, speaking_file: Path | None = None):
+        super().__init__(daemon=True, name="audio-out")
+        self.device = device
+        self.rate = int(rate)
+        self.channels = int(channels)
+        self.period_ms = int(period_ms)
+        self.buffer_ms = int(buffer_ms)
+        self.frame_bytes = 2 * self.channels
+        self.period_bytes = self.rate * self.period_ms // 1000 * self.frame_bytes
+        self._silence = bytes(self.period_bytes)
+        self._streams = []
+        self._cond = threading.Condition()
+        self._sounds = {}             # path -> (mtime_ns, pcm)
+        self._proc = None
+        self._quit = threading.Event()
+        self.restarts = 0
+        self._backoff = 0.0           # next restart delay; 0 = not in a failure streak
+        self._started_at = 0.0
+        self.speaking_file = Path(speaking_file) if speaking_file else None
+        self.timeline = deque(maxlen=32)  # finished (start, end) playback intervals
+        self._speak_start = None
+
+    # ---------- loading / conversion ----------
+    def load(self, path: str):
+        """PCM for a WAV file in engine format, cached until the file changes."""
+        try:
+            mtime = os.stat(path).st_mtime_ns
+        except OSError:
+            return None
+        hit = self._sounds.get(path)
+        if hit and hit[0] == mtime:
+            return hit[1]
+        try:
+            with open(path, "rb") as f:
+                pcm = self.convert(f.read())
+        except Exception as e:
+            print(f"[audio] could not load {path}: {e}")
+            return None
+        self._sounds[path] = (mtime, pcm)
+        return pcm
+
+    def convert(self, wav_bytes: bytes) -> bytes:
+        """16-bit WAV bytes → raw PCM at the engine rate/channels (nearest-sample resample)."""
+        with wave.open(io.BytesIO(wav_bytes), "rb") as w:
+            if w.getsampwidth() != 2:
+                raise ValueError("only 16-bit WAVs are supported")
+            sch, srate = w.getnchannels(), w.getframerate()
+            raw = w.readframes(w.getnframes())
+        if sch == self.channels and srate == self.rate:
+            return raw
+        src = array("h", raw)
+        nframes = len(src) // sch
+        nout = nframes * self.rate // srate
+        step = srate / self.rate
+        och = self.channels
+        idx = [int(j * step) * sch for j in range(nout)]
+        if sch == och:
+            out = array("h", (src[i + c] for i in idx for c in range(och)))
+        else:  # mono → all channels, or downmix by taking the first channel
+            out = array("h", (src[i] for i in idx for _ in range(och)))
+        return out.tobytes()
+
+    # ---------- control ----------
+    def play(self, pcm: bytes, tag: str = "sfx", priority: int = PRIO_SFX,
+             loop: bool = False):
+        """Queue raw engine-format PCM; returns a Stream (wait() for the end)."""
+        s = Stream(pcm or b"", tag, priority, loop)
+        if not s.pcm:
+            s.done.set()
+            return s
+        with self._cond:
+            self._streams.append(s)
+            self._cond.notify()
+        return s
+
+    def play_file(self, path: str, tag: str = "sfx", priority: int = PRIO_SFX,
+                  loop: bool = False):
+        return self.play(self.load(path), tag, priority, loop)
+
+    def stop(self, tag: str | None = None):
+        """Stop streams with this tag (all streams if None) at the next period."""
+        with self._cond:
+            keep = []
+            for s in self._streams:
+                if tag is None or s.tag == tag:
+                    s.done.set()
+                else:
+                    keep.append(s)
+            self._streams = keep
+
+    def playing(self, tag: str | None = None) -> bool:
+        with self._cond:
+            return any(tag is None or s.tag == tag for s in self._streams)
+
+    def close(self):
+        self._quit.set()
+        self.stop()
+        with self._cond:
+            self._cond.notify()
+
+    # ---------- output ----------
+    def _open(self):
+        cmd = ["aplay", "-q", "-D", self.device, "-t", "raw", "-f", "S16_LE",
+               "-r", str(self.rate), "-c", str(self.channels),
+               "-B", str(self.buffer_ms * 1000), "-F", str(self.period_ms * 1000)]
+        try:
+            p = subprocess.Popen(cmd, stdin=subprocess.PIPE,
+                                 stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        except Exception as e:
+            if not self._backoff:
+                print(f"[audio] cannot start aplay: {e}")  # once per failure streak
+            return None
+        if fcntl is not None and hasattr(fcntl, "F_SETPIPE_SZ"):
+            try:
+                fcntl.fcntl(p.stdin.fileno(), fcntl.F_SETPIPE_SZ, max(4096, self.period_bytes))
+            except OSError:
+                pass
+        return p
+
+    def _next_chunk(self):
+        """Next period of PCM from the top stream, or None when idle."""
+        with self._cond:
+            if not self._streams:
+                return None
+            s = max(self._streams, key=lambda x: x.priority)  # first of equals = oldest
+            end = s.pos + self.period_bytes
+            chunk = s.pcm[s.pos:end]
+            s.pos = end
+            while len(chunk) < self.period_bytes and s.loop:
+                part = s.pcm[:self.period_bytes - len(chunk)]
+                chunk += part
+                s.pos = len(part)
+            if s.pos >= len(s.pcm) and not s.loop:
+                self._streams.remove(s)
+                s.done.set()
+            if len(chunk) < self.period_bytes:
+                chunk += self._silence[len(chunk):]
+            return chunk
+
+    def run(self):
+        while not self._quit.is_set():
+            if self._proc is None or self._proc.poll() is not None:
+                if self._restart_wait():
+                    break
+                self._proc = self._open()
+                self._started_at = time.monotonic()
+                if self._proc is None:
+                    self.stop()          # nothing can play; don't leave waiters hanging
+                    continue
+            chunk = self._next_chunk()
+            if chunk is not None and self._speak_start is None:
+                self._speak_start = time.time()
+                self._publish_timeline()
+            elif chunk is None and self._speak_start is not None:
+                # audible until what's already queued in aplay has drained
+                self.timeline.append((self._speak_start, time.time() + self.buffer_ms / 1000))
+                self._speak_start = None
+                self._publish_timeline()
+            if chunk is None:
+                chunk = self._silence
+            try:
+                self._proc.stdin.write(chunk)
+            except (BrokenPipeError, OSError, ValueError):
+                self._proc = None
+                continue
+            if self._backoff and time.monotonic() - self._started_at >= HEALTHY_AFTER_S:
+                print(f"[audio] output recovered after {self.restarts} restarts")
+                self._backoff = 0.0
+        if self._proc is not None:
+            try:
+                self._proc.stdin.close()
+                self._proc.terminate()
+            except Exception:
+                pass
+
+    def _restart_wait(self) -> bool:
+        """Sleep before (re)starting aplay while it keeps failing; True if quitting."""
+        if self._proc is None and not self._started_at:
+            return False         # first start
+        self.restarts += 1
+        if not self._backoff:
+            print(f"[audio] output lost; restarting aplay with backoff (up to {RESTART_BACKOFF_MAX:.0f} s)")
+            self._backoff = RESTART_BACKOFF_MIN
+            return self._quit.is_set()
+        self.stop()              # nothing is playing meanwhile; release waiters
+        if self._quit.wait(self._backoff):
+            return True
+        self._backoff = min(RESTART_BACKOFF_MAX, self._backoff * 2)
+        return False
+
+    # ---------- speaking timeline ----------
+    def speaking(self) -> bool:
+        return self._speak_start is not None
+
+    def _publish_timeline(self):
+        if self.speaking_file is None:
+            return
+        lines = [f"{a:.3f} {b:.3f}" for a, b in self.timeline]
+        if self._speak_start is not None:
+            lines.append(f"{self._speak_start:.3f} -")
+        tmp = self.speaking_file.with_name(self.speaking_file.name + ".tmp")
+        try:
+            tmp.write_text("\n".join(lines) + "\n")
+            os.replace(tmp, self.speaking_file)
+        except OSError as e:
+            print(f"[audio] cannot write {self.speaking_file}: {e}")
+
+    def stats(self) -> dict:
+        with self._cond:
+            active = [{"tag": s.tag, "priority": s.priority, "loop": s.loop} for s in self._streams]
+        return {"rate": self.rate, "channels": self.channels, "period_ms": self.period_ms,
+                "restarts": self.restarts, "active": active, "speaking": self.speaking()}
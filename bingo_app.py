@@ -2,19 +2,39 @@
 # /opt/bettybot/bingo_app.py
 import os
 import re
+import sys
 import json
+import hashlib
+import inspect
 import random
 import threading
 import time
 import queue
 import subprocess
+import signal
 import atexit
+from concurrent.futures import Future
+from collections import deque
 from pathlib import Path
-from shutil import which as shutil_which
 
-from flask import Flask, jsonify, request, render_template
+from flask import Flask, Response, jsonify, request, render_template, has_request_context
 from flask_sock import Sock
 
+from event_bus import EventBus
+from session_journal import SessionJournal
+from game_store import CustomGameStore
+from tts import TTSCache, SpeechQueue
+from audio_engine import AudioEngine, PRIO_LOOP, PRIO_SFX, PRIO_SPEECH
+from metrics import LatencyTracer
+from call_relay import CallSubscriber, HttpSource
+from simulator import simulate
+from card_db import CardDB
+import ws_codec
+from static_assets import AssetCache, Asset, CACHE_FOREVER, pick_encoding
+from program_compiler import (
+    compile_program, card_mask, called_mask, mask_to_cells, premark_mask, apply_number_mask,
+)
+
 # ------------------ Paths & Config ------------------
 PORT          = int(os.environ.get("PORT", "5000"))
 
@@ -26,17 +46,50 @@ WHISPER_BIN   = os.environ.get("WHISPER_BIN", "/opt/bettybot/whisper.cpp/build/b
 MODEL_PATH    = os.environ.get("WHISPER_MODEL", "/opt/bettybot/whisper.cpp/models/ggml-tiny.en.bin")
 
 APP_DIR       = Path(__file__).resolve().parent
-LISTEN_SH     = str(APP_DIR / "listen.sh")
+LISTEN_SH     = os.environ.get("LISTEN_SH", str(APP_DIR / "listen.sh"))
+
+# Several mics ("hall=plughw:2,0;table2=plughw:4,0"): run transcriber.py, which
+# captures each with listen.sh and batches them through one whisper
+LISTEN_STREAMS = os.environ.get("LISTEN_STREAMS", "")
+
+# LAN call distribution. "standalone"/"publisher": run the mic + whisper here
+# (the call stream is always served at /api/events). "subscriber": no audio
+# input at all; follow the publisher at CALL_SOURCE (e.g. http://betty.local:5000)
+BETTY_ROLE    = os.environ.get("BETTY_ROLE", "standalone")
+CALL_SOURCE   = os.environ.get("CALL_SOURCE", "")
 
 # Parse-mode coordination with listener/parser
 MODE_FILE     = Path("/tmp/betty_parse_mode.txt")  # "SETUP" or "PLAY"
 
 # Custom games storage
 CUSTOM_GAMES_FILE = APP_DIR / "custom_games.json"
-CUSTOM_GAMES_BACKUP_DIR = APP_DIR / "backups"
+CUSTOM_GAMES_BACKUP_DIR = APP_DIR / "backups"   # edit history journal lives here
+
+# Session journal + snapshots for crash recovery
+SESSION_DIR   = Path(os.environ.get("SESSION_DIR", str(APP_DIR / "session")))
+SESSION_RESTORE = os.environ.get("SESSION_RESTORE", "1") == "1"
+JOURNAL_COMPACT_EVERY = int(os.environ.get("JOURNAL_COMPACT_EVERY", "100"))
+
+# Printed card faces by serial (built with `card_db.py import`); sheets can be
+# dealt from serial/pack ranges instead of random faces
+CARD_DB_PATH  = Path(os.environ.get("CARD_DB", str(APP_DIR / "cards" / "faces.bin")))
+MAX_SHEET_FACES = 12
+
+# Extra tables (sessions) served under /s/<id>/; "main" is the one at /
+MAX_SESSIONS  = int(os.environ.get("MAX_SESSIONS", "8"))
+
+# Display wire format when /ws is opened without ?enc=: "json" (readable in
+# devtools) or "bin" (ws_codec: packed faces, marks as bitmasks)
+WS_ENCODING   = os.environ.get("WS_ENCODING", "json")
 
 # USB speakers device for playback (card 3, device 0 based on your setup)
 AUDIO_DEV     = os.environ.get("AUDIO_DEV", "plughw:3,0")
+AUDIO_RATE    = int(os.environ.get("AUDIO_RATE", "44100"))       # output engine format
+AUDIO_CHANNELS = int(os.environ.get("AUDIO_CHANNELS", "2"))
+AUDIO_PERIOD_MS = int(os.environ.get("AUDIO_PERIOD_MS", "20"))   # stop() latency ~ one period
+
+# Playback intervals for echo gating in listen.sh (keep in sync with SPEAKING_FILE there)
+SPEAKING_FILE = Path("/tmp/betty_speaking.txt")
 
 # ALSA mixer card for speaker volume control (your USB speakers are card 3)
 SPEAKER_CARD  = int(os.environ.get("SPEAKER_CARD", "3"))
@@ -46,6 +99,11 @@ JINGLE_PATH   = os.environ.get("JINGLE_PATH", "/opt/bettybot/snd/jingle.wav")
 VICTORY_PATH  = os.environ.get("VICTORY_PATH", "/opt/bettybot/snd/victory.wav")
 WINNER_LOOP_PATH = os.environ.get("WINNER_LOOP_PATH", "/opt/bettybot/snd/winner.wav")
 
+# Rendered speech cache (engine-format PCM keyed by engine/voice/rate/text) + in-memory LRU budget
+TTS_CACHE_DIR = Path(os.environ.get("TTS_CACHE_DIR", str(APP_DIR / "cache" / "tts")))
+TTS_MEM_BYTES = int(os.environ.get("TTS_MEM_BYTES", str(8 << 20)))
+TTS_DISK_BYTES = int(os.environ.get("TTS_DISK_BYTES", str(64 << 20)))   # LRU cap on the SD card
+
 # Gain persistence for mic pipeline (applied in listen.sh)
 GAIN_FILE     = Path("/tmp/betty_gain.txt")
 DEFAULT_GAIN  = float(os.environ.get("GAIN", "3.0"))
@@ -62,42 +120,51 @@ def read_gain():
         return DEFAULT_GAIN
 
 # ------------------ Output Audio Helpers (speaker) ------------------
+AUDIO = AudioEngine(AUDIO_DEV, AUDIO_RATE, AUDIO_CHANNELS, AUDIO_PERIOD_MS,
+                    speaking_file=SPEAKING_FILE)
+for _p in (JINGLE_PATH, VICTORY_PATH, WINNER_LOOP_PATH):
+    AUDIO.load(_p)   # preload; missing files are skipped
+AUDIO.start()
+atexit.register(AUDIO.close)
+
 def play_wav(path: str):
-    """Play a WAV file via the USB speakers, quietly and non-blocking."""
+    """Play a WAV file via the USB speakers, non-blocking (cached PCM)."""
     try:
-        if os.path.isfile(path):
-            subprocess.Popen(
-                ["aplay", "-q", "-D", AUDIO_DEV, path],
-                stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
-            )
+        AUDIO.play_file(path, tag="sfx", priority=PRIO_SFX)
     except Exception:
         pass
 
-def say(text: str):
-    """Prefer pico2wave → aplay, fall back to espeak (slower, clearer for seniors)."""
-    text = str(text or "").strip()
-    if not text:
-        return
+def play_speech(pcm: bytes):
+    """Play cached engine-format speech via the USB speakers; blocks until playback ends."""
     try:
-        if shutil_which("pico2wave") and shutil_which("aplay"):
-            wav = "/tmp/betty_say.wav"
-            subprocess.run(["pico2wave", "-w", wav, "-l", "en-US", text],
-                           check=False, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
-            subprocess.Popen(["aplay", "-q", "-D", AUDIO_DEV, wav],
-                             stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
-            return
-        if shutil_which("espeak") and shutil_which("aplay"):
-            wav = "/tmp/betty_say.wav"
-            subprocess.run(["espeak", "-s", "150", "-v", "en-us+f3", "-w", wav, text],
-                           check=False, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
-            subprocess.Popen(["aplay", "-q", "-D", AUDIO_DEV, wav],
-                             stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
-            return
-        if shutil_which("espeak"):
-            subprocess.Popen(["espeak", "-s", "150", "-v", "en-us+f3", text],
-                             stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
-    except Exception:
-        pass
+        AUDIO.play(pcm, tag="speech", priority=PRIO_SPEECH).wait()
+    except Exception as e:
+        print(f"[audio] speech playback failed: {e}")
+
+# Phrases are converted to the engine format once, when rendered, not per play
+TTS = TTSCache(TTS_CACHE_DIR, TTS_MEM_BYTES, convert=AUDIO.convert,
+               fmt=f"s16le-{AUDIO.rate}-{AUDIO.channels}", disk_bytes=TTS_DISK_BYTES)
+SPEECH = SpeechQueue(TTS, play_speech)
+SPEECH.start()
+
+def say(*parts: str):
+    """
+    Queue speech and return immediately. Each part is rendered and cached on
+    its own, so split variable bits from fixed ones ("Starting game 3:", name).
+    """
+    SPEECH.say(*parts)
+
+# Fixed prompts rendered at startup so the first use doesn't wait on pico2wave
+FIXED_PROMPTS = [
+    "Welcome to Betty Bot. How many games will you be playing tonight?",
+    "Great. Let's pick the games. What is game one?",
+    "Okay, how many games will you be playing?",
+    "Session complete.",
+    "Matching digits are premarked.",
+    "Odd numbers premarked.",
+    "Even numbers premarked.",
+]
+SESSION_MAX_GAMES = 20
 
 # ------------------ Speaker Volume Helpers ------------------
 def _amixer_get_percent(card: int, ctl_candidates=("PCM","Speaker","Master")) -> int:
@@ -129,12 +196,18 @@ def _amixer_set_percent(card: int, pct: int, ctl_candidates=("PCM","Speaker","Ma
             continue
     return False
 
-def get_speaker_volume() -> int:
-    return _amixer_get_percent(SPEAKER_CARD)
+# public_state() reports the volume on every update; amixer is a fork+exec,
+# so keep the last reading and only ask ALSA again when told to
+_SPEAKER = {"pct": None}
+
+def get_speaker_volume(fresh: bool = False) -> int:
+    if fresh or _SPEAKER["pct"] is None:
+        _SPEAKER["pct"] = _amixer_get_percent(SPEAKER_CARD)
+    return _SPEAKER["pct"]
 
 def set_speaker_volume(pct: int) -> int:
     ok = _amixer_set_percent(SPEAKER_CARD, pct)
-    return get_speaker_volume() if ok else -1
+    return get_speaker_volume(fresh=True) if ok else -1
 
 # ------------------ Cards / Game State ------------------
 LETTER_RANGES = {
@@ -159,6 +232,42 @@ def make_cards(n: int, free_enabled=True):
     n = max(1, min(6, int(n)))
     return [new_card(free_enabled=free_enabled) for _ in range(n)]
 
+_CARD_DB = {"db": None}
+
+def card_db():
+    """The printed-face database (memory-mapped), reopened if the file is replaced; None if absent."""
+    db = _CARD_DB["db"]
+    try:
+        mtime = os.stat(CARD_DB_PATH).st_mtime_ns
+    except OSError:
+        return None
+    if db is None or db.mtime_ns != mtime:
+        try:
+            new = CardDB(CARD_DB_PATH)
+        except (OSError, ValueError) as e:
+            print(f"[cards] {e}")
+            return db
+        _CARD_DB["db"] = new
+        if db is not None:
+            db.close()
+        db = new
+    return db
+
+def printed_cards(serials, free_enabled=True):
+    """Cards for printed faces by serial. Raises ValueError."""
+    db = card_db()
+    if db is None:
+        raise ValueError(f"no card database at {CARD_DB_PATH}")
+    cards = []
+    for serial in serials:
+        cols = db.face(serial)
+        if cols is None:
+            raise ValueError(f"no face with serial {serial}")
+        marks = {f"{L}{n}": False for L in "BINGO" for n in cols[L] if n != 0}
+        marks["FREE"] = bool(free_enabled)
+        cards.append({"cols": cols, "marks": marks, "calls": [], "serial": int(serial)})
+    return cards
+
 def mark_call_on_card(card: dict, letter: str, number: int):
     key = f"{letter}{number}"
     card["calls"].append(key)
@@ -170,37 +279,16 @@ def mark_call_on_card(card: dict, letter: str, number: int):
 
 # ------------------ Winner loop (loop winner.wav until confirm) ------------------
 class WinnerLooper:
+    """Gapless winner loop on the shared output engine (yields to speech/stings)."""
     def __init__(self, wav_path: str):
         self.wav = wav_path
-        self._stop = threading.Event()
-        self._thr = None
 
     def start(self):
         self.stop()
-        if not os.path.isfile(self.wav):
-            return
-        self._stop.clear()
-        self._thr = threading.Thread(target=self._run, daemon=True)
-        self._thr.start()
-
-    def _run(self):
-        while not self._stop.is_set():
-            try:
-                p = subprocess.Popen(["aplay", "-q", "-D", AUDIO_DEV, self.wav],
-                                     stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
-                while p.poll() is None and not self._stop.is_set():
-                    time.sleep(0.1)
-                if self._stop.is_set():
-                    try:
-                        p.terminate()
-                    except Exception:
-                        pass
-                    break
-            except Exception:
-                break
+        AUDIO.play_file(self.wav, tag="winner", priority=PRIO_LOOP, loop=True)
 
     def stop(self):
-        self._stop.set()
+        AUDIO.stop("winner")
 
 WINNER = WinnerLooper(WINNER_LOOP_PATH)
 
@@ -232,6 +320,7 @@ PROGRAMS = {
         "desc": "After first ball, pre-mark numbers containing its digits; then coverall.",
         "kind": "special_number",
         "params": {"digits": []},
+        "premark": {"attr": "digits", "intersects": "$value", "record": "digits"},
         "preview_cells": []
     },
     "ODD_EVEN": {
@@ -239,6 +328,7 @@ PROGRAMS = {
         "desc": "If first ball is odd, pre-mark odds (or evens if even). Then coverall with the opposite.",
         "kind": "odd_even",
         "params": {"first": None},
+        "premark": {"attr": "parity", "equals": "$value", "record": "first"},
         "preview_cells": []
     },
     "GIANT_X": {
@@ -290,71 +380,15 @@ PROGRAMS = {
 }
 
 # ------------------ Custom Games Management ------------------
-def load_custom_games() -> dict:
-    """Load custom games from JSON file."""
-    try:
-        if CUSTOM_GAMES_FILE.exists():
-            with open(CUSTOM_GAMES_FILE, 'r', encoding='utf-8') as f:
-                return json.load(f)
-    except Exception:
-        pass
-    return {}
-
-def backup_custom_games():
-    """Create a backup of the current custom games file."""
-    try:
-        if not CUSTOM_GAMES_FILE.exists() or CUSTOM_GAMES_FILE.stat().st_size == 0:
-            return
-        
-        # Create backups directory if it doesn't exist
-        CUSTOM_GAMES_BACKUP_DIR.mkdir(exist_ok=True)
-        
-        # Create backup filename with timestamp
-        from datetime import datetime
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        backup_file = CUSTOM_GAMES_BACKUP_DIR / f"custom_games_{timestamp}.json"
-        
-        # Copy current file to backup
-        import shutil
-        shutil.copy2(CUSTOM_GAMES_FILE, backup_file)
-        
-        # Keep only the last 10 backups
-        backups = sorted(CUSTOM_GAMES_BACKUP_DIR.glob("custom_games_*.json"), reverse=True)
-        for old_backup in backups[10:]:
-            try:
-                old_backup.unlink()
-            except Exception:
-                pass
-        
-        return str(backup_file)
-    except Exception as e:
-        print(f"Warning: Failed to create backup: {e}")
-        return None
+GAME_STORE = CustomGameStore(
+    CUSTOM_GAMES_FILE, CUSTOM_GAMES_BACKUP_DIR,
+    save_delay=float(os.environ.get("CUSTOM_GAMES_SAVE_DELAY", "0.3")),
+)
+atexit.register(GAME_STORE.flush)
 
-def save_custom_games(custom_games: dict):
-    """Save custom games to JSON file with backup."""
-    try:
-        # Create backup before saving (only if file exists and has content)
-        if CUSTOM_GAMES_FILE.exists() and CUSTOM_GAMES_FILE.stat().st_size > 0:
-            backup_custom_games()
-        
-        # Save the new games
-        print(f"[DEBUG] Writing {len(custom_games)} games to {CUSTOM_GAMES_FILE}")
-        with open(CUSTOM_GAMES_FILE, 'w', encoding='utf-8') as f:
-            json.dump(custom_games, f, indent=2, ensure_ascii=False)
-        
-        # Verify the file was written
-        if CUSTOM_GAMES_FILE.exists() and CUSTOM_GAMES_FILE.stat().st_size > 0:
-            print(f"[DEBUG] Successfully saved {len(custom_games)} games")
-            return True
-        else:
-            print(f"[DEBUG] ERROR: File was not written or is empty")
-            return False
-    except Exception as e:
-        print(f"Error saving custom games: {e}")
-        import traceback
-        traceback.print_exc()
-        return False
+def load_custom_games() -> dict:
+    """Custom games from the in-memory store (read-only; use GAME_STORE to edit)."""
+    return GAME_STORE.get()
 
 def get_all_programs() -> dict:
     """Get all programs (custom games override built-in ones)."""
@@ -367,6 +401,17 @@ def get_all_programs() -> dict:
 # Load custom games on startup
 CUSTOM_GAMES = load_custom_games()
 
+def prerender_speech():
+    """Warm the speech cache with fixed prompts and every program name (background)."""
+    phrases = list(FIXED_PROMPTS)
+    phrases += [f"Starting game {n}:" for n in range(1, SESSION_MAX_GAMES + 1)]
+    phrases += [f"Saved for game {n}." for n in range(1, SESSION_MAX_GAMES + 1)]
+    phrases += [f"You picked {n} games. Is that right?" for n in range(1, SESSION_MAX_GAMES + 1)]
+    phrases += [f"{p.get('name')}." for p in get_all_programs().values() if p.get("name")]
+    SPEECH.prerender(phrases)
+
+prerender_speech()
+
 # Initialize default program (use first custom game if available, otherwise CLASSIC)
 default_program_key = "CLASSIC"
 default_program = PROGRAMS.get("CLASSIC", {
@@ -378,73 +423,136 @@ default_program = PROGRAMS.get("CLASSIC", {
 })
 if CUSTOM_GAMES:
     default_program_key = list(CUSTOM_GAMES.keys())[0]
-    default_program = CUSTOM_GAMES[default_program_key]
-
-# ------------------ Global Game State ------------------
-GAME = {
-    # Views: WELCOME -> SETUP_GAMES -> PROGRAM_PICK -> OVERVIEW/FOCUS
-    "view": "WELCOME",
-    "session_total_games": None,                 # 1..20
-    "session_lineup": [],                        # list of program keys (length = total)
-    "current_game_idx": 0,                       # 0-based index into lineup
-    "sheet_n": int(os.environ.get("SHEET_CARDS", "3")),  # 1..6
-    "cards": [],
-    "focus_idx": None,
-    "mode": "PLAY",
-    "status": "LISTENING",
-    "last_heard": "",
-    # Active program
-    "program_key": default_program_key,
-    "program": default_program,
-    "free_enabled": True,
-}
-GAME["cards"] = make_cards(GAME["sheet_n"], free_enabled=GAME["free_enabled"])
+    default_program = json.loads(json.dumps(CUSTOM_GAMES[default_program_key]))
+
+# ------------------ Game State (one per session) ------------------
+def new_game_state() -> dict:
+    game = {
+        # Views: WELCOME -> SETUP_GAMES -> PROGRAM_PICK -> OVERVIEW/FOCUS
+        "view": "WELCOME",
+        "session_total_games": None,                 # 1..20
+        "session_lineup": [],                        # list of program keys (length = total)
+        "current_game_idx": 0,                       # 0-based index into lineup
+        "sheet_n": int(os.environ.get("SHEET_CARDS", "3")),  # 1..6
+        "sheet_serials": None,                       # printed faces in play (None = random)
+        "cards": [],
+        "focus_idx": None,
+        "mode": "PLAY",
+        "status": "LISTENING",
+        "last_heard": "",
+        # Active program
+        "program_key": default_program_key,
+        "program": default_program,
+        "compiled": None,                            # CompiledProgram for "program"
+        "free_enabled": True,
+    }
+    game["cards"] = make_cards(game["sheet_n"], free_enabled=game["free_enabled"])
+    return game
+
+WS_LOCK = threading.Lock()   # guards every Session.clients dict
+
+# Parser/listener events; subscribers read it at their own pace
+TRACER = LatencyTracer()   # call latency, from the mic to a painted display
 
-WS_CLIENTS = set()
-EVENT_QUEUE = queue.Queue(maxsize=256)
+BUS = EventBus(capacity=int(os.environ.get("EVENT_BUS_SIZE", "1024")))
+BUS_EPOCH = os.urandom(4).hex()   # changes on restart, so subscribers know seqs started over
+
+# Max commands the game actor applies before flushing one broadcast
+ACTOR_BATCH_MAX = int(os.environ.get("ACTOR_BATCH_MAX", "64"))
 
 # ------------------ Helpers: program & session ------------------
+def spec_free_enabled(spec: dict) -> bool:
+    """free_enabled from params or directly from the spec (custom games)."""
+    free_enabled = spec.get("free_enabled")
+    if free_enabled is None:
+        free_enabled = (spec.get("params") or {}).get("free_enabled", True)
+    return bool(free_enabled)
+
 def set_program_by_key(key: str, params: dict | None = None):
     key = str(key).upper()
     all_programs = get_all_programs()
     if key not in all_programs:
         return False
-    spec = json.loads(json.dumps(all_programs[key]))  # deep-ish copy
+    compiled = prefetched_program(key, all_programs[key])
+    if compiled is None:
+        try:
+            compiled = compile_program(all_programs[key], key)
+        except ValueError as e:
+            print(f"[program] {key} is invalid: {e}")
+            return False
+    # Only params is mutated at runtime (premarks), so copy just that
+    spec = dict(all_programs[key])
+    spec["params"] = dict(spec.get("params") or {})
     if params:
         spec["params"].update(params)
+        compiled = compile_program(spec, key)
     GAME["program_key"] = key
     GAME["program"] = spec
-    # Get free_enabled from params or directly from spec (for custom games)
-    free_enabled = spec.get("free_enabled")
-    if free_enabled is None:
-        free_enabled = spec.get("params", {}).get("free_enabled", True)
-    GAME["free_enabled"] = bool(free_enabled)
+    GAME["compiled"] = compiled
+    GAME["free_enabled"] = spec_free_enabled(spec)
     # apply FREE on current cards
     for c in GAME["cards"]:
         c["marks"]["FREE"] = bool(GAME["free_enabled"])
-    broadcast({"type": "CONFIG", "key": "program", "value": public_state()["program"]})
-    broadcast({"type": "STATE", "state": public_state()})
+    broadcast({"type": "CONFIG", "key": "program", "value": public_program()})
+    broadcast_state()
     return True
 
+def active_compiled():
+    """Compiled form of the active program (recompiled if missing, e.g. after restore)."""
+    compiled = GAME.get("compiled")
+    if compiled is None:
+        try:
+            compiled = compile_program(GAME["program"], GAME["program_key"])
+        except ValueError:
+            compiled = compile_program({"kind": "custom"}, GAME["program_key"])
+        GAME["compiled"] = compiled
+    return compiled
+
 def program_preview_cells():
+    return [list(c) for c in active_compiled().preview_cells]
+
+def find_win():
+    """First winning card under the active program: {"card", "cells"} or None."""
+    compiled = active_compiled()
+    if not compiled.win_masks or not GAME["cards"]:
+        return None
+    if compiled.number_allow or compiled.number_deny:
+        if not compiled.numbers_ok(called_mask(GAME["cards"][0]["calls"])):
+            return None
+    for idx, card in enumerate(GAME["cards"]):
+        m = compiled.find_win(card_mask(card))
+        if m is not None:
+            return {"card": idx, "cells": mask_to_cells(m)}
+    return None
+
+def public_program():
     p = GAME["program"]
-    cells = p.get("preview_cells", []) or []
-    if GAME["program_key"] == "FIVE_AROUND_CORNER":
-        corner = (p.get("params", {}) or {}).get("corner", "TL")
-        if corner == "TL": return [[0,0],[0,1],[0,2],[1,0],[2,0]]
-        if corner == "TR": return [[0,4],[0,3],[0,2],[1,4],[2,4]]
-        if corner == "BL": return [[4,0],[3,0],[2,0],[4,1],[4,2]]
-        if corner == "BR": return [[4,4],[3,4],[2,4],[4,3],[4,2]]
-    return cells
+    return {
+        "key": GAME["program_key"],
+        "name": p["name"],
+        "desc": p["desc"],
+        "kind": p["kind"],
+        "params": p.get("params", {}),
+        "preview_cells": program_preview_cells(),
+        "patterns": p.get("patterns", []),
+        "allowed_numbers": p.get("allowed_numbers", []),
+        "disallowed_numbers": p.get("disallowed_numbers", []),
+        "allowed_positions": p.get("allowed_positions", []),
+        "disallowed_positions": p.get("disallowed_positions", []),
+        "compiled": active_compiled().export(),
+    }
 
 def public_state():
     export_cards = []
     for c in GAME["cards"]:
-        export_cards.append({
+        card = {
             "cols": c["cols"],
             "marks": c["marks"],
             "calls": c["calls"][-12:]
-        })
+        }
+        if c.get("serial"):
+            card["serial"] = c["serial"]
+        export_cards.append(card)
     return {
         "view": GAME["view"],
         "session_total_games": GAME["session_total_games"],
@@ -458,112 +566,827 @@ def public_state():
         "mode": GAME["mode"],
         "status": GAME["status"],
         "last_heard": GAME["last_heard"],
-        "program": {
-            "key": GAME["program_key"],
-            "name": GAME["program"]["name"],
-            "desc": GAME["program"]["desc"],
-            "kind": GAME["program"]["kind"],
-            "params": GAME["program"].get("params", {}),
-            "preview_cells": program_preview_cells(),
-            "patterns": GAME["program"].get("patterns", []),
-            "allowed_numbers": GAME["program"].get("allowed_numbers", []),
-            "disallowed_numbers": GAME["program"].get("disallowed_numbers", []),
-            "allowed_positions": GAME["program"].get("allowed_positions", []),
-            "disallowed_positions": GAME["program"].get("disallowed_positions", []),
-        },
+        "program": public_program(),
+        "win": find_win(),
         "free_enabled": GAME["free_enabled"],
+        "session_id": SESSION.sid,
     }
 
+# Settings shared by every table (one mic, one speaker, one games file)
+GLOBAL_CONFIG_KEYS = {"gain", "speaker", "games_updated"}
+
 def broadcast(msg: dict):
+    # Shared settings go to every table. Game messages go to the bound table
+    # only: inside an actor batch they are queued and coalesced on flush.
+    if msg.get("type") == "CONFIG" and msg.get("key") in GLOBAL_CONFIG_KEYS:
+        for sess in list(SESSIONS.values()):
+            send_to_clients(msg, sess)
+        return
+    if ACTOR.buffering():
+        ACTOR.outbox.append(msg)
+        return
+    send_to_clients(msg, SESSION)
+
+def broadcast_state():
+    # inside an actor batch the flush attaches one state for the whole batch
+    broadcast({"type": "STATE"} if ACTOR.buffering() else {"type": "STATE", "state": public_state()})
+
+def send_to_clients(msg: dict, sess: "Session" = None):
+    sess = sess or SESSION
+    with WS_LOCK:
+        clients = list(sess.clients.items())
+    frames = {}   # encoding → frame, each built at most once per message
     dead = []
-    for ws in list(WS_CLIENTS):
+    for ws, enc in clients:
+        if enc not in frames:
+            frames[enc] = encode_frame(msg, enc)
         try:
-            ws.send(json.dumps(msg))
+            ws.send(frames[enc])
         except Exception:
             dead.append(ws)
-    for d in dead:
-        WS_CLIENTS.discard(d)
+    if dead:
+        with WS_LOCK:
+            for d in dead:
+                sess.clients.pop(d, None)
+
+def encode_frame(msg: dict, enc: str = "json"):
+    """Text JSON, or a ws_codec binary frame for 'bin' displays (state-carrying messages only)."""
+    if enc == "bin":
+        frame = ws_codec.encode(msg)
+        if frame is not None:
+            return frame
+    return json.dumps(msg)
 
 def set_mode(mode: str):
     GAME["mode"] = "DEBUG" if str(mode).upper() == "DEBUG" else "PLAY"
     broadcast({"type": "MODE", "mode": GAME["mode"]})
-    broadcast({"type": "STATE", "state": public_state()})
+    broadcast_state()
 
 def set_view(v: str):
     GAME["view"] = v
-    broadcast({"type": "STATE", "state": public_state()})
+    broadcast_state()
 
 def reset_sheet(n: int = None):
-    if n is None:
-        n = GAME["sheet_n"]
-    GAME["sheet_n"] = max(1, min(6, int(n)))
+    """New cards: the same printed faces again if some are loaded (n=None), else n random ones."""
     # Use free_enabled from the current program
     free_enabled = bool(GAME.get("free_enabled", True))
-    GAME["cards"] = make_cards(GAME["sheet_n"], free_enabled=free_enabled)
+    if n is None and GAME.get("sheet_serials"):
+        GAME["cards"] = (take_prefetched_sheet(GAME["sheet_serials"], free_enabled)
+                         or printed_cards(GAME["sheet_serials"], free_enabled=free_enabled))
+        GAME["sheet_n"] = len(GAME["cards"])
+    else:
+        if n is None:
+            n = GAME["sheet_n"]
+        GAME["sheet_n"] = max(1, min(6, int(n)))
+        GAME["sheet_serials"] = None
+        GAME["cards"] = (take_prefetched_sheet(GAME["sheet_n"], free_enabled)
+                         or make_cards(GAME["sheet_n"], free_enabled=free_enabled))
     GAME["focus_idx"] = None
     GAME["status"] = "LISTENING"
-    broadcast({"type": "STATE", "state": public_state()})
+    broadcast_state()
+
+def load_sheet(serials):
+    """Deal printed faces by serial (an empty list goes back to random cards). Raises ValueError."""
+    serials = [int(x) for x in serials or []]
+    if len(serials) > MAX_SHEET_FACES:
+        raise ValueError(f"at most {MAX_SHEET_FACES} faces per sheet")
+    if serials:
+        printed_cards(serials)   # validate before touching the sheet
+    GAME["sheet_serials"] = serials or None
+    reset_sheet()
+    return GAME["sheet_n"]
 
 def mark_call(letter: str, number: int):
+    key = f"{letter}{number}"
+    if not RESTORING:
+        TRACER.stamp(key, "mark_call")
     for c in GAME["cards"]:
         mark_call_on_card(c, letter, number)
-    broadcast({"type": "CALL", "call": f"{letter}{number}", "state": public_state()})
+    msg = {"type": "CALL", "call": key}
+    if not ACTOR.buffering():
+        msg["state"] = public_state()   # inside a batch the actor attaches state once
+    broadcast(msg)
 
 def set_parse_mode(mode: str):
     mode = "SETUP" if str(mode).upper().startswith("SETUP") else "PLAY"
+    SESSION.parse_mode = mode
+    write_parse_mode()
+    broadcast({"type": "CONFIG", "key": "parse_mode", "value": mode})
+
+def write_parse_mode():
+    # One call stream feeds every table, so the whisper prompt is shared:
+    # PLAY while any table is playing, SETUP if the rest are picking games.
+    modes = {sess.parse_mode for sess in list(SESSIONS.values())}
+    mode = "PLAY" if "PLAY" in modes or "SETUP" not in modes else "SETUP"
     try:
         MODE_FILE.write_text(mode)
     except Exception:
         pass
-    broadcast({"type": "CONFIG", "key": "parse_mode", "value": mode})
 
 # ------------------ Premark helpers ------------------
-def _for_all_numbers(fn):  # fn(letter, number) -> bool mark?
-    for card in GAME["cards"]:
-        for L in "BINGO":
-            for n in card["cols"][L]:
-                if n == 0:
-                    continue
-                if fn(L, n):
-                    card["marks"][f"{L}{n}"] = True
-    broadcast({"type": "STATE", "state": public_state()})
+# Premark programs carry a declarative "premark" rule (see program_compiler)
+# that turns the first ball (or a literal like "odd") into a number mask.
+def apply_premark(value):
+    """Premark all cards using the active program's rule. Returns error or None."""
+    rule = GAME["program"].get("premark")
+    if not rule:
+        return "Active program has no premark step"
+    try:
+        mask, bound = premark_mask(rule, value)
+    except ValueError as e:
+        return str(e)
+    apply_number_mask(GAME["cards"], mask)
+    if rule.get("record"):
+        GAME["program"]["params"][rule["record"]] = bound
+    broadcast_state()
+    return None
 
 def premark_special_number(ball: int):
-    digits = set(str(ball))
-    def should_mark(_L, n):
-        return any(d in str(n) for d in digits)
-    _for_all_numbers(should_mark)
-    GAME["program"]["params"]["digits"] = sorted(list(digits))
+    return apply_premark(int(ball))
 
 def premark_odd_even(first_kind: str):
-    first_kind = "odd" if str(first_kind).lower().startswith("o") else "even"
-    def mark_predicate(_L, n):
-        return (n % 2 == 1) if first_kind == "odd" else (n % 2 == 0)
-    _for_all_numbers(mark_predicate)
-    GAME["program"]["params"]["first"] = first_kind
+    return apply_premark("odd" if str(first_kind).lower().startswith("o") else "even")
 
-# ------------------ Listener Thread (mic via listen.sh) ------------------
-class Listener(threading.Thread):
+# ------------------ Session commands (run on the game actor) ------------------
+def begin_setup():
+    """Clear previous session state and go to 'how many games?'."""
+    GAME["session_total_games"] = None
+    GAME["session_lineup"] = []
+    GAME["current_game_idx"] = 0
+    GAME["status"] = "LISTENING"
+    SESSION.prefetch = None
+    WINNER.stop()
+    set_parse_mode("SETUP")
+    set_view("SETUP_GAMES")
+
+def set_session_games(n: int) -> int:
+    n = max(1, min(SESSION_MAX_GAMES, int(n)))
+    GAME["session_total_games"] = n
+    GAME["session_lineup"] = []     # we will collect these next
+    GAME["current_game_idx"] = 0
+    set_view("PROGRAM_PICK")
+    set_parse_mode("SETUP")         # keep in setup while picking games
+    return n
+
+def set_session_lineup(lineup: list) -> list:
+    all_programs = get_all_programs()          # <-- include custom_games.json
+    clean = []
+    for k in lineup:
+        k2 = str(k).upper()
+        if k2 in all_programs:                 # <-- accept custom too
+            clean.append(k2)
+    total = int(GAME["session_total_games"] or 0)
+    GAME["session_lineup"] = clean[: max(0, total)]
+    return GAME["session_lineup"]
+
+def start_session():
+    """Lock lineup and activate game one. Returns (error, http_code) or None."""
+    if not GAME["session_total_games"]:
+        return "You must set the number of games first.", 400
+    if not GAME["session_lineup"]:
+        return "No game lineup detected. Please pick at least one game type.", 400
+
+    GAME["current_game_idx"] = 0
+    key = GAME["session_lineup"][0]
+
+    # Confirm this key actually exists in all programs
+    if key not in get_all_programs():
+        return f"Unknown game key '{key}'. Check your lineup or custom_games.json.", 400
+    if not set_program_by_key(key):
+        return f"Failed to activate game '{key}'.", 500
+
+    reset_sheet()
+    set_parse_mode("PLAY")
+    set_view("OVERVIEW")
+    prefetch_lineup()
+    return None
+
+def next_game():
+    """Advance the lineup. Returns (ok, done, error)."""
+    total = int(GAME["session_total_games"] or 0)
+    idx = int(GAME["current_game_idx"] or 0) + 1
+    if total == 0:
+        return False, False, "no active session"
+    if idx >= total:
+        # end of session
+        GAME["current_game_idx"] = total
+        GAME["status"] = "SESSION_DONE"
+        broadcast({"type": "STATUS", "status": "SESSION_DONE"})
+        return True, True, None
+    GAME["current_game_idx"] = idx
+    # Get first custom game as default if lineup is empty
+    custom_games = load_custom_games()
+    default_key = list(custom_games.keys())[0] if custom_games else None
+    key = GAME["session_lineup"][idx] if idx < len(GAME["session_lineup"]) else default_key
+    if key and set_program_by_key(key):
+        pass  # Success
+    elif default_key:
+        set_program_by_key(default_key)  # Fallback to first custom game
+    reset_sheet()
+    set_parse_mode("PLAY")
+    if not RESTORING:
+        if SESSION.prefetch is None:
+            prefetch_lineup()       # e.g. a session restored after a restart
+        else:
+            ACTOR.defer("prefetch_sheet")
+    return True, False, None
+
+# ------------------ Lineup prefetch ------------------
+# Locking the lineup (session_start) warms what every later game needs: each
+# program is compiled once, the announcements are rendered, and the next
+# game's sheet is dealt on a deferred actor command (after the current update
+# has gone out), so next_game is a swap. The plan lives on the Session, not in
+# GAME, so it is never journaled; anything stale is ignored and redone inline.
+def prefetch_lineup():
+    """Compile the lineup, queue its announcements for rendering and plan the next sheet."""
+    all_programs = get_all_programs()
+    programs, phrases = {}, []
+    for i, key in enumerate(GAME["session_lineup"]):
+        phrases.append(f"Starting game {i + 1}:")
+        spec = all_programs.get(key)
+        if spec is None:
+            continue
+        if key not in programs:
+            try:
+                programs[key] = (spec, compile_program(spec, key))
+            except ValueError as e:
+                print(f"[prefetch] game {i + 1} ({key}) is invalid: {e}")
+                continue
+        if spec.get("name"):
+            phrases.append(f"{spec['name']}.")
+    phrases.append("Session complete.")
+    SESSION.prefetch = {"programs": programs, "sheet": None}
+    if not RESTORING:
+        SPEECH.prerender(phrases)
+        ACTOR.defer("prefetch_sheet")
+
+def prefetched_program(key: str, spec: dict):
+    """Compiled program from the lineup plan, if the spec is still the same object; else None."""
+    plan = SESSION.prefetch
+    hit = plan["programs"].get(key) if plan else None
+    return hit[1] if hit and hit[0] is spec else None
+
+def _sheet_key(what, free_enabled: bool):
+    return (tuple(what) if isinstance(what, (list, tuple)) else int(what), bool(free_enabled))
+
+def prefetch_sheet():
+    """Deal the next game's sheet ahead of time (deferred actor command)."""
+    plan = SESSION.prefetch
+    if not plan:
+        return
+    plan["sheet"] = None
+    lineup = GAME["session_lineup"]
+    idx = int(GAME["current_game_idx"] or 0) + 1
+    if idx >= min(len(lineup), int(GAME["session_total_games"] or 0)):
+        return
+    hit = plan["programs"].get(lineup[idx])
+    free_enabled = spec_free_enabled(hit[0]) if hit else GAME["free_enabled"]
+    serials = GAME.get("sheet_serials")
+    try:
+        if serials:
+            cards = printed_cards(serials, free_enabled=free_enabled)
+        else:
+            cards = make_cards(GAME["sheet_n"], free_enabled=free_enabled)
+    except ValueError:
+        return
+    plan["sheet"] = {"key": _sheet_key(serials or GAME["sheet_n"], free_enabled), "cards": cards}
+
+def take_prefetched_sheet(what, free_enabled: bool):
+    """The prefetched cards if they match this deal (serials or count, FREE), else None."""
+    plan = SESSION.prefetch
+    sheet = plan["sheet"] if plan else None
+    if not sheet or sheet["key"] != _sheet_key(what, free_enabled):
+        return None
+    plan["sheet"] = None
+    return sheet["cards"]
+
+def programs_state() -> dict:
+    """Active program + session info for /api/programs (no card export)."""
+    return {
+        "active": {
+            "key": GAME["program_key"],
+            "name": GAME["program"]["name"],
+            "desc": GAME["program"]["desc"],
+            "kind": GAME["program"]["kind"],
+            "params": GAME["program"].get("params", {}),
+            "preview_cells": program_preview_cells(),
+        },
+        "session": {
+            "total": GAME["session_total_games"],
+            "lineup": list(GAME["session_lineup"]),
+            "index": GAME["current_game_idx"],
+        },
+        "free_enabled": GAME["free_enabled"],
+    }
+
+def set_focus(idx: int):
+    if idx < 0:
+        GAME["focus_idx"] = None
+        set_view("OVERVIEW")
+    else:
+        idx = max(0, min(len(GAME["cards"]) - 1, idx))
+        GAME["focus_idx"] = idx
+        set_view("FOCUS")
+    return GAME["focus_idx"], GAME["view"]
+
+def set_status(status: str):
+    GAME["status"] = status
+    broadcast({"type": "STATUS", "status": status})
+
+def set_last_heard(raw: str):
+    GAME["last_heard"] = str(raw)
+    broadcast({"type": "HEARD", "raw": raw})
+
+def repeat_last_call():
+    last = None
+    for c in GAME["cards"]:
+        if c["calls"]:
+            last = c["calls"][-1]
+    if last:
+        mark_call(last[0], int(last[1:]))
+
+def premark(program_key, value):
+    """Apply the active program's premark (optionally only if it is program_key). Returns error or None."""
+    if program_key and GAME["program_key"] != program_key:
+        return "Active program is not " + ("Special Number" if program_key == "SPECIAL_NUMBER" else "Odd or Even")
+    return apply_premark(value)
+
+def handle_phrase(event: str):
+    if event == "GOOD_BINGO":
+        if not RESTORING:
+            if os.path.isfile(VICTORY_PATH):
+                play_wav(VICTORY_PATH)
+            WINNER.start()
+        set_status("GOOD_BINGO")
+    elif event == "GAME_CLOSED":
+        set_status("GAME_CLOSED")
+
+
+# Typed commands accepted by the game actor
+COMMANDS = {
+    "state":          public_state,
+    "programs_state": programs_state,
+    "mark_call":      mark_call,
+    "repeat":         repeat_last_call,
+    "heard":          set_last_heard,
+    "phrase":         handle_phrase,
+    "status":         set_status,
+    "set_mode":       set_mode,
+    "set_view":       set_view,
+    "reset_sheet":    reset_sheet,
+    "load_sheet":     load_sheet,
+    "focus":          set_focus,
+    "set_program":    set_program_by_key,
+    "premark":        premark,
+    "begin_setup":    begin_setup,
+    "session_games":  set_session_games,
+    "session_lineup": set_session_lineup,
+    "session_start":  start_session,
+    "next_game":      next_game,
+    "prefetch_sheet": prefetch_sheet,
+}
+
+# ------------------ Batched commands ------------------
+# /api/batch runs an ordered list of commands as one actor command, so they
+# share one flush (a single coalesced STATE) and one journal snapshot. It is
+# all-or-nothing: if a step fails, GAME is put back as it was before the
+# batch and the messages it queued are dropped.
+BATCH_COMMANDS = set(COMMANDS) - {"state", "programs_state", "prefetch_sheet"}
+
+# The app's own fixed batches (set_sheet_n, sheet/load) skip the undo
+# snapshot: only their first step can fail, and it checks its input before
+# changing GAME. Client batches from /api/batch always take the snapshot.
+BATCH_CHECKS_FIRST = {"reset_sheet", "load_sheet", "set_program"}
+BATCH_CANNOT_FAIL = {"set_view", "set_mode", "status", "heard", "phrase"}
+
+def _step_error(cmd: str, result):
+    """Failure for commands that report it in their return value instead of raising."""
+    if cmd == "set_program" and result is False:
+        return "unknown or invalid program"
+    if cmd == "premark" and result:
+        return result
+    if cmd == "session_start" and result:
+        return result[0]
+    if cmd == "next_game" and not result[0]:
+        return result[2]
+    return None
+
+def run_batch(steps: list, trusted: bool = False) -> dict:
+    """Apply [(cmd, args), ...] in order. Returns {"results", "state"}; raises ValueError (rolled back)."""
+    undo = not (trusted and steps and steps[0][0] in BATCH_CHECKS_FIRST
+                and all(cmd in BATCH_CANNOT_FAIL for cmd, _ in steps[1:]))
+    if undo:
+        saved = json.loads(json.dumps(session_snapshot()))
+        saved_compiled = GAME.get("compiled")
+        saved_parse_mode = SESSION.parse_mode   # set_parse_mode() side effect
+        plan = SESSION.prefetch
+        saved_prefetch = (plan, dict(plan) if plan else None)
+    mark = len(ACTOR.outbox) if ACTOR.buffering() else 0
+    held, ACTOR.held = ACTOR.held, []   # deferred commands wait for the commit
+    results = []
+    try:
+        for i, (cmd, args) in enumerate(steps):
+            try:
+                res = COMMANDS[cmd](*args)
+                err = _step_error(cmd, res)
+            except Exception as e:
+                err = str(e) or type(e).__name__
+            if err:
+                if undo:
+                    GAME.update(saved)
+                    GAME["compiled"] = saved_compiled
+                    SESSION.parse_mode = saved_parse_mode
+                    write_parse_mode()
+                    plan, contents = saved_prefetch
+                    if plan is not None:
+                        plan.clear()
+                        plan.update(contents)
+                    SESSION.prefetch = plan
+                if ACTOR.buffering():
+                    del ACTOR.outbox[mark:]
+                ACTOR.held = []
+                raise ValueError(f"step {i + 1} ({cmd}): {err}")
+            results.append(res)
+    finally:
+        committed, ACTOR.held = ACTOR.held, held
+    for item in committed:
+        ACTOR.defer(*item)
+    return {"results": results, "state": public_state()}
+
+COMMANDS["batch"] = run_batch
+
+# ------------------ Session journal (crash recovery) ------------------
+# Commands that change GAME are journaled after each batch. Ones that deal
+# new cards or swap programs aren't replayable deterministically, so they
+# write a snapshot instead (which also compacts the journal).
+JOURNAL_COMMANDS = {
+    "mark_call", "repeat", "phrase", "status", "set_mode", "set_view", "focus",
+    "premark", "session_games", "session_lineup",
+}
+SNAPSHOT_COMMANDS = {"reset_sheet", "load_sheet", "set_program", "begin_setup", "session_start", "next_game",
+                     "batch"}
+SNAPSHOT_KEYS = (
+    "view", "session_total_games", "session_lineup", "current_game_idx", "sheet_n",
+    "sheet_serials", "cards", "focus_idx", "mode", "status", "program_key", "program", "free_enabled",
+)
+RESTORING = False
+
+def session_snapshot() -> dict:
+    return {k: GAME[k] for k in SNAPSHOT_KEYS}
+
+def journal_batch(applied: list):
+    """Persist the commands of one actor batch (runs on the actor thread)."""
+    applied = [(cmd, args) for cmd, args in applied if cmd in JOURNAL_COMMANDS or cmd in SNAPSHOT_COMMANDS]
+    if not applied:
+        return
+    try:
+        journal = SESSION.journal
+        if any(cmd in SNAPSHOT_COMMANDS for cmd, _ in applied):
+            journal.snapshot(session_snapshot())
+        elif journal.append(applied):
+            journal.snapshot(session_snapshot())
+    except Exception as e:
+        print(f"[journal] write failed: {e}")
+
+def restore_session():
+    """Load the last snapshot and replay the journal tail into GAME (bound session)."""
+    global RESTORING
+    t0 = time.monotonic()
+    state, entries = SESSION.journal.load()
+    if not state and not entries:
+        return
+    if state:
+        GAME.update({k: state[k] for k in SNAPSHOT_KEYS if k in state})
+        GAME["compiled"] = None
+    RESTORING = True
+    try:
+        for cmd, args in entries:
+            try:
+                COMMANDS[cmd](*args)
+            except Exception as e:
+                print(f"[journal] replay of {cmd} failed: {e}")
+    finally:
+        RESTORING = False
+    print(f"[journal] restored session {SESSION.sid!r} ({len(entries)} journaled commands) "
+          f"in {(time.monotonic() - t0) * 1000:.1f} ms")
+
+# ------------------ Sessions (tables) ------------------
+# Each table has its own GAME dict, display sockets and journal; they share
+# the listener (one call stream, one model), programs and audio output. The
+# actor binds the module-level GAME/SESSION to a table while it applies that
+# table's commands, so the game functions above stay session-agnostic.
+DEFAULT_SESSION = "main"
+SESSION_ID_RE = re.compile(r"^[a-z0-9_-]{1,32}$")
+
+class Session:
+    __slots__ = ("sid", "game", "clients", "journal", "prefetch", "parse_mode")
+
+    def __init__(self, sid: str):
+        self.sid = sid
+        self.game = new_game_state()
+        self.clients = {}       # ws → encoding ("json" / "bin")
+        self.prefetch = None    # lineup plan (see prefetch_lineup)
+        self.parse_mode = None  # "SETUP" / "PLAY" / None (idle); see write_parse_mode
+        d = SESSION_DIR if sid == DEFAULT_SESSION else SESSION_DIR / "tables" / sid
+        self.journal = SessionJournal(d, compact_every=JOURNAL_COMPACT_EVERY)
+
+SESSIONS = {}
+
+def use_session(sess: Session):
+    """Point GAME/SESSION at a table (actor thread, or before the actor starts)."""
+    global GAME, SESSION
+    GAME, SESSION = sess.game, sess
+
+def open_session(sid: str) -> Session:
+    sess = SESSIONS.get(sid)
+    if sess is None:
+        if len(SESSIONS) >= MAX_SESSIONS:
+            raise ValueError(f"too many sessions (MAX_SESSIONS={MAX_SESSIONS})")
+        sess = SESSIONS[sid] = Session(sid)
+        use_session(sess)
+        if SESSION_RESTORE:
+            restore_session()
+        # a restored table may still be picking games
+        view = sess.game["view"]
+        sess.parse_mode = "SETUP" if view in ("SETUP_GAMES", "PROGRAM_PICK") else None if view == "WELCOME" else "PLAY"
+        write_parse_mode()
+    return sess
+
+def close_session(sid: str) -> bool:
+    sess = SESSIONS.pop(sid, None)
+    if sess is None:
+        return False
+    sess.journal.close()
+    write_parse_mode()
+    with WS_LOCK:
+        clients = list(sess.clients)
+        sess.clients.clear()
+    for ws in clients:
+        try:
+            ws.close()
+        except Exception:
+            pass
+    return True
+
+def request_sid() -> str:
+    """Session of the current HTTP request (set by SessionPathMiddleware)."""
+    if has_request_context():
+        return request.environ.get("betty.session", DEFAULT_SESSION)
+    return DEFAULT_SESSION
+
+def request_game() -> dict:
+    """Read-only view of the request's GAME (writes go through the actor)."""
+    sess = SESSIONS.get(request_sid())
+    return sess.game if sess else {}
+
+def deep_sizeof(obj, seen=None) -> int:
+    """Rough retained size of an object graph in bytes (shared objects counted once)."""
+    seen = set() if seen is None else seen
+    if id(obj) in seen:
+        return 0
+    seen.add(id(obj))
+    n = sys.getsizeof(obj)
+    if isinstance(obj, dict):
+        n += sum(deep_sizeof(k, seen) + deep_sizeof(v, seen) for k, v in obj.items())
+    elif isinstance(obj, (list, tuple, set, frozenset)):
+        n += sum(deep_sizeof(x, seen) for x in obj)
+    return n
+
+def session_sizes() -> dict:
+    """Bytes each table adds on top of what tables share (programs, compiled rules)."""
+    shared = set()
+    deep_sizeof(PROGRAMS, shared)
+    deep_sizeof(GAME_STORE.get(), shared)
+    return {sid: deep_sizeof(sess.game, set(shared)) for sid, sess in list(SESSIONS.items())}
+
+# walks every GAME dict, so it runs on the actor (the only thread that changes them)
+COMMANDS["session_sizes"] = session_sizes
+
+def attach_display(ws, enc: str):
+    """Register a display socket on the bound table; returns (session, state)."""
+    with WS_LOCK:
+        SESSION.clients[ws] = enc
+    return SESSION, public_state()
+
+# on the actor, so a table can't be closed between opening it and registering
+# the display (close_session runs there too and closes the socket)
+COMMANDS["attach_display"] = attach_display
+
+# ------------------ Game actor (single writer for GAME) ------------------
+class GameActor(threading.Thread):
+    """
+    Owns GAME. Listener and Flask threads submit typed commands; the actor
+    drains whatever is queued, applies it in order, then sends one coalesced
+    broadcast for the whole batch.
+    """
     def __init__(self):
-        super().__init__(daemon=True)
-        self.proc = None
-        self._stop = threading.Event()
+        super().__init__(daemon=True, name="game-actor")
+        self._q = queue.Queue()
+        self.outbox = None
+        self.held = None          # deferred commands of a batch in progress (run_batch)
+
+    def buffering(self) -> bool:
+        return self.outbox is not None and threading.current_thread() is self
+
+    def submit(self, cmd: str, *args, sid: str | None = None) -> Future:
+        fut = Future()
+        if threading.current_thread() is self:
+            # Re-entrant call from a command: apply inline, same batch/session.
+            try:
+                fut.set_result(COMMANDS[cmd](*args))
+            except Exception as e:
+                fut.set_exception(e)
+            return fut
+        self._q.put((sid or request_sid(), cmd, args, fut))
+        return fut
+
+    def call(self, cmd: str, *args, sid: str | None = None, timeout: float = 10.0):
+        """Submit and wait for the result (request threads; session from the URL)."""
+        return self.submit(cmd, *args, sid=sid).result(timeout=timeout)
+
+    def tell(self, cmd: str, *args, sid: str | None = None):
+        """Submit without waiting (listener thread)."""
+        self.submit(cmd, *args, sid=sid)
+
+    def defer(self, cmd: str, *args):
+        """From a command: run cmd on this table in a later batch, after the current flush."""
+        if self.held is not None:
+            self.held.append((cmd, *args))   # inside /api/batch: only if it commits
+            return
+        self._q.put((SESSION.sid, cmd, args, Future()))
 
     def run(self):
+        while True:
+            batch = [self._q.get()]
+            while len(batch) < ACTOR_BATCH_MAX:
+                try:
+                    batch.append(self._q.get_nowait())
+                except queue.Empty:
+                    break
+            # one flush + journal write per table, in order of first appearance
+            by_sid = {}
+            for item in batch:
+                by_sid.setdefault(item[0], []).append(item[1:])
+            for sid, items in by_sid.items():
+                self._apply(sid, items)
+
+    def _apply(self, sid: str, items: list):
+        if sid == "__close__":
+            for cmd, args, fut in items:
+                fut.set_result(close_session(args[0]))
+            return
+        # A table opened for the first time replays its journal: buffer what
+        # the replay broadcasts and drop it (its displays get the state below)
+        self.outbox = []
+        try:
+            use_session(open_session(sid))
+        except ValueError as e:
+            self.outbox = None
+            for _, _, fut in items:
+                fut.set_exception(e)
+            return
+        self.outbox = []
+        applied = []
+        for cmd, args, fut in items:
+            try:
+                fut.set_result(COMMANDS[cmd](*args))
+                applied.append((cmd, args))
+            except Exception as e:
+                print(f"[actor] {cmd} failed: {e}")
+                fut.set_exception(e)
+        out, self.outbox = self.outbox, None
+        try:
+            self._flush(out)
+        except Exception as e:
+            print(f"[actor] flush failed: {e}")
+        journal_batch(applied)
+
+    def close_session(self, sid: str) -> bool:
+        return self.submit("close", sid, sid="__close__").result(timeout=10.0)
+
+    def _flush(self, out: list):
+        """Send queued messages; all STATE snapshots collapse into one at the end."""
+        dirty = False
+        msgs = []
+        for m in out:
+            t = m.get("type")
+            if t == "STATE":
+                dirty = True
+                continue
+            if t == "CALL":
+                dirty = True
+                m = {k: v for k, v in m.items() if k != "state"}
+            msgs.append(m)
+        if dirty:
+            if msgs and msgs[-1].get("type") == "CALL":
+                msgs[-1]["state"] = public_state()
+            else:
+                msgs.append({"type": "STATE", "state": public_state()})
+        for m in msgs:
+            send_to_clients(m)
+            if m.get("type") == "CALL" and not RESTORING:
+                TRACER.stamp(m["call"], "send")
+
+ACTOR = GameActor()
+open_session(DEFAULT_SESSION)   # restores the main table's journal, binds GAME
+ACTOR.start()
+
+def close_journals():
+    for sess in list(SESSIONS.values()):
+        sess.journal.close()
+
+atexit.register(close_journals)
+
+# Listener events from transcriber.py carry the capture stream's name. A
+# stream named after an open table (LISTEN_STREAMS="table2=...") feeds only
+# that table; any other stream, and listen.sh, feeds every table. Mics that
+# hear the same caller (a hall feed plus a local mic) both report each call:
+# a CALL or PHRASE a table already got from another stream within
+# CALL_DEDUP_S is dropped. Repeats on the same stream still go through.
+CALL_DEDUP_S = float(os.environ.get("CALL_DEDUP_S", "4"))
+_HEARD_RECENTLY = {}   # (sid, key) -> (stream, monotonic time)
+
+def heard_on_other_stream(sid: str, key: str, stream, now: float) -> bool:
+    prev = _HEARD_RECENTLY.get((sid, key))
+    if prev and prev[0] != stream and now - prev[1] < CALL_DEDUP_S:
+        return True
+    _HEARD_RECENTLY[(sid, key)] = (stream, now)
+    if len(_HEARD_RECENTLY) > 512:
+        for k, (_, t) in list(_HEARD_RECENTLY.items()):
+            if now - t >= CALL_DEDUP_S:
+                del _HEARD_RECENTLY[k]
+    return False
+
+def apply_listener_event(evt: dict):
+    """Bus subscriber: feed parser events to the game actor."""
+    kind = evt.get("type")
+    stream = evt.get("stream")
+    if kind == "CALL":
+        key = f"{evt['letter']}{int(evt['number'])}"
+    elif kind == "PHRASE":
+        key = f"PHRASE {evt.get('event')}"
+    else:
+        key = None
+    targets = [stream] if stream in SESSIONS else list(SESSIONS)
+    if key:
+        now = time.monotonic()
+        targets = [sid for sid in targets if not heard_on_other_stream(sid, key, stream, now)]
+        if not targets:
+            return
+    if kind == "CALL":
+        TRACER.begin(key, evt.get("trace"))
+    raw = evt.get("raw")
+    for sid in targets:
+        if raw:
+            ACTOR.tell("heard", raw, sid=sid)
+        if kind == "CALL":
+            ACTOR.tell("mark_call", evt["letter"], int(evt["number"]), sid=sid)
+        elif kind == "PHRASE":
+            ACTOR.tell("phrase", evt.get("event"), sid=sid)
+
+BUS.subscribe("state", apply_listener_event)
+
+# Counters reported by listen.sh (echo-gated chunks, ...)
+LISTEN_STATS = {"echo_suppressed": 0}
+
+def note_listener_stats(evt: dict):
+    LISTEN_STATS["echo_suppressed"] += 1   # listen.sh's own count restarts with it
+
+BUS.subscribe("listen-stats", note_listener_stats, types={"echo_suppressed"})
+
+# ------------------ Listener Thread (mic via listen.sh) ------------------
+# listen.sh prints {"type":"heartbeat","phase":...} lines as it moves through
+# start → rec → whisper. A pipeline that exits, or sits in "start"/"whisper"
+# longer than LISTENER_STALL_S, is killed (whole process group) and replaced,
+# with exponential backoff. With LISTENER_STANDBY=1 a second listen.sh waits
+# pre-warmed (checks done, model in page cache) and takes over at once.
+# With LISTEN_STREAMS set the pipeline is transcriber.py (same protocol).
+LISTENER_STANDBY = os.environ.get("LISTENER_STANDBY", "0") == "1"
+LISTENER_STALL_S = float(os.environ.get("LISTENER_STALL_S", "30"))
+LISTENER_BACKOFF_MAX = float(os.environ.get("LISTENER_BACKOFF_MAX", "30"))
+STALL_PHASES = {"start", "whisper"}
+
+class ListenPipeline:
+    """One listen.sh process plus the thread that reads its output."""
+    def __init__(self, standby: bool = False):
         env = os.environ.copy()
         env["ALSA_DEV"]      = DEVICE_HINT
         env["WHISPER_BIN"]   = WHISPER_BIN
         env["WHISPER_MODEL"] = MODEL_PATH
-        try:
-            self.proc = subprocess.Popen(
-                ["bash", LISTEN_SH],
-                stdout=subprocess.PIPE, stderr=subprocess.STDOUT,
-                cwd=str(APP_DIR), env=env, text=True, bufsize=1
-            )
-        except FileNotFoundError:
-            print("listen.sh not found; running without mic.")
-            return
+        env["STANDBY"]       = "1" if standby else "0"
+        cmd = [sys.executable, "-u", str(APP_DIR / "transcriber.py")] if LISTEN_STREAMS else ["bash", LISTEN_SH]
+        self.proc = subprocess.Popen(
+            cmd,
+            stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.STDOUT,
+            cwd=str(APP_DIR), env=env, text=True, bufsize=1, start_new_session=True
+        )
+        self.standby = standby
+        self.started = time.monotonic()
+        self.phase, self.phase_at = "start", self.started
+        self.ready = threading.Event()
+        threading.Thread(target=self._read, daemon=True, name="listen-reader").start()
 
+    def _read(self):
         for line in self.proc.stdout:
             line = line.strip()
             if not line:
@@ -573,43 +1396,136 @@ class Listener(threading.Thread):
             except Exception:
                 print(f"[listen.sh] {line}")
                 continue
+            if evt.get("type") == "heartbeat":
+                self.phase, self.phase_at = evt.get("phase", ""), time.monotonic()
+                if self.phase == "standby":
+                    self.ready.set()
+                continue
+            BUS.publish(evt)
 
-            raw = evt.get("raw")
-            if raw:
-                GAME["last_heard"] = str(raw)
-                try:
-                    broadcast({"type":"HEARD", "raw": raw})
-                except Exception:
-                    pass
-
-            EVENT_QUEUE.put(evt)
-            if evt.get("type") == "CALL":
-                try:
-                    mark_call(evt["letter"], int(evt["number"]))
-                except Exception:
-                    pass
-            elif evt.get("type") == "PHRASE":
-                if evt.get("event") == "GOOD_BINGO":
-                    GAME["status"] = "GOOD_BINGO"
-                    if os.path.isfile(VICTORY_PATH):
-                        play_wav(VICTORY_PATH)
-                    WINNER.start()
-                    broadcast({"type": "STATUS", "status": "GOOD_BINGO"})
-                elif evt.get("event") == "GAME_CLOSED":
-                    GAME["status"] = "GAME_CLOSED"
-                    broadcast({"type": "STATUS", "status": "GAME_CLOSED"})
-
-    def stop(self):
-        self._stop.set()
+    def activate(self):
+        self.standby = False
+        self.started = self.phase_at = time.monotonic()
         try:
-            if self.proc and self.proc.poll() is None:
-                self.proc.terminate()
+            self.proc.stdin.write("go\n")
+            self.proc.stdin.flush()
         except Exception:
             pass
 
+    def alive(self) -> bool:
+        return self.proc.poll() is None
+
+    def stalled(self) -> bool:
+        return self.phase in STALL_PHASES and time.monotonic() - self.phase_at > LISTENER_STALL_S
+
+    def kill(self):
+        for sig in (signal.SIGTERM, signal.SIGKILL):
+            try:
+                os.killpg(self.proc.pid, sig)
+                self.proc.wait(timeout=2)
+                return
+            except ProcessLookupError:
+                return
+            except Exception:
+                continue
+
+class Listener(threading.Thread):
+    """Supervises listen.sh: restart with backoff, stall detection, optional warm standby."""
+    def __init__(self):
+        super().__init__(daemon=True, name="listener")
+        self.active = None
+        self.standby = None
+        self.restarts = 0
+        self.last_reason = None
+        self._quit = threading.Event()
+        self._restart = threading.Event()
+
+    def _spawn(self, standby: bool = False):
+        try:
+            return ListenPipeline(standby)
+        except FileNotFoundError:
+            print("listen.sh not found; running without mic.")
+            return None
+
+    def _next_pipeline(self):
+        s, self.standby = self.standby, None
+        if s is not None and s.alive():
+            s.activate()
+            return s
+        return self._spawn()
+
+    def _watch(self, pipe: ListenPipeline):
+        """Block until the pipeline needs replacing; returns why (None on shutdown)."""
+        while not self._quit.wait(0.5):
+            if self._restart.is_set():
+                self._restart.clear()
+                return "restart requested"
+            if not pipe.alive():
+                return f"exited ({pipe.proc.returncode})"
+            if pipe.stalled():
+                return f"stalled in {pipe.phase}"
+            if LISTENER_STANDBY and (self.standby is None or not self.standby.alive()):
+                self.standby = self._spawn(standby=True)
+        return None
+
+    def run(self):
+        backoff = 1.0
+        while not self._quit.is_set():
+            pipe = self._next_pipeline()
+            if pipe is None:
+                return
+            self.active = pipe
+            reason = self._watch(pipe)
+            pipe.kill()
+            if reason is None:
+                break
+            self.restarts += 1
+            self.last_reason = reason
+            print(f"[listener] pipeline {reason}; restarting (#{self.restarts})")
+            if time.monotonic() - pipe.started > 60:
+                backoff = 1.0
+            # first failure after a healthy run fails over to a warm standby at once
+            failover = backoff <= 1.0 and self.standby is not None and self.standby.alive()
+            if not failover and self._quit.wait(backoff):
+                break
+            backoff = min(LISTENER_BACKOFF_MAX, backoff * 2)
+
+    def restart(self):
+        self._restart.set()
+
+    def stop(self):
+        self._quit.set()
+        for p in (self.active, self.standby):
+            if p is not None:
+                p.kill()
+
+    def status(self) -> dict:
+        p = self.active
+        return {
+            "running": bool(p and p.alive()),
+            "phase": p.phase if p else None,
+            "phase_age_s": round(time.monotonic() - p.phase_at, 1) if p else None,
+            "uptime_s": round(time.monotonic() - p.started, 1) if p else None,
+            "restarts": self.restarts,
+            "last_reason": self.last_reason,
+            "standby": bool(self.standby and self.standby.alive()),
+            "standby_ready": bool(self.standby and self.standby.ready.is_set()),
+        }
+
 listener = Listener()
-listener.start()
-atexit.register(listener.stop)
+relay = None
+if BETTY_ROLE == "subscriber":
+    if not CALL_SOURCE:
+        print("[relay] BETTY_ROLE=subscriber needs CALL_SOURCE=http://<publisher>:<port>")
+    else:
+        # republish locally so the usual subscribers (state, stats) apply it
+        relay = CallSubscriber(HttpSource(CALL_SOURCE),
+                               lambda evt: BUS.publish(dict(evt, origin_seq=evt.get("seq"))))
+        relay.start()
+        atexit.register(relay.stop)
+else:
+    listener.start()
+    atexit.register(listener.stop)
 
 # ------------------ Flask App ------------------
 app = Flask(
@@ -619,10 +1535,100 @@ app = Flask(
 )
 sock = Sock(app)
 
+# ----------- Session-scoped URLs -----------
+class SessionPathMiddleware:
+    """/s/<id>/api/... → /api/... (and /s/<id>/ws, /s/<id>/) with the id in the environ."""
+    PATH_RE = re.compile(r"^/s/([a-z0-9_-]{1,32})(/.*)?$")
+
+    def __init__(self, wsgi_app):
+        self.wsgi_app = wsgi_app
+
+    def __call__(self, environ, start_response):
+        m = self.PATH_RE.match(environ.get("PATH_INFO", ""))
+        if m:
+            if m.group(1) not in SESSIONS and len(SESSIONS) >= MAX_SESSIONS:
+                start_response("404 Not Found", [("Content-Type", "text/plain")])
+                return [b"no such table (MAX_SESSIONS reached)\n"]
+            environ["betty.session"] = m.group(1)
+            environ["PATH_INFO"] = m.group(2) or "/"
+        return self.wsgi_app(environ, start_response)
+
+app.wsgi_app = SessionPathMiddleware(app.wsgi_app)
+
+# ----------- Conditional JSON (ETag / 304) -----------
+def etag_json(payload):
+    """JSON response with a content ETag; answers 304 when the client already has it."""
+    body = json.dumps(payload, separators=(",", ":"))
+    tag = '"' + hashlib.sha1(body.encode("utf-8")).hexdigest()[:20] + '"'
+    headers = {"ETag": tag, "Cache-Control": "no-cache"}
+    if tag in request.headers.get("If-None-Match", ""):
+        return Response(status=304, headers=headers)
+    return Response(body, mimetype="application/json", headers=headers)
+
+# ----------- Static assets (fingerprinted, precompressed, from memory) -----------
+ASSETS = AssetCache(APP_DIR / "static")
+app.jinja_env.globals["asset_url"] = ASSETS.url
+print(f"[assets] {len(ASSETS.info()['files'])} files ready in {ASSETS.build_ms:.0f} ms")
+
+def send_asset(a: Asset, cache_control: str):
+    """Asset bytes in the best encoding the client takes; 304 on a matching ETag."""
+    headers = {"ETag": a.etag, "Cache-Control": cache_control, "Vary": "Accept-Encoding"}
+    if a.etag in request.headers.get("If-None-Match", ""):
+        return Response(status=304, headers=headers)
+    enc = pick_encoding(a.variants, request.headers.get("Accept-Encoding", ""))
+    if enc:
+        headers["Content-Encoding"] = enc
+    return Response(a.variants[enc] if enc else a.data, content_type=a.mimetype, headers=headers)
+
+@app.get("/assets/<path:name>")
+def assets(name):
+    a = ASSETS.lookup(name)
+    if a is None:
+        return "not found", 404
+    return send_asset(a, CACHE_FOREVER)
+
 # ----------- Page -----------
+# index.html only changes with the templates or the asset hashes, so it is
+# rendered (and compressed) once per asset version and revalidated by ETag.
+_PAGE = {"version": None, "mtime_ns": None, "asset": None}
+
 @app.get("/")
 def index():
-    return render_template("index.html")
+    ASSETS.refresh()
+    try:
+        mtime_ns = (APP_DIR / "templates" / "index.html").stat().st_mtime_ns
+    except OSError:
+        mtime_ns = None
+    if _PAGE["version"] != ASSETS.version or _PAGE["mtime_ns"] != mtime_ns:
+        html = render_template("index.html").encode("utf-8")
+        _PAGE.update(version=ASSETS.version, mtime_ns=mtime_ns, asset=Asset("index.html", html, mtime_ns or 0))
+    return send_asset(_PAGE["asset"], "no-cache")
+
+# Kiosk boot timings (posted once per page load by app.js)
+KIOSK_BOOTS = deque(maxlen=20)
+
+@app.post("/api/kiosk/boot")
+def api_kiosk_boot():
+    d = request.get_json(force=True, silent=True) or {}
+    rec = {"ts": time.time(), "session": request_sid()}
+    for k in ("first_render_ms", "html_ms", "dom_ready_ms", "assets_ms", "ws_state_ms"):
+        try:
+            rec[k] = round(float(d[k]), 1)
+        except (KeyError, TypeError, ValueError):
+            pass
+    rec["cached"] = bool(d.get("cached"))
+    try:
+        rec["transfer_bytes"] = int(float(d.get("transfer_bytes") or 0))
+    except (TypeError, ValueError, OverflowError):
+        rec["transfer_bytes"] = 0
+    KIOSK_BOOTS.append(rec)
+    print(f"[kiosk] first render {rec.get('first_render_ms')} ms (cached={rec['cached']}, "
+          f"{rec['transfer_bytes']} bytes transferred)")
+    return jsonify({"ok": True})
+
+@app.get("/api/kiosk/boot")
+def api_kiosk_boot_get():
+    return jsonify({"boots": list(KIOSK_BOOTS), "assets": ASSETS.info()})
 
 @app.get("/favicon.ico")
 def favicon():
@@ -631,30 +1637,20 @@ def favicon():
 # ----------- State APIs -----------
 @app.get("/api/state")
 def api_state():
-    return jsonify(public_state())
+    return jsonify(ACTOR.call("state"))
 
 @app.post("/api/start")
 def api_start():
     """Start a new session - clear previous game state and lineup."""
     if os.path.isfile(JINGLE_PATH):
         play_wav(JINGLE_PATH)
-    
-    # Clear previous session state
-    GAME["session_total_games"] = None
-    GAME["session_lineup"] = []
-    GAME["current_game_idx"] = 0
-    GAME["status"] = "LISTENING"
-    
-    # Clear any win state
-    WINNER.stop()
-    
-    set_parse_mode("SETUP")
-    set_view("SETUP_GAMES")
+
+    # Clear previous session state and any win state
+    ACTOR.call("begin_setup")
     try:
         say("Welcome to Betty Bot. How many games will you be playing tonight?")
     except Exception:
         pass
-    broadcast({"type": "STATE", "state": public_state()})
     return jsonify({"ok": True})
 
 @app.post("/api/winner/start")
@@ -673,8 +1669,7 @@ def api_winner_start():
         ok = True
 
     if ok:
-        GAME["status"] = "GOOD_BINGO"
-        broadcast({"type": "STATUS", "status": GAME["status"]})
+        ACTOR.call("status", "GOOD_BINGO")
         return jsonify({"ok": True})
 
     return jsonify({
@@ -686,53 +1681,66 @@ def api_winner_start():
 @app.post("/api/set_session_games")
 def api_set_session_games():
     d = request.get_json(force=True, silent=True) or {}
-    n = int(d.get("count", 1))
-    n = max(1, min(20, n))
-    GAME["session_total_games"] = n
-    GAME["session_lineup"] = []     # we will collect these next
-    GAME["current_game_idx"] = 0
-    set_view("PROGRAM_PICK")
-    set_parse_mode("SETUP")         # keep in setup while picking games
+    n = ACTOR.call("session_games", int(d.get("count", 1)))
     try:
         say("Great. Let's pick the games. What is game one?")
     except Exception:
         pass
     return jsonify({"ok": True, "count": n})
 
+# ----------- Event bus catch-up -----------
+@app.get("/api/events")
+def api_events():
+    """
+    Listener events after ?since=seq (oldest first); 'dropped' counts overwritten ones.
+    ?wait=s long-polls until there is something new; ?types=CALL,PHRASE filters.
+    Resume from 'next' (last seq looked at, even if filtered out). 'epoch'
+    changes when this process restarts and seqs begin again at 1.
+    """
+    try:
+        since = int(request.args.get("since", 0))
+        limit = min(1000, max(1, int(request.args.get("limit", 200))))
+        wait = min(25.0, max(0.0, float(request.args.get("wait", 0))))
+    except (TypeError, ValueError):
+        return jsonify({"ok": False, "error": "since/limit/wait must be numbers"}), 400
+    types = {t for t in request.args.get("types", "").split(",") if t}
+    if wait and BUS.seq <= since:
+        BUS.wait(since, timeout=wait)
+    events, dropped = BUS.since(since, limit)
+    nxt = events[-1]["seq"] if events else min(since, BUS.seq)
+    if types:
+        events = [e for e in events if e.get("type") in types]
+    return jsonify({"ok": True, "events": events, "dropped": dropped, "seq": BUS.seq,
+                    "next": nxt, "epoch": BUS_EPOCH})
+
 # ----------- Programs / Session lineup -----------
+_PROGRAM_ITEMS = {"version": -1, "items": []}
+
+def program_list_items() -> list:
+    """Program-pick list, rebuilt only when the custom games cache changes."""
+    custom_games = load_custom_games()
+    if _PROGRAM_ITEMS["version"] != GAME_STORE.version:
+        items = []
+        for key, spec in custom_games.items():
+            items.append({
+                "key": key,
+                "name": spec["name"],
+                "desc": spec["desc"],
+                "kind": spec.get("kind", "custom"),
+                "params": spec.get("params", {}),
+                "preview_cells": spec.get("preview_cells", []),
+                "patterns": spec.get("patterns", []),  # Include patterns for preview animation
+                "is_custom": True,
+            })
+        _PROGRAM_ITEMS.update(version=GAME_STORE.version, items=items)
+    return _PROGRAM_ITEMS["items"]
+
 @app.get("/api/programs")
 def api_programs():
     """Get all available programs (only custom games)."""
-    items = []
-    custom_games = load_custom_games()
-    for key, spec in custom_games.items():
-        items.append({
-            "key": key,
-            "name": spec["name"],
-            "desc": spec["desc"],
-            "kind": spec.get("kind", "custom"),
-            "params": spec.get("params", {}),
-            "preview_cells": spec.get("preview_cells", []),
-            "patterns": spec.get("patterns", []),  # Include patterns for preview animation
-            "is_custom": True,
-        })
-    return jsonify({
-        "programs": items,
-        "active": {
-            "key": GAME["program_key"],
-            "name": GAME["program"]["name"],
-            "desc": GAME["program"]["desc"],
-            "kind": GAME["program"]["kind"],
-            "params": GAME["program"].get("params", {}),
-            "preview_cells": program_preview_cells(),
-        },
-        "session": {
-            "total": GAME["session_total_games"],
-            "lineup": GAME["session_lineup"],
-            "index": GAME["current_game_idx"],
-        },
-        "free_enabled": GAME["free_enabled"],
-    })
+    payload = ACTOR.call("programs_state")
+    payload["programs"] = program_list_items()
+    return etag_json(payload)
 
 @app.post("/api/session/lineup")
 def api_session_lineup():
@@ -741,16 +1749,8 @@ def api_session_lineup():
     if not isinstance(lineup, list):
         return jsonify({"ok": False, "error": "lineup must be a list"}), 400
 
-    all_programs = get_all_programs()          # <-- include custom_games.json
-    clean = []
-    for k in lineup:
-        k2 = str(k).upper()
-        if k2 in all_programs:                 # <-- accept custom too
-            clean.append(k2)
-
-    total = int(GAME["session_total_games"] or 0)
-    GAME["session_lineup"] = clean[: max(0, total)]
-    return jsonify({"ok": True, "session_lineup": GAME["session_lineup"], "total": GAME["session_total_games"]})
+    clean = ACTOR.call("session_lineup", lineup)
+    return jsonify({"ok": True, "session_lineup": clean, "total": request_game().get("session_total_games")})
 
 
 
@@ -760,28 +1760,13 @@ def api_session_start():
     Locks lineup and starts Game 1.
     Fails loudly if no valid lineup or game key.
     """
-    if not GAME["session_total_games"]:
-        return jsonify({"ok": False, "error": "You must set the number of games first."}), 400
-
-    if not GAME["session_lineup"]:
-        return jsonify({"ok": False, "error": "No game lineup detected. Please pick at least one game type."}), 400
-
-    GAME["current_game_idx"] = 0
-    key = GAME["session_lineup"][0]
-
-    # Confirm this key actually exists in all programs
-    all_programs = get_all_programs()
-    if key not in all_programs:
-        return jsonify({"ok": False, "error": f"Unknown game key '{key}'. Check your lineup or custom_games.json."}), 400
-
-    if not set_program_by_key(key):
-        return jsonify({"ok": False, "error": f"Failed to activate game '{key}'."}), 500
-
-    reset_sheet(GAME["sheet_n"])
-    set_parse_mode("PLAY")
-    set_view("OVERVIEW")
-    say(f"Starting game one: {GAME['program']['name']}.")
-    return jsonify({"ok": True, "state": public_state()})
+    err = ACTOR.call("session_start")
+    if err:
+        msg, code = err
+        return jsonify({"ok": False, "error": msg}), code
+    state = ACTOR.call("state")
+    say("Starting game 1:", f"{state['program']['name']}.")
+    return jsonify({"ok": True, "state": state})
 
 
 @app.post("/api/game/next")
@@ -789,82 +1774,130 @@ def api_game_next():
     """
     Advance to the next game in the lineup. Resets sheet and status.
     """
-    total = int(GAME["session_total_games"] or 0)
-    idx = int(GAME["current_game_idx"] or 0) + 1
-    if total == 0:
-        return jsonify({"ok": False, "error": "no active session"}), 400
-    if idx >= total:
-        # end of session
-        GAME["current_game_idx"] = total
-        GAME["status"] = "SESSION_DONE"
-        broadcast({"type": "STATUS", "status": "SESSION_DONE"})
+    ok, done, err = ACTOR.call("next_game")
+    if not ok:
+        return jsonify({"ok": False, "error": err}), 400
+    state = ACTOR.call("state")
+    if done:
         say("Session complete.")
-        return jsonify({"ok": True, "done": True, "state": public_state()})
-    GAME["current_game_idx"] = idx
-    # Get first custom game as default if lineup is empty
-    custom_games = load_custom_games()
-    default_key = list(custom_games.keys())[0] if custom_games else None
-    key = GAME["session_lineup"][idx] if idx < len(GAME["session_lineup"]) else default_key
-    if key and set_program_by_key(key):
-        pass  # Success
-    elif default_key:
-        set_program_by_key(default_key)  # Fallback to first custom game
-    reset_sheet(GAME["sheet_n"])
-    set_parse_mode("PLAY")
-    say(f"Starting game {idx+1}: {GAME['program']['name']}.")
-    return jsonify({"ok": True, "state": public_state()})
+        return jsonify({"ok": True, "done": True, "state": state})
+    say(f"Starting game {state['current_game_idx']+1}:", f"{state['program']['name']}.")
+    return jsonify({"ok": True, "state": state})
+
+@app.post("/api/batch")
+def api_batch():
+    """
+    Ordered commands applied atomically with one state update, e.g.
+      {"steps": [{"cmd": "session_lineup", "args": [["CLASSIC", "LUCKY_7"]]},
+                 {"cmd": "session_start"}],
+       "say": ["Starting game 1:", "Classic Bingo."]}
+    "say" is spoken once, only if every step succeeded.
+    """
+    d = request.get_json(force=True, silent=True) or {}
+    raw = d.get("steps")
+    if not isinstance(raw, list) or not raw:
+        return jsonify({"ok": False, "error": "steps must be a non-empty list"}), 400
+    steps = []
+    for i, st in enumerate(raw):
+        cmd = st.get("cmd") if isinstance(st, dict) else None
+        args = st.get("args", []) if isinstance(st, dict) else None
+        if cmd not in BATCH_COMMANDS:
+            return jsonify({"ok": False, "error": f"step {i + 1}: unknown command {cmd!r}"}), 400
+        if not isinstance(args, list):
+            return jsonify({"ok": False, "error": f"step {i + 1}: args must be a list"}), 400
+        try:
+            inspect.signature(COMMANDS[cmd]).bind(*args)
+        except TypeError as e:
+            return jsonify({"ok": False, "error": f"step {i + 1} ({cmd}): {e}"}), 400
+        steps.append((cmd, tuple(args)))
+    try:
+        out = ACTOR.call("batch", steps)
+    except (TypeError, ValueError) as e:
+        return jsonify({"ok": False, "error": str(e)}), 400
+    parts = d.get("say")
+    if parts:
+        say(*(parts if isinstance(parts, list) else [parts]))
+    return jsonify({"ok": True, **out})
 
 # Special flows
 @app.post("/api/program/special-number/premark")
 def api_program_special_number_premark():
-    if GAME["program_key"] != "SPECIAL_NUMBER":
-        return jsonify({"ok": False, "error": "Active program is not Special Number"}), 400
     d = request.get_json(force=True, silent=True) or {}
     ball = int(d.get("ball", -1))
     if ball < 1 or ball > 75:
         return jsonify({"ok": False, "error": "ball must be 1..75"}), 400
-    premark_special_number(ball)
-    say(f"Special number is {ball}. Matching digits are premarked.")
-    return jsonify({"ok": True, "program": public_state()["program"]})
+    err = ACTOR.call("premark", "SPECIAL_NUMBER", ball)
+    if err:
+        return jsonify({"ok": False, "error": err}), 400
+    say(f"Special number is {ball}.", "Matching digits are premarked.")
+    return jsonify({"ok": True, "program": ACTOR.call("state")["program"]})
 
 @app.post("/api/program/odd-even/premark")
 def api_program_odd_even_premark():
-    if GAME["program_key"] != "ODD_EVEN":
-        return jsonify({"ok": False, "error": "Active program is not Odd or Even"}), 400
     d = request.get_json(force=True, silent=True) or {}
     first = str(d.get("first","")).strip().lower()
     if first not in ("odd","even"):
         return jsonify({"ok": False, "error": "first must be 'odd' or 'even'"}), 400
-    premark_odd_even(first)
+    err = ACTOR.call("premark", "ODD_EVEN", first)
+    if err:
+        return jsonify({"ok": False, "error": err}), 400
     say(f"{first.capitalize()} numbers premarked.")
-    return jsonify({"ok": True, "program": public_state()["program"]})
+    return jsonify({"ok": True, "program": ACTOR.call("state")["program"]})
+
+@app.post("/api/program/premark")
+def api_program_premark():
+    """Apply the active program's premark rule to {"value": first ball or literal}."""
+    d = request.get_json(force=True, silent=True) or {}
+    value = d.get("value")
+    if isinstance(value, str) and value.strip().isdigit():
+        value = int(value)
+    err = ACTOR.call("premark", None, value)
+    if err:
+        return jsonify({"ok": False, "error": err}), 400
+    return jsonify({"ok": True, "program": ACTOR.call("state")["program"]})
 
 # ----------- Sheet / Focus -----------
 @app.post("/api/new_sheet")
 def api_new_sheet():
-    reset_sheet(GAME["sheet_n"])
+    ACTOR.call("reset_sheet")
     return jsonify({"ok": True})
 
 @app.post("/api/set_sheet_n")
 def api_set_sheet_n():
     d = request.get_json(force=True, silent=True) or {}
-    n = int(d.get("n", GAME["sheet_n"]))
-    reset_sheet(n)
-    set_view("OVERVIEW")
-    return jsonify({"ok": True, "sheet_n": GAME["sheet_n"]})
+    n = int(d.get("n", request_game().get("sheet_n", 3)))
+    out = ACTOR.call("batch", [("reset_sheet", (n,)), ("set_view", ("OVERVIEW",))], True)
+    return jsonify({"ok": True, "sheet_n": out["state"]["sheet_n"]})
+
+@app.get("/api/cards/db")
+def api_cards_db():
+    db = card_db()
+    return jsonify({"ok": db is not None, "db": db.info() if db else None})
+
+@app.post("/api/sheet/load")
+def api_sheet_load():
+    """Deal printed faces: {"range": "pack 1200, faces 1-9"} or {"serials": [...]}; "" = random again."""
+    d = request.get_json(force=True, silent=True) or {}
+    try:
+        if "serials" in d:
+            serials = [int(x) for x in d["serials"] or []]
+        elif str(d.get("range", "")).strip():
+            db = card_db()
+            if db is None:
+                return jsonify({"ok": False, "error": f"no card database at {CARD_DB_PATH}"}), 404
+            serials = db.serials(d["range"], limit=MAX_SHEET_FACES)
+        else:
+            serials = []
+        out = ACTOR.call("batch", [("load_sheet", (serials,)), ("set_view", ("OVERVIEW",))], True)
+    except (TypeError, ValueError) as e:
+        return jsonify({"ok": False, "error": str(e)}), 400
+    return jsonify({"ok": True, "sheet_n": out["results"][0], "serials": serials})
 
 @app.post("/api/focus")
 def api_focus():
     d = request.get_json(force=True, silent=True) or {}
-    idx = int(d.get("index", -1))
-    if idx < 0:
-        GAME["focus_idx"] = None
-        set_view("OVERVIEW")
-    else:
-        idx = max(0, min(len(GAME["cards"]) - 1, idx))
-        GAME["focus_idx"] = idx
-        set_view("FOCUS")
-    return jsonify({"ok": True, "focus_idx": GAME["focus_idx"], "view": GAME["view"]})
+    focus_idx, view = ACTOR.call("focus", int(d.get("index", -1)))
+    return jsonify({"ok": True, "focus_idx": focus_idx, "view": view})
 
 # ----------- Calls -----------
 @app.post("/api/sim_call")
@@ -872,18 +1905,12 @@ def api_sim_call():
     d = request.get_json(force=True, silent=True) or {}
     L = (d.get("letter") or "G").upper()
     n = int(d.get("number") or 46)
-    mark_call(L, n)
+    ACTOR.call("mark_call", L, n)
     return jsonify({"ok": True})
 
 @app.post("/api/repeat")
 def api_repeat():
-    last = None
-    for c in GAME["cards"]:
-        if c["calls"]:
-            last = c["calls"][-1]
-    if last:
-        L, n = last[0], int(last[1:])
-        mark_call(L, n)
+    ACTOR.call("repeat")
     return jsonify({"ok": True})
 
 # ----------- Winner control -----------
@@ -896,8 +1923,7 @@ def api_winner_stop_audio():
 @app.post("/api/winner/stop")
 def api_winner_stop():
     WINNER.stop()
-    GAME["status"] = "LISTENING"
-    broadcast({"type": "STATUS", "status": GAME["status"]})
+    ACTOR.call("status", "LISTENING")
     # After winner is checked/confirmed, move to next game
     return api_game_next()
 
@@ -905,8 +1931,8 @@ def api_winner_stop():
 @app.post("/api/mode")
 def api_mode_set():
     d = request.get_json(force=True, silent=True) or {}
-    set_mode(d.get("mode", "PLAY"))
-    return jsonify({"ok": True, "mode": GAME["mode"]})
+    ACTOR.call("set_mode", d.get("mode", "PLAY"))
+    return jsonify({"ok": True, "mode": request_game()["mode"]})
 
 @app.get("/api/gain")
 def api_gain_get():
@@ -927,15 +1953,97 @@ def api_gain_set():
 @app.post("/api/say")
 def api_say():
     d = request.get_json(force=True, silent=True) or {}
-    text = str(d.get("text", "")).strip()
-    if not text:
+    parts = d.get("parts")
+    if not isinstance(parts, list):
+        parts = [d.get("text", "")]
+    parts = [str(p or "").strip() for p in parts]
+    if not any(parts):
         return jsonify({"ok": False, "error": "no text"}), 400
     try:
-        say(text)
+        say(*parts)
         return jsonify({"ok": True})
     except Exception as e:
         return jsonify({"ok": False, "error": str(e)}), 500
 
+# ----------- Metrics -----------
+@app.get("/api/metrics")
+def api_metrics():
+    """Prometheus text: latency histograms plus a few counters/gauges."""
+    with WS_LOCK:
+        clients = sum(len(sess.clients) for sess in SESSIONS.values())
+    tts = TTS.stats()
+    gauges = {
+        "betty_ws_clients": ("gauge", clients),
+        "betty_sessions": ("gauge", len(SESSIONS)),
+        "betty_actor_queue": ("gauge", ACTOR._q.qsize()),
+        "betty_bus_seq": ("counter", BUS.seq),
+        "betty_echo_suppressed_total": ("counter", LISTEN_STATS["echo_suppressed"]),
+        "betty_listener_restarts_total": ("counter", listener.restarts),
+        "betty_relay_gaps_total": ("counter", relay.gaps if relay else 0),
+        "betty_audio_restarts_total": ("counter", AUDIO.restarts),
+        "betty_tts_cache_hits_total": ("counter", tts["hits"]),
+        "betty_tts_cache_misses_total": ("counter", tts["misses"]),
+        "betty_kiosk_first_render_ms": ("gauge", KIOSK_BOOTS[-1].get("first_render_ms", 0) if KIOSK_BOOTS else 0),
+    }
+    return Response(TRACER.prometheus(gauges), mimetype="text/plain; version=0.0.4")
+
+@app.get("/api/metrics/latency")
+def api_metrics_latency():
+    """Per-stage p50/p95/max (ms) and the last few call traces, for the DEBUG panel."""
+    return jsonify(TRACER.summary())
+
+# ----------- Sessions (tables) -----------
+@app.get("/api/sessions")
+def api_sessions():
+    """Open tables with their display count and the memory each one adds."""
+    sizes = ACTOR.call("session_sizes", sid=DEFAULT_SESSION)
+    with WS_LOCK:
+        out = [{"id": sid, "url": "/" if sid == DEFAULT_SESSION else f"/s/{sid}/",
+                "clients": len(sess.clients), "view": sess.game.get("view"),
+                "bytes": sizes.get(sid, 0)}
+               for sid, sess in list(SESSIONS.items())]
+    return jsonify({"sessions": out, "max": MAX_SESSIONS})
+
+@app.post("/api/sessions")
+def api_sessions_open():
+    d = request.get_json(force=True, silent=True) or {}
+    sid = str(d.get("id", "")).strip().lower()
+    if not SESSION_ID_RE.match(sid):
+        return jsonify({"ok": False, "error": "id must be 1-32 of a-z, 0-9, _ or -"}), 400
+    try:
+        ACTOR.call("state", sid=sid)
+    except ValueError as e:
+        return jsonify({"ok": False, "error": str(e)}), 409
+    return jsonify({"ok": True, "id": sid, "url": f"/s/{sid}/"})
+
+@app.delete("/api/sessions/<sid>")
+def api_sessions_close(sid: str):
+    if sid == DEFAULT_SESSION:
+        return jsonify({"ok": False, "error": "the main table can't be closed"}), 400
+    if not ACTOR.close_session(sid):
+        return jsonify({"ok": False, "error": "no such table"}), 404
+    return jsonify({"ok": True})
+
+@app.get("/api/listener")
+def api_listener_status():
+    return jsonify(listener.status())
+
+@app.get("/api/relay")
+def api_relay_status():
+    """Role of this node; for subscribers, how well they are following the publisher."""
+    return jsonify({"role": BETTY_ROLE, "epoch": BUS_EPOCH,
+                    "subscriber": relay.status() if relay else None})
+
+@app.post("/api/listener/restart")
+def api_listener_restart():
+    listener.restart()
+    return jsonify({"ok": True})
+
+@app.get("/api/audio/stats")
+def api_audio_stats():
+    """Output engine state plus how many mic chunks were dropped as our own echo."""
+    return jsonify({"output": AUDIO.stats(), "echo_suppressed": LISTEN_STATS["echo_suppressed"]})
+
 @app.post("/api/audio/jingle")
 def api_audio_jingle():
     if os.path.isfile(JINGLE_PATH):
@@ -946,7 +2054,7 @@ def api_audio_jingle():
 # ----------- Speaker Volume APIs -----------
 @app.get("/api/volume/speaker")
 def api_speaker_get():
-    vol = get_speaker_volume()
+    vol = get_speaker_volume(fresh=True)
     return jsonify({"speaker": vol})
 
 @app.post("/api/volume/speaker")
@@ -980,7 +2088,7 @@ def api_games_editor():
             "free_enabled": spec.get("free_enabled", spec.get("params", {}).get("free_enabled", True)),
         }
         items.append(game_data)
-    return jsonify({"games": items})
+    return etag_json({"games": items})
 
 @app.get("/api/games/editor/<key>")
 def api_game_editor_get(key: str):
@@ -1017,8 +2125,7 @@ def api_game_editor_create():
     if not key:
         return jsonify({"ok": False, "error": "Key is required"}), 400
     
-    custom_games = load_custom_games()
-    if key in custom_games:
+    if key in load_custom_games():
         return jsonify({"ok": False, "error": "Game already exists. Use update instead."}), 400
     
     # Parse allowed_numbers and disallowed_numbers (handle both int and str)
@@ -1044,13 +2151,17 @@ def api_game_editor_create():
         "params": {"free_enabled": bool(d.get("free_enabled", True))},
         "preview_cells": [],
     }
+    if d.get("premark"):
+        game_data["premark"] = d["premark"]
     
-    custom_games[key] = game_data
-    if save_custom_games(custom_games):
-        broadcast({"type": "CONFIG", "key": "games_updated"})
-        return jsonify({"ok": True, "game": game_data})
-    else:
-        return jsonify({"ok": False, "error": "Failed to save games"}), 500
+    try:
+        compile_program(game_data, key)  # validate once; warms the compile cache
+    except ValueError as e:
+        return jsonify({"ok": False, "error": f"Invalid game: {e}"}), 400
+    GAME_STORE.put(key, game_data)
+    SPEECH.prerender([f"{game_data['name']}."])
+    broadcast({"type": "CONFIG", "key": "games_updated"})
+    return jsonify({"ok": True, "game": game_data})
 
 @app.put("/api/games/editor/<key>")
 def api_game_editor_update(key: str):
@@ -1063,7 +2174,7 @@ def api_game_editor_update(key: str):
     if key not in custom_games:
         return jsonify({"ok": False, "error": "Game not found. Create it first using 'New Game'."}), 404
     
-    game_data = custom_games[key]
+    game_data = json.loads(json.dumps(custom_games[key]))
     
     d = request.get_json(force=True, silent=True) or {}
     
@@ -1092,6 +2203,11 @@ def api_game_editor_update(key: str):
         game_data["disallowed_positions"] = [[int(r), int(c)] for r, c in d["disallowed_positions"] if isinstance(r, (int, str)) and isinstance(c, (int, str))]
     if "patterns" in d:
         game_data["patterns"] = d["patterns"]
+    if "premark" in d:
+        if d["premark"]:
+            game_data["premark"] = d["premark"]
+        else:
+            game_data.pop("premark", None)
     if "free_enabled" in d:
         game_data["free_enabled"] = bool(d["free_enabled"])
         if "params" not in game_data:
@@ -1119,27 +2235,25 @@ def api_game_editor_update(key: str):
     # Ensure kind is set to custom for saved games
     game_data["kind"] = "custom"
     
-    # Update the game in custom_games dict
-    custom_games[key] = game_data
-    
     # Debug: print what we're about to save
     print(f"[DEBUG] Saving game {key} to custom_games.json")
-    print(f"[DEBUG] custom_games dict has {len(custom_games)} games: {list(custom_games.keys())}")
     print(f"[DEBUG] game_data keys: {list(game_data.keys())}")
     print(f"[DEBUG] game_data allowed_numbers: {game_data.get('allowed_numbers', [])[:10]}... (showing first 10 of {len(game_data.get('allowed_numbers', []))})")
     print(f"[DEBUG] game_data patterns count: {len(game_data.get('patterns', []))}")
     
-    if save_custom_games(custom_games):
-        broadcast({"type": "CONFIG", "key": "games_updated"})
-        return jsonify({"ok": True, "game": game_data})
-    else:
-        return jsonify({"ok": False, "error": "Failed to save games"}), 500
+    try:
+        compile_program(game_data, key)  # validate once; warms the compile cache
+    except ValueError as e:
+        return jsonify({"ok": False, "error": f"Invalid game: {e}"}), 400
+    GAME_STORE.put(key, game_data)
+    SPEECH.prerender([f"{game_data['name']}."])
+    broadcast({"type": "CONFIG", "key": "games_updated"})
+    return jsonify({"ok": True, "game": game_data})
 
 @app.post("/api/games/editor/save")
 def api_games_editor_save():
-    """Explicitly save all custom games to disk."""
-    custom_games = load_custom_games()
-    if save_custom_games(custom_games):
+    """Explicitly flush pending custom game edits to disk."""
+    if GAME_STORE.flush():
         return jsonify({"ok": True, "message": "Games saved successfully"})
     else:
         return jsonify({"ok": False, "error": "Failed to save games"}), 500
@@ -1149,37 +2263,68 @@ def api_game_editor_delete(key: str):
     """Delete a game (removes from custom games)."""
     key = str(key).upper()
     
-    custom_games = load_custom_games()
-    if key not in custom_games:
+    if not GAME_STORE.delete(key):
         return jsonify({"ok": False, "error": "Game not found in custom games"}), 404
-    
-    del custom_games[key]
-    if save_custom_games(custom_games):
-        broadcast({"type": "CONFIG", "key": "games_updated"})
-        return jsonify({"ok": True, "message": "Game deleted successfully"})
+    broadcast({"type": "CONFIG", "key": "games_updated"})
+    return jsonify({"ok": True, "message": "Game deleted successfully"})
+
+@app.post("/api/games/simulate")
+def api_games_simulate():
+    """
+    Monte Carlo run of a program: {"key": "LUCKY_7"} or {"game": <unsaved editor game>},
+    plus "cards" (default: this table's sheet size), "games" and optional "seed".
+    Returns the calls-to-first-win distribution and per-pattern win shares.
+    """
+    d = request.get_json(force=True, silent=True) or {}
+    if isinstance(d.get("game"), dict):
+        key, spec = str(d["game"].get("key", "")).upper(), d["game"]
     else:
-        return jsonify({"ok": False, "error": "Failed to save games"}), 500
+        key = str(d.get("key", "")).upper()
+        spec = get_all_programs().get(key)
+        if spec is None:
+            return jsonify({"ok": False, "error": "Unknown program"}), 404
+    try:
+        compiled = compile_program(spec, key)
+        cards = int(d.get("cards") or request_game().get("sheet_n", 6))
+        games = int(d.get("games", 10000))
+        seed = None if d.get("seed") is None else int(d["seed"])
+    except (TypeError, ValueError) as e:
+        return jsonify({"ok": False, "error": str(e)}), 400
+    return jsonify({"ok": True, "key": key, **simulate(compiled, cards, games, seed, spec.get("premark"))})
 
 # ----------- WebSocket (push state + heard overlays) -----------
 @sock.route("/ws")
 def ws(ws):
-    WS_CLIENTS.add(ws)
+    sid = request_sid()
+    enc = "bin" if request.args.get("enc", WS_ENCODING) == "bin" else "json"
+    sess, state = ACTOR.call("attach_display", ws, enc, sid=sid)   # opens the table if needed
     try:
-        ws.send(json.dumps({"type": "STATE", "state": public_state()}))
+        ws.send(encode_frame({"type": "STATE", "state": state}, enc))
         while True:
-            time.sleep(1.0)
             try:
-                ws.send(json.dumps({"type": "PING", "t": time.time()}))
+                raw = ws.receive(timeout=1.0)
             except Exception:
                 break
+            if raw is None:
+                try:
+                    ws.send(json.dumps({"type": "PING", "t": time.time()}))
+                except Exception:
+                    break
+                continue
+            try:
+                msg = json.loads(raw)
+            except Exception:
+                continue
+            if msg.get("type") == "ACK":
+                # display painted these calls
+                for call in msg.get("calls") or []:
+                    TRACER.finish(str(call))
     finally:
-        WS_CLIENTS.discard(ws)
+        with WS_LOCK:
+            sess.clients.pop(ws, None)
 
 # ------------------ Boot defaults ------------------
-try:
-    MODE_FILE.write_text("PLAY")
-except Exception:
-    pass
+write_parse_mode()
 
 if __name__ == "__main__":
     app.run(host="0.0.0.0", port=PORT)
@@ -1,6 +1,6 @@
 #!/usr/bin/env python3
 # /opt/bettybot/bingo_parse.py
-import sys, re, json, time, difflib
+import os, sys, re, json, time, difflib
 from typing import List, Tuple, Optional
 
 # ------------ Config ------------
@@ -115,6 +115,19 @@ last_emitted_time: float = 0.0
 def now() -> float:
     return time.time()
 
+# Upstream latency stamps from listen.sh ("vad_start=..,whisper_end=..")
+def parse_trace(s: str) -> dict:
+    out = {}
+    for kv in s.split(","):
+        k, _, v = kv.partition("=")
+        try:
+            out[k.strip()] = float(v)
+        except ValueError:
+            pass
+    return out
+
+TRACE = parse_trace(os.environ.get("BETTY_TRACE", ""))
+
 def reset_pending():
     global pending_letter, pending_letter_time
     pending_letter = None
@@ -136,7 +149,8 @@ def safe_emit_call(letter: str, num: int, raw: str):
     if last_emitted == call and (t - last_emitted_time) < DEBOUNCE_CALL_SEC:
         return
     last_emitted, last_emitted_time = call, t
-    emit({"type": "CALL", "letter": letter, "number": num, "raw": raw})
+    emit({"type": "CALL", "letter": letter, "number": num, "raw": raw,
+          "trace": dict(TRACE, parse=t)})
 
 def token_is_letter(tok: str) -> Optional[str]:
     tok = tok.lower()
@@ -372,4 +386,7 @@ for line in sys.stdin:
     t = line.strip()
     if not t:
         continue
+    if t.startswith("#trace "):   # long-lived parser (transcriber.py): stamps for the next lines
+        TRACE = parse_trace(t[7:])
+        continue
     process_line(t)
@@ -0,0 +1,136 @@
+# /opt/bettybot/call_relay.py
+from __future__ import annotations
+import json
+import threading
+import time
+import urllib.parse
+import urllib.request
+
+# ---------- LAN call distribution ----------
+# One node (the publisher) runs listen.sh/whisper as usual; its event bus is
+# served at GET /api/events?since=<seq>&wait=<s>&types=CALL,PHRASE (long poll).
+# Subscriber nodes skip the audio pipeline and follow that stream with a
+# CallSubscriber, which keeps a cursor (last seq seen):
+#   * reconnects with backoff and resumes from the cursor, so anything that
+#     happened while it was away is replayed from the publisher's ring
+#   * counts forwarded events (CALL/PHRASE) it could not get back, because the
+#     ring was already overwritten, as gaps (from the bus's per-type type_seq)
+#   * starts over at seq 0 when the publisher restarts (new "epoch")
+# LocalSource follows an EventBus in the same process (tests, one-box demos).
+
+RELAY_TYPES = ("CALL", "PHRASE")
+
+class LocalSource:
+    """In-process broker: read another EventBus directly."""
+    def __init__(self, bus, epoch: str = "local"):
+        self.bus = bus
+        self.epoch = epoch
+        self.name = "local"
+
+    def fetch(self, since: int, wait: float) -> dict:
+        events, dropped = self.bus.wait(since, timeout=wait) if wait > 0 else self.bus.since(since)
+        return {"epoch": self.epoch, "seq": self.bus.seq, "events": events, "dropped": dropped}
+
+
+class HttpSource:
+    """A publisher's /api/events over HTTP."""
+    def __init__(self, base_url: str, types=RELAY_TYPES):
+        self.base = base_url.rstrip("/")
+        self.types = ",".join(types)
+        self.name = self.base
+
+    def fetch(self, since: int, wait: float) -> dict:
+        q = urllib.parse.urlencode({"since": since, "wait": wait, "types": self.types, "limit": 1000})
+        with urllib.request.urlopen(f"{self.base}/api/events?{q}", timeout=wait + 5) as r:
+            return json.loads(r.read().decode("utf-8"))
+
+
+class CallSubscriber(threading.Thread):
+    def __init__(self, source, on_event, types=RELAY_TYPES, wait: float = 20.0,
+                 backoff_max: float = 10.0):
+        super().__init__(daemon=True, name="call-relay")
+        self.source = source
+        self.on_event = on_event
+        self.types = set(types)
+        self.wait = wait
+        self.backoff_max = backoff_max
+        self.cursor = None          # None until the first successful fetch
+        self.epoch = None
+        self.connected = False
+        self.received = 0
+        self.gaps = 0
+        self._type_seq = {}         # forwarded type -> last type_seq seen
+        self.errors = 0
+        self.last_event_at = None
+        self._quit = threading.Event()
+
+    def run(self):
+        backoff = 0.5
+        while not self._quit.is_set():
+            try:
+                resp = self.source.fetch(self.cursor or 0, self.wait if self.cursor is not None else 0)
+            except Exception as e:
+                if self.connected or not self.errors:
+                    print(f"[relay] {self.source.name} unreachable: {e}")
+                self.connected = False
+                self.errors += 1
+                if self._quit.wait(backoff):
+                    break
+                backoff = min(self.backoff_max, backoff * 2)
+                continue
+            self._take(resp)
+            if not self.connected:
+                print(f"[relay] following {self.source.name} from seq {self.cursor}")
+            self.connected, backoff = True, 0.5
+
+    def _take(self, resp: dict):
+        epoch = resp.get("epoch")
+        if self.cursor is None:
+            # first contact: join live rather than replaying old games
+            self.cursor, self.epoch = int(resp.get("seq", 0)), epoch
+            return
+        if epoch != self.epoch:
+            print(f"[relay] publisher restarted (epoch {self.epoch} → {epoch}); resyncing")
+            self.cursor, self.epoch = 0, epoch
+            self._type_seq.clear()
+            return
+        dropped = int(resp.get("dropped", 0))   # any type, mostly heartbeats/HEARD
+        lost = 0
+        for evt in resp.get("events", []):
+            seq = int(evt.get("seq", 0))
+            if seq <= self.cursor:
+                continue
+            self.cursor = seq
+            if evt.get("type") not in self.types:
+                continue
+            n, last = evt.get("type_seq"), self._type_seq.get(evt["type"])
+            if isinstance(n, int):
+                if last is not None and n > last + 1:
+                    lost += n - last - 1
+                self._type_seq[evt["type"]] = n
+            self.received += 1
+            self.last_event_at = time.time()
+            try:
+                self.on_event(evt)
+            except Exception as e:
+                print(f"[relay] handler failed: {e}")
+        self.cursor = max(self.cursor, int(resp.get("next", self.cursor)))
+        if lost:
+            self.gaps += lost
+            print(f"[relay] {lost} relayed events were lost before we could replay them "
+                  f"({dropped} bus events overwritten in all)")
+
+    def stop(self):
+        self._quit.set()
+
+    def status(self) -> dict:
+        return {
+            "source": self.source.name,
+            "connected": self.connected,
+            "cursor": self.cursor,
+            "epoch": self.epoch,
+            "received": self.received,
+            "gaps": self.gaps,
+            "errors": self.errors,
+            "last_event_age_s": round(time.time() - self.last_event_at, 1) if self.last_event_at else None,
+        }
@@ -0,0 +1,233 @@
+#!/usr/bin/env python3
+# /opt/bettybot/card_db.py — printed card faces by serial number (memory-mapped)
+"""
+Halls play printed packs; this lets BettyBot show a player's real faces.
+
+A permutation file (one face per line, thousands to millions of lines) is
+converted once into a fixed-width binary file:
+
+    header  32 bytes   magic, version, record size, count, first serial, faces per pack
+    record  25 bytes   per face: B1..B5, I1..I5, N1..N5, G1..G5, O1..O5 (N3 = 0, FREE)
+
+The file is memory-mapped, so face(serial) is one slice at a computed offset:
+O(1), no parsing, and only the pages touched are ever read. Serials missing
+from the input are stored as all-zero records.
+
+Input lines: 24 numbers (FREE left out) or 25 with FREE/0/* in the middle,
+separated by spaces or commas, printed row by row (--layout rows, default)
+or column by column (--layout cols). A line may start with "<serial>:";
+otherwise serials count up from --first-serial. Blank lines and # comments
+are skipped.
+
+    python3 card_db.py import perms.txt cards/faces.bin --per-pack 9
+    python3 card_db.py show cards/faces.bin "pack 1200, faces 1-9"
+"""
+import argparse
+import mmap
+import os
+import re
+import struct
+import sys
+from pathlib import Path
+
+MAGIC = b"BETTYFC1"
+VERSION = 1
+HEADER = struct.Struct("<8sHHIII")   # magic, version, record size, count, first serial, per pack
+HEADER_SIZE = 32
+RECORD = 25
+LETTERS = "BINGO"
+FREE_TOKENS = {"free", "f", "*", "0", "x"}
+SHOW_MAX = 1000          # faces `show` will print at once
+
+class CardDB:
+    def __init__(self, path):
+        self.path = Path(path)
+        self._f = open(self.path, "rb")
+        try:
+            self._mm = mmap.mmap(self._f.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:           # empty file
+            self._f.close()
+            raise ValueError(f"{self.path} is empty")
+        magic, version, rec, self.count, self.first_serial, self.per_pack = HEADER.unpack_from(self._mm, 0)
+        if magic != MAGIC or version != VERSION or rec != RECORD:
+            self.close()
+            raise ValueError(f"{self.path} is not a card-face database")
+        if len(self._mm) < HEADER_SIZE + self.count * RECORD:
+            self.close()
+            raise ValueError(f"{self.path} is truncated")
+        self.mtime_ns = os.stat(self.path).st_mtime_ns
+
+    @property
+    def last_serial(self) -> int:
+        return self.first_serial + self.count - 1
+
+    def close(self):
+        try:
+            self._mm.close()
+        except Exception:
+            pass
+        self._f.close()
+
+    def raw(self, serial: int) -> bytes | None:
+        i = int(serial) - self.first_serial
+        if not 0 <= i < self.count:
+            return None
+        off = HEADER_SIZE + i * RECORD
+        rec = self._mm[off:off + RECORD]
+        return rec if rec[0] else None   # all-zero = serial not in the import
+
+    def face(self, serial: int) -> dict | None:
+        """{"B": [5 numbers], ..., "N": [.., .., 0, .., ..]} or None."""
+        rec = self.raw(serial)
+        if rec is None:
+            return None
+        return {L: list(rec[c * 5:c * 5 + 5]) for c, L in enumerate(LETTERS)}
+
+    def serials(self, spec: str, limit: int | None = None) -> list:
+        """
+        Serials for a sheet spec; several parts may be joined with ';':
+          "12001-12009", "12001"                 serials
+          "pack 1200", "pack 1200, faces 1-9"    faces of a pack (needs per-pack in the file)
+        More than `limit` serials in total is refused before anything is expanded.
+        Raises ValueError.
+        """
+        out = []
+        def add(lo, hi):
+            if limit is not None and len(out) + hi - lo + 1 > limit:
+                raise ValueError(f"at most {limit} faces per sheet")
+            out.extend(range(lo, hi + 1))
+        for part in str(spec).replace("–", "-").split(";"):
+            part = part.strip().lower()
+            if not part:
+                continue
+            m = re.fullmatch(r"pack\s*(\d+)\s*,?\s*(?:faces?\s*(\d+)(?:\s*-\s*(\d+))?)?", part)
+            if m:
+                if not self.per_pack:
+                    raise ValueError("this card file has no pack size")
+                pack = int(m.group(1))
+                lo = int(m.group(2) or 1)
+                hi = int(m.group(3) or (m.group(2) or self.per_pack))
+                if not (1 <= lo <= hi <= self.per_pack):
+                    raise ValueError(f"faces must be within 1-{self.per_pack}")
+                base = self.first_serial + (pack - 1) * self.per_pack - 1
+                add(base + lo, base + hi)
+                continue
+            m = re.fullmatch(r"(\d+)(?:\s*-\s*(\d+))?", part)
+            if not m:
+                raise ValueError(f"can't read {part!r} (try '12001-12009' or 'pack 1200, faces 1-9')")
+            lo, hi = int(m.group(1)), int(m.group(2) or m.group(1))
+            if hi < lo:
+                raise ValueError(f"bad range {part!r}")
+            add(lo, hi)
+        if not out:
+            raise ValueError("empty sheet")
+        return out
+
+    def info(self) -> dict:
+        return {"path": str(self.path), "count": self.count, "first_serial": self.first_serial,
+                "last_serial": self.last_serial, "per_pack": self.per_pack,
+                "bytes": len(self._mm)}
+
+# ---------- import ----------
+def parse_face(tokens, layout: str = "rows") -> bytes:
+    """24/25 tokens → 25-byte column-major record. Raises ValueError."""
+    if len(tokens) == 25:
+        if tokens[12].lower() not in FREE_TOKENS:
+            raise ValueError("25 numbers but the centre isn't FREE")
+        tokens = tokens[:12] + tokens[13:]
+    if len(tokens) != 24:
+        raise ValueError(f"expected 24 numbers, got {len(tokens)}")
+    nums = [int(t) for t in tokens]
+    nums.insert(12, 0)
+    if layout == "rows":          # printed order → column-major
+        nums = [nums[r * 5 + c] for c in range(5) for r in range(5)]
+    for c, L in enumerate(LETTERS):
+        col = nums[c * 5:c * 5 + 5]
+        lo = c * 15 + 1
+        for r, n in enumerate(col):
+            if (c, r) == (2, 2):
+                continue
+            if not lo <= n <= lo + 14:
+                raise ValueError(f"{n} can't be in column {L} (wrong --layout?)")
+        if len(set(col)) != 5:
+            raise ValueError(f"column {L} repeats a number")
+    return bytes(nums)
+
+def import_faces(src, dst, layout: str = "rows", first_serial: int = 1, per_pack: int = 0) -> dict:
+    """Stream a permutation file into a card-face database (atomic replace)."""
+    dst = Path(dst)
+    dst.parent.mkdir(parents=True, exist_ok=True)
+    tmp = dst.with_name(dst.name + ".tmp")
+    count, faces, base = 0, 0, None
+    with open(src, "r", encoding="utf-8", errors="replace") as fin, open(tmp, "wb") as out:
+        out.write(bytes(HEADER_SIZE))
+        for lineno, line in enumerate(fin, 1):
+            line = line.split("#", 1)[0].strip()
+            if not line:
+                continue
+            serial = None
+            if ":" in line:
+                head, line = line.split(":", 1)
+                serial = int(head.strip())
+            try:
+                rec = parse_face(re.split(r"[\s,]+", line.strip()), layout)
+            except ValueError as e:
+                raise ValueError(f"line {lineno}: {e}") from None
+            if base is None:
+                base = serial if serial is not None else first_serial
+            if serial is None:
+                serial = base + count
+            idx = serial - base
+            if idx < count:
+                raise ValueError(f"line {lineno}: serial {serial} is out of order")
+            if idx > count:   # gap in the serials
+                out.write(bytes(RECORD * (idx - count)))
+                count = idx
+            out.write(rec)
+            count += 1
+            faces += 1
+        out.seek(0)
+        out.write(HEADER.pack(MAGIC, VERSION, RECORD, count, base or first_serial, per_pack))
+        out.flush()
+        os.fsync(out.fileno())
+    os.replace(tmp, dst)
+    return {"faces": faces, "serials": count, "first_serial": base or first_serial,
+            "bytes": HEADER_SIZE + count * RECORD}
+
+def main():
+    ap = argparse.ArgumentParser(description="Build / inspect the printed card-face database.")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    i = sub.add_parser("import", help="convert a permutation file")
+    i.add_argument("src")
+    i.add_argument("dst")
+    i.add_argument("--layout", choices=("rows", "cols"), default="rows")
+    i.add_argument("--first-serial", type=int, default=1)
+    i.add_argument("--per-pack", type=int, default=0, help="faces per pack (for 'pack N' sheets)")
+    s = sub.add_parser("show", help="print faces for serials or a pack range")
+    s.add_argument("db")
+    s.add_argument("spec", nargs="?", help="e.g. 12001-12003 or 'pack 1200, faces 1-9'")
+    args = ap.parse_args()
+
+    if args.cmd == "import":
+        try:
+            r = import_faces(args.src, args.dst, args.layout, args.first_serial, args.per_pack)
+        except (OSError, ValueError) as e:
+            print(f"❌ {e}", file=sys.stderr)
+            sys.exit(1)
+        print(f"✅ {r['faces']} faces (serials {r['first_serial']}–{r['first_serial'] + r['serials'] - 1}) "
+              f"→ {args.dst} ({r['bytes']} bytes)")
+        return
+    db = CardDB(args.db)
+    print(db.info())
+    if args.spec:
+        for serial in db.serials(args.spec, limit=SHOW_MAX):
+            face = db.face(serial)
+            if face is None:
+                print(f"#{serial}: (none)")
+                continue
+            print(f"#{serial}")
+            for r in range(5):
+                print("  " + " ".join("FREE" if face[L][r] == 0 else f"{face[L][r]:>4}" for L in LETTERS))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+# /opt/bettybot/event_bus.py
+from __future__ import annotations
+import threading
+import time
+
+# ---------- in-process event bus ----------
+# Fixed-size ring of events stamped with a sequence number. publish() never
+# blocks: the oldest events are overwritten when the ring is full. Each
+# subscriber runs on its own thread and reads the ring with its own cursor,
+# so a slow subscriber only ever loses its own backlog (counted in .dropped).
+
+class EventBus:
+    def __init__(self, capacity: int = 1024):
+        self.capacity = max(16, int(capacity))
+        self._ring = [None] * self.capacity
+        self._seq = 0                       # seq of the newest event (0 = none yet)
+        self._type_seq = {}                 # type -> events of that type so far
+        self._cond = threading.Condition()
+        self._subs = {}
+
+    @property
+    def seq(self) -> int:
+        return self._seq
+
+    def publish(self, evt: dict) -> int:
+        """Stamp and store an event; returns its sequence number."""
+        with self._cond:
+            self._seq += 1
+            rec = dict(evt)
+            rec["seq"] = self._seq
+            n = self._type_seq.get(rec.get("type"), 0) + 1   # per-type count: readers can spot lost CALLs
+            self._type_seq[rec.get("type")] = rec["type_seq"] = n
+            rec.setdefault("ts", time.time())
+            self._ring[self._seq % self.capacity] = rec
+            self._cond.notify_all()
+            return self._seq
+
+    def since(self, seq: int, limit: int | None = None):
+        """
+        Events with seq > `seq`, oldest first.
+        Returns (events, dropped) where dropped counts events already overwritten.
+        """
+        with self._cond:
+            return self._since_locked(int(seq), limit)
+
+    def _since_locked(self, seq: int, limit):
+        seq = max(0, min(seq, self._seq))
+        oldest = max(1, self._seq - self.capacity + 1)
+        dropped = max(0, oldest - (seq + 1))
+        start = max(seq + 1, oldest)
+        end = self._seq if limit is None else min(self._seq, start + int(limit) - 1)
+        return [self._ring[s % self.capacity] for s in range(start, end + 1)], dropped
+
+    def wait(self, seq: int, timeout: float | None = None):
+        """Block until there is something newer than `seq` (or timeout)."""
+        with self._cond:
+            if self._seq <= seq:
+                self._cond.wait(timeout)
+            return self._since_locked(seq, None)
+
+    def subscribe(self, name: str, fn, types=None, from_seq: int | None = None) -> "Subscription":
+        """Run fn(evt) on a dedicated thread for every new event (optionally filtered by type)."""
+        sub = Subscription(self, name, fn, types, self._seq if from_seq is None else from_seq)
+        self._subs[name] = sub
+        sub.start()
+        return sub
+
+    def stats(self) -> dict:
+        return {
+            "seq": self._seq,
+            "capacity": self.capacity,
+            "subscribers": {n: {"cursor": s.cursor, "dropped": s.dropped, "errors": s.errors}
+                            for n, s in self._subs.items()},
+        }
+
+
+class Subscription(threading.Thread):
+    def __init__(self, bus: EventBus, name: str, fn, types, cursor: int):
+        super().__init__(daemon=True, name=f"bus-{name}")
+        self.bus = bus
+        self.fn = fn
+        self.types = set(types) if types else None
+        self.cursor = cursor
+        self.dropped = 0
+        self.errors = 0
+        self._quit = threading.Event()
+
+    def run(self):
+        while not self._quit.is_set():
+            events, dropped = self.bus.wait(self.cursor, timeout=1.0)
+            self.dropped += dropped
+            for evt in events:
+                self.cursor = evt["seq"]
+                if self.types and evt.get("type") not in self.types:
+                    continue
+                try:
+                    self.fn(evt)
+                except Exception as e:
+                    self.errors += 1
+                    print(f"[bus:{self.name}] handler failed: {e}")
+
+    def stop(self):
+        self._quit.set()
@@ -0,0 +1,146 @@
+# /opt/bettybot/game_store.py
+from __future__ import annotations
+import json
+import os
+import threading
+import time
+from pathlib import Path
+
+# ---------- custom game store ----------
+# custom_games.json stays the canonical, hand-editable file, but:
+#   * reads come from memory (the file is only stat()ed to spot outside edits)
+#   * put()/delete() change one game and append it to a history journal
+#   * rapid edits are coalesced into one atomic tmp+fsync+rename write
+#   * each game's JSON is serialized once and reused until that game changes
+# The history journal (backups/custom_games.history.jsonl) replaces the old
+# full-file backup copies.
+
+HISTORY_MAX_LINES = 2000   # trim the history back to half of this when exceeded
+
+class CustomGameStore:
+    def __init__(self, path: Path, history_dir: Path, save_delay: float = 0.3):
+        self.path = Path(path)
+        self.history_path = Path(history_dir) / "custom_games.history.jsonl"
+        self.save_delay = max(0.0, float(save_delay))
+        self.version = 0           # bumps on every change (used in ETags)
+        self._data = {}
+        self._fragments = {}       # key -> serialized '"KEY": {...}'
+        self._sig = None
+        self._dirty = False
+        self._timer = None
+        self._history_lines = None
+        self._lock = threading.RLock()
+
+    # ---------- reads ----------
+    def _signature(self):
+        try:
+            st = self.path.stat()
+            return (st.st_mtime_ns, st.st_size, st.st_ino)
+        except OSError:
+            return None
+
+    def get(self) -> dict:
+        """All games. The dict is shared and replaced on change: do not mutate it."""
+        sig = self._signature()
+        if sig == self._sig or self._dirty:
+            return self._data
+        with self._lock:
+            if sig != self._sig and not self._dirty:
+                data = {}
+                try:
+                    if sig is not None:
+                        with open(self.path, "r", encoding="utf-8") as f:
+                            data = json.load(f)
+                except Exception as e:
+                    print(f"[games] could not read {self.path.name}: {e}")
+                    data = self._data
+                self._data, self._sig = data, sig
+                self._fragments = {}
+                self.version += 1
+        return self._data
+
+    # ---------- writes ----------
+    def put(self, key: str, spec: dict):
+        with self._lock:
+            data = dict(self.get())
+            data[key] = spec
+            self._fragments.pop(key, None)
+            self._commit(data, {"op": "put", "key": key, "spec": spec})
+
+    def delete(self, key: str) -> bool:
+        with self._lock:
+            data = dict(self.get())
+            if key not in data:
+                return False
+            del data[key]
+            self._fragments.pop(key, None)
+            self._commit(data, {"op": "delete", "key": key})
+            return True
+
+    def _commit(self, data: dict, entry: dict):
+        self._data = data
+        self._dirty = True
+        self.version += 1
+        self._append_history(entry)
+        if self._timer is None:
+            self._timer = threading.Timer(self.save_delay, self.flush)
+            self._timer.daemon = True
+            self._timer.start()
+
+    def flush(self) -> bool:
+        """Write pending changes now (atomic replace). Returns False on I/O failure."""
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+            if not self._dirty:
+                return True
+            parts = []
+            for key, spec in self._data.items():
+                frag = self._fragments.get(key)
+                if frag is None:
+                    frag = json.dumps(key, ensure_ascii=False) + ": " + json.dumps(spec, ensure_ascii=False)
+                    self._fragments[key] = frag
+                parts.append(frag)
+            text = "{\n" + ",\n".join(parts) + "\n}\n" if parts else "{}\n"
+            tmp = self.path.with_name(self.path.name + ".tmp")
+            try:
+                with open(tmp, "w", encoding="utf-8") as f:
+                    f.write(text)
+                    f.flush()
+                    os.fsync(f.fileno())
+                os.replace(tmp, self.path)
+            except Exception as e:
+                print(f"[games] save failed: {e}")
+                return False
+            self._sig = self._signature()
+            self._dirty = False
+            return True
+
+    # ---------- history ----------
+    def _append_history(self, entry: dict):
+        try:
+            self.history_path.parent.mkdir(parents=True, exist_ok=True)
+            if self._history_lines is None:
+                try:
+                    with open(self.history_path, "r", encoding="utf-8") as f:
+                        self._history_lines = sum(1 for _ in f)
+                except FileNotFoundError:
+                    self._history_lines = 0
+            entry = dict(entry, ts=time.strftime("%Y-%m-%dT%H:%M:%S"))
+            with open(self.history_path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+            self._history_lines += 1
+            if self._history_lines > HISTORY_MAX_LINES:
+                self._trim_history()
+        except Exception as e:
+            print(f"[games] history append failed: {e}")
+
+    def _trim_history(self):
+        with open(self.history_path, "r", encoding="utf-8") as f:
+            keep = f.readlines()[-(HISTORY_MAX_LINES // 2):]
+        tmp = self.history_path.with_name(self.history_path.name + ".tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            f.writelines(keep)
+        os.replace(tmp, self.history_path)
+        self._history_lines = len(keep)
@@ -30,14 +30,33 @@ USE_VAD="${USE_VAD:-1}"
 VAD_THRESH_PCT="${VAD_THRESH_PCT:-2}"
 VAD_LEAD="${VAD_LEAD:-0.15}"
 
+# ---------- Echo gating ----------
+# bingo_app.py writes its playback intervals ("<start> <end>", "<start> -" while
+# still playing) to SPEAKING_FILE; chunks overlapping one are dropped before whisper.
+ECHO_GATE="${ECHO_GATE:-1}"
+ECHO_TAIL="${ECHO_TAIL:-0.35}"    # seconds of room echo after playback ends
+SPEAKING_FILE="/tmp/betty_speaking.txt"
+SUPPRESSED=0
+
 # ---------- Paths ----------
 TMPDIR="/tmp/betty_chunks"
 mkdir -p "$TMPDIR"
 GAIN_FILE="/tmp/betty_gain.txt"
 
 # ---------- Helpers ----------
+now_ms(){ date +%s%3N; }
+T0="$(now_ms)"
+phase(){ echo "[TIME] $1 +$(( $(now_ms) - ${2:-$T0} ))ms" >&2; }
+hb(){ printf '{"type":"heartbeat","phase":"%s","chunk":%d}\n' "$1" "${i:-0}"; }  # for the supervisor
 have(){ command -v "$1" >/dev/null 2>&1; }
 dbg(){ [[ "$DEBUG" = "1" ]] && echo "[DEBUG] $*" >&2 || true; }
+now_s(){ date +%s.%N; }
+overlaps_playback(){  # $1=segment start, $2=segment end (epoch seconds)
+  [[ -f "$SPEAKING_FILE" ]] || return 1
+  awk -v s="$1" -v e="$2" -v tail="$ECHO_TAIL" '
+    NF>=2 { b = ($2=="-") ? e+1 : $2+tail; if ($1 <= e && b >= s) hit=1 }
+    END { exit hit ? 0 : 1 }' "$SPEAKING_FILE"
+}
 read_gain(){ [[ -f "$GAIN_FILE" ]] && awk 'BEGIN{v=3}{v=$1}END{if(v<0.5)v=0.5;if(v>12)v=12;printf("%.2f",v)}' "$GAIN_FILE" 2>/dev/null || echo "3.00"; }
 
 # ---------- Sanity ----------
@@ -45,39 +64,76 @@ for dep in sox soxi sed awk; do have "$dep" || { echo "❌ Missing dependency: $
 [[ -x "$WHISPER_BIN" ]] || { echo "❌ whisper-cli not executable: $WHISPER_BIN" >&2; exit 1; }
 [[ -f "$MODEL_PATH"   ]] || { echo "❌ model not found: $MODEL_PATH" >&2; exit 1; }
 if have stdbuf; then STDBUF_CMD=(stdbuf -oL -eL); else STDBUF_CMD=(); fi
+phase "sanity checks"
+hb start
+
+# ---------- Warm standby ----------
+# STANDBY=1: get everything ready (model pulled into the page cache), then wait
+# for the supervisor to write a line on stdin before opening the mic.
+if [[ "${STANDBY:-0}" = "1" ]]; then
+  cat "$MODEL_PATH" >/dev/null 2>&1 || true
+  phase "standby warm"
+  hb standby
+  read -r _ || exit 0
+  T0="$(now_ms)"
+  hb start
+fi
 
 # ---------- Device probe ----------
+# The last device that worked is cached and tried first. Probes read ~10 ms of
+# audio (not a full second). If the cached device fails, the known names are
+# probed in order and `arecord -l` runs in the background to record any other
+# capture cards for the next start.
+CACHE_DIR="${BETTY_CACHE_DIR:-/opt/bettybot/cache}"
+DEV_CACHE="$CACHE_DIR/capture_device"
+DEV_LIST="$CACHE_DIR/capture_devices"
+PROBE_TIMEOUT="${PROBE_TIMEOUT:-2}"
+mkdir -p "$CACHE_DIR" 2>/dev/null || true
+
+probe_device() {
+  local d="$1" t=()
+  have timeout && t=(timeout "$PROBE_TIMEOUT")
+  if have arecord; then
+    "${t[@]}" arecord -q -D "$d" -f S16_LE -c "$CAP_IN_CH" -r "$CAP_RATE" -s 160 -t raw >/dev/null 2>&1
+  else
+    "${t[@]}" sox -V0 -t alsa "$d" -r "$CAP_RATE" -c "$CAP_IN_CH" -b "$CAP_BITS" -e signed-integer -t raw /dev/null trim 0 0.01 2>/dev/null
+  fi
+}
+
+refresh_device_list() {
+  have arecord || return 0
+  arecord -l 2>/dev/null \
+    | sed -nE 's/^card ([0-9]+):.*device ([0-9]+):.*/plughw:\1,\2/p' > "$DEV_LIST.tmp" \
+    && mv -f "$DEV_LIST.tmp" "$DEV_LIST"
+}
+
 pick_device() {
+  local cached="" d
+  [[ -f "$DEV_CACHE" ]] && cached="$(head -n1 "$DEV_CACHE")"
+  if [[ -n "$cached" ]]; then
+    if probe_device "$cached"; then dbg "cached device OK: $cached"; echo "$cached"; return 0; fi
+    dbg "cached device failed: $cached"
+    rm -f "$DEV_CACHE"
+    refresh_device_list >/dev/null 2>&1 &   # detached from $(pick_device)'s stdout
+  fi
   local trylist=()
   [[ -n "$DEV_IN" ]] && trylist+=("$DEV_IN")
   trylist+=(
     "plughw:CARD=ArrayUAC10,DEV=0" "hw:CARD=ArrayUAC10,DEV=0"
     "sysdefault:CARD=ArrayUAC10" "front:CARD=ArrayUAC10,DEV=0" "dsnoop:CARD=ArrayUAC10,DEV=0"
-    "plughw:2,0" "hw:2,0" "plughw:1,0" "hw:1,0" "default" "sysdefault"
+    "plughw:2,0" "hw:2,0" "plughw:1,0" "hw:1,0"
   )
+  [[ -f "$DEV_LIST" ]] && mapfile -t -O "${#trylist[@]}" trylist < "$DEV_LIST"
+  trylist+=("default" "sysdefault")
   for d in "${trylist[@]}"; do
-    [[ -z "$d" ]] && continue
-    if have arecord; then
-      if arecord -q -D "$d" -f S16_LE -c "$CAP_IN_CH" -r "$CAP_RATE" -d 1 -t raw >/dev/null 2>&1; then
-        dbg "arecord probe OK: $d"; echo "$d"; return 0
-      else
-        dbg "arecord probe failed: $d"
-      fi
-    fi
-    if [[ "$DEBUG" = "1" ]]; then
-      if sox -V3 -t alsa "$d" -r "$CAP_RATE" -c "$CAP_IN_CH" -b "$CAP_BITS" -e signed-integer "$TMPDIR/probe.wav" trim 0 0.2; then
-        rm -f "$TMPDIR/probe.wav"; dbg "sox probe OK: $d"; echo "$d"; return 0
-      else
-        dbg "sox probe failed: $d"
-      fi
-    else
-      if sox -V0 -t alsa "$d" -r "$CAP_RATE" -c "$CAP_IN_CH" -b "$CAP_BITS" -e signed-integer "$TMPDIR/probe.wav" trim 0 0.2 2>/dev/null; then
-        rm -f "$TMPDIR/probe.wav"; echo "$d"; return 0
-      else
-        dbg "Probe failed: $d"
-      fi
+    [[ -z "$d" || "$d" == "$cached" ]] && continue
+    if probe_device "$d"; then
+      dbg "probe OK: $d"; echo "$d" > "$DEV_CACHE" 2>/dev/null || true
+      echo "$d"; return 0
     fi
+    dbg "probe failed: $d"
   done
+  refresh_device_list >/dev/null 2>&1 &
   return 1
 }
 
@@ -86,11 +142,25 @@ if pgrep -f bingo_app.py >/dev/null 2>&1; then
   dbg "Note: bingo_app.py is running and may hold the mic unless ALSA_DEV is set."
 fi
 
+T_PROBE="$(now_ms)"
 DEV="$(pick_device)" || { echo "❌ No working ALSA capture device." >&2; exit 1; }
-echo "✅ Using device: $DEV | LEN=${LEN}s | RATE=${CAP_RATE} | CH=${CAP_IN_CH} | THREADS=$THREADS | GAIN=$(read_gain) | VAD=$USE_VAD" >&2
+phase "device probe ($DEV)" "$T_PROBE"
+echo "✅ Using device: $DEV | LEN=${LEN}s | RATE=${CAP_RATE} | CH=${CAP_IN_CH} | THREADS=$THREADS | GAIN=$(read_gain) | VAD=$USE_VAD | ECHO_GATE=$ECHO_GATE" >&2
 
 # ---------- Main loop ----------
 i=0
+CAP_FAILS=0
+FIRST_CHUNK=1
+capture_failed(){  # re-pick the device after repeated failures (unplugged / renumbered)
+  CAP_FAILS=$((CAP_FAILS+1))
+  if (( CAP_FAILS >= 3 )); then
+    rm -f "$DEV_CACHE"
+    local d
+    if d="$(pick_device)"; then DEV="$d"; echo "✅ Re-picked device: $DEV" >&2; fi
+    CAP_FAILS=0
+  fi
+  sleep 0.2
+}
 while true; do
   i=$((i+1))
   RAW="$TMPDIR/raw_${i}.wav"
@@ -98,21 +168,41 @@ while true; do
   PROC="$TMPDIR/proc_${i}.wav"
 
   # 1) Capture chunk (VAD or open-mic)
+  hb rec
   if [[ "$USE_VAD" = "1" ]]; then
     echo "[REC] waiting for voice (>${VAD_THRESH_PCT}% for ${VAD_LEAD}s) …" >&2
     if [[ "$DEBUG" = "1" ]]; then
       sox -V3 -t alsa "$DEV" -r "$CAP_RATE" -c "$CAP_IN_CH" -b "$CAP_BITS" -e signed-integer "$RAW" \
         silence 1 "$VAD_LEAD" "${VAD_THRESH_PCT}%" trim 0 "$LEN" \
-        || { echo "⚠️ VAD capture failed; retrying…" >&2; sleep 0.2; continue; }
+        || { echo "⚠️ VAD capture failed; retrying…" >&2; capture_failed; continue; }
     else
       sox -V0 -t alsa "$DEV" -r "$CAP_RATE" -c "$CAP_IN_CH" -b "$CAP_BITS" -e signed-integer "$RAW" \
         silence 1 "$VAD_LEAD" "${VAD_THRESH_PCT}%" trim 0 "$LEN" 2>/dev/null \
-        || { echo "⚠️ VAD capture failed; retrying…" >&2; sleep 0.2; continue; }
+        || { echo "⚠️ VAD capture failed; retrying…" >&2; capture_failed; continue; }
     fi
   else
     echo "[REC] open-mic chunk $i…" >&2
     if ! sox -V0 -t alsa "$DEV" -r "$CAP_RATE" -c "$CAP_IN_CH" -b "$CAP_BITS" -e signed-integer "$RAW" trim 0 "$LEN" 2>/dev/null; then
-      echo "⚠️ SoX capture failed; retrying…" >&2; sleep 0.2; continue
+      echo "⚠️ SoX capture failed; retrying…" >&2; capture_failed; continue
+    fi
+  fi
+
+  CAP_FAILS=0
+  (( FIRST_CHUNK )) && phase "first chunk captured"
+
+  # segment window (wall clock) for echo gating and latency tracing
+  SEG_END="$(now_s)"
+  SEG_DUR="$(soxi -D "$RAW" 2>/dev/null || echo "$LEN")"
+  SEG_START="$(awk -v e="$SEG_END" -v d="$SEG_DUR" 'BEGIN{printf("%.3f", e-d)}')"
+
+  # 1b) Echo gate: drop chunks recorded while we were playing audio
+  if [[ "$ECHO_GATE" = "1" ]]; then
+    if overlaps_playback "$SEG_START" "$SEG_END"; then
+      SUPPRESSED=$((SUPPRESSED+1))
+      echo "[ECHO] chunk $i overlaps playback; skipped (suppressed=$SUPPRESSED)" >&2
+      printf '{"type":"echo_suppressed","count":%d,"chunk":%d}\n' "$SUPPRESSED" "$i"
+      rm -f "$RAW" 2>/dev/null || true
+      continue
     fi
   fi
 
@@ -130,6 +220,18 @@ while true; do
     PROC="$MONO"
   fi
 
+  # 3b) Capture-only stream: hand the segment to transcriber.py, which batches
+  #     whisper across all mics (wav first, then the .json that marks it ready)
+  if [[ -n "${SPOOL_DIR:-}" ]]; then
+    SEG="$SPOOL_DIR/seg_$(now_ms)_$i"
+    mv -f "$PROC" "$SEG.wav"
+    if [[ "$MONO" != "$PROC" ]]; then rm -f "$MONO"; fi
+    printf '{"vad_start":%s,"vad_end":%s}\n' "$SEG_START" "$SEG_END" > "$SEG.tmp" && mv -f "$SEG.tmp" "$SEG.json"
+    dbg "chunk $i spooled for ${STREAM:-mic}"
+    (( FIRST_CHUNK )) && { phase "first chunk spooled"; FIRST_CHUNK=0; }
+    continue
+  fi
+
   # 4) Whisper -> transcript text (trim engine noise)
   EXTRA_FLAGS=()
   [[ "$FAST_DECODE" = "1" ]] && EXTRA_FLAGS+=(-bo 1 -bs 1 -nf)
@@ -146,21 +248,28 @@ while true; do
   EXTRA_FLAGS+=(--suppress-nst --prompt "$ACTIVE_PROMPT")
 
   echo "[WH] transcribing chunk $i… (mode=$MODE_NOW)" >&2
+  hb whisper
+  WH_START="$(now_s)"
   TRANSCRIPT="$(
     "${STDBUF_CMD[@]}" "$WHISPER_BIN" -m "$MODEL_PATH" -t "$THREADS" \
       --language en --no-timestamps -sow -f "$PROC" "${EXTRA_FLAGS[@]}" 2>&1 \
     | sed -E 's/^[[:space:]]+//; s/[[:space:]]+$//; /^[[:space:]]*$/d; /^whisper_/d; /^system_info/d'
   )"
+  WH_END="$(now_s)"
 
   # 5) Feed transcript to parser -> emit JSON to stdout for Flask
   if [[ -n "$TRANSCRIPT" ]]; then
     echo "[DEBUG_RAW][$MODE_NOW] $TRANSCRIPT" >&2
     if have python3; then PYBIN=python3; else PYBIN=/opt/bettybot/venv/bin/python; fi
-    printf '%s\n' "$TRANSCRIPT" | "$PYBIN" -u /opt/bettybot/bingo_parse.py
+    printf '%s\n' "$TRANSCRIPT" \
+      | BETTY_TRACE="vad_start=$SEG_START,vad_end=$SEG_END,whisper_start=$WH_START,whisper_end=$WH_END" \
+        "$PYBIN" -u /opt/bettybot/bingo_parse.py
   else
     echo "[DEBUG] (no transcript text this chunk)" >&2
   fi
 
+  if (( FIRST_CHUNK )); then phase "first chunk processed"; FIRST_CHUNK=0; fi
+
   # 6) Housekeeping (keep last ~5 chunks)
   rm -f "$TMPDIR"/mono_$((i-5)).wav "$TMPDIR"/proc_$((i-5)).wav 2>/dev/null || true
 done
@@ -0,0 +1,376 @@
+#!/usr/bin/env python3
+# /opt/bettybot/loadtest.py — drive bingo_app over HTTP/WebSocket and measure delivery latency
+"""
+Starts bingo_app.py (fake listener, scratch session dir) unless --url is given,
+attaches N WebSocket "displays", then plays scripted sessions:
+
+    /api/set_session_games → /api/session/lineup → /api/session/start
+    → /api/sim_call × calls-per-game at --rate → /api/game/next → ...
+
+Reports call→delivery latency percentiles (POST /api/sim_call sent → CALL
+frame received, per display), sim_call HTTP latency, and the server's CPU
+and RSS (from /proc, when we started it).
+
+    python3 loadtest.py --displays 4 --rate 2 --games 3 --calls 30
+"""
+import argparse
+import base64
+import http.client
+import json
+import os
+import random
+import socket
+import struct
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+from urllib.parse import urlparse
+
+import ws_codec
+
+APP_DIR = Path(__file__).resolve().parent
+
+# ---------- Config ----------
+FAKE_LISTENER = """#!/usr/bin/env bash
+# stands in for listen.sh: no mic, just keep the supervisor happy
+while true; do echo '{"type":"heartbeat","phase":"rec","chunk":0}'; sleep 5; done
+"""
+LETTERS = "BINGO"
+
+# ---------- HTTP ----------
+class Api:
+    def __init__(self, base: str, prefix: str = ""):
+        u = urlparse(base)
+        self.host, self.port = u.hostname, u.port or 80
+        self.prefix = prefix            # "/s/<id>" to drive another table
+        self._local = threading.local()
+
+    def _conn(self):
+        c = getattr(self._local, "conn", None)
+        if c is None:
+            c = self._local.conn = http.client.HTTPConnection(self.host, self.port, timeout=10)
+        return c
+
+    def request(self, method: str, path: str, body=None):
+        data = json.dumps(body).encode() if body is not None else None
+        headers = {"Content-Type": "application/json"} if data else {}
+        for attempt in (0, 1):
+            try:
+                c = self._conn()
+                c.request(method, self.prefix + path, body=data, headers=headers)
+                r = c.getresponse()
+                raw = r.read()
+                return r.status, (json.loads(raw) if raw[:1] in (b"{", b"[") else raw)
+            except (ConnectionError, http.client.HTTPException, OSError):
+                self._local.conn = None
+                if attempt:
+                    raise
+
+    def post(self, path: str, body=None):
+        return self.request("POST", path, body if body is not None else {})
+
+    def get(self, path: str):
+        return self.request("GET", path)
+
+# ---------- minimal WebSocket client (stdlib only) ----------
+class Display(threading.Thread):
+    """One simulated screen: receives frames, timestamps CALLs, acks like the UI."""
+    def __init__(self, host: str, port: int, idx: int, ack: bool = True, prefix: str = "", enc: str = "json"):
+        super().__init__(daemon=True, name=f"display-{idx}")
+        self.host, self.port, self.ack, self.prefix, self.enc = host, port, ack, prefix, enc
+        self.received = {}          # call key -> monotonic receive time
+        self.game_received = {}     # "game:key" -> receive time, filled per game
+        self.frames = 0
+        self.bytes = 0
+        self.error = None
+        self._sock = None
+        self._lock = threading.Lock()
+        self._closed = False
+
+    def connect(self):
+        s = socket.create_connection((self.host, self.port), timeout=10)
+        key = base64.b64encode(os.urandom(16)).decode()
+        s.sendall((f"GET {self.prefix}/ws?enc={self.enc} HTTP/1.1\r\nHost: {self.host}:{self.port}\r\n"
+                   "Upgrade: websocket\r\nConnection: Upgrade\r\n"
+                   f"Sec-WebSocket-Key: {key}\r\nSec-WebSocket-Version: 13\r\n\r\n").encode())
+        head = b""
+        while b"\r\n\r\n" not in head:
+            chunk = s.recv(1024)
+            if not chunk:
+                raise ConnectionError("handshake closed")
+            head += chunk
+        if b" 101 " not in head.split(b"\r\n", 1)[0]:
+            raise ConnectionError(head.split(b"\r\n", 1)[0].decode(errors="replace"))
+        self._buf = head.split(b"\r\n\r\n", 1)[1]
+        s.settimeout(None)
+        self._sock = s
+
+    def _read(self, n: int) -> bytes:
+        while len(self._buf) < n:
+            chunk = self._sock.recv(65536)
+            if not chunk:
+                raise ConnectionError("closed")
+            self._buf += chunk
+        out, self._buf = self._buf[:n], self._buf[n:]
+        return out
+
+    def _frame(self):
+        b1, b2 = self._read(2)
+        n = b2 & 0x7F
+        if n == 126:
+            n = struct.unpack(">H", self._read(2))[0]
+        elif n == 127:
+            n = struct.unpack(">Q", self._read(8))[0]
+        mask = self._read(4) if b2 & 0x80 else None
+        data = self._read(n)
+        if mask:
+            data = bytes(c ^ mask[i % 4] for i, c in enumerate(data))
+        return b1 & 0x0F, data
+
+    def send_text(self, text: str):
+        data = text.encode()
+        mask = os.urandom(4)
+        n = len(data)
+        head = bytes([0x81]) + (bytes([0x80 | n]) if n < 126 else bytes([0x80 | 126]) + struct.pack(">H", n))
+        with self._lock:
+            self._sock.sendall(head + mask + bytes(c ^ mask[i % 4] for i, c in enumerate(data)))
+
+    def run(self):
+        try:
+            while True:
+                op, data = self._frame()
+                if op == 0x8:
+                    return
+                if op not in (0x1, 0x2):
+                    continue
+                now = time.monotonic()
+                self.frames += 1
+                self.bytes += len(data)
+                msg = json.loads(data) if op == 0x1 else ws_codec.decode(data)
+                if msg.get("type") == "CALL" and msg.get("call"):
+                    self.received.setdefault(msg["call"], now)
+                    if self.ack and msg.get("state"):
+                        self.send_text(json.dumps({"type": "ACK", "calls": [msg["call"]]}))
+        except Exception as e:
+            if not self._closed:
+                self.error = e
+
+    def close(self):
+        self._closed = True
+        try:
+            self._sock.close()
+        except Exception:
+            pass
+
+# ---------- process stats ----------
+class ProcSampler(threading.Thread):
+    def __init__(self, pid: int, every: float = 0.5):
+        super().__init__(daemon=True, name="proc-sampler")
+        self.pid, self.every = pid, every
+        self.cpu = []               # % of one core per interval
+        self.rss_kb = []
+        self._quit = threading.Event()
+        self._tick = os.sysconf("SC_CLK_TCK")
+
+    def _cpu_ticks(self):
+        with open(f"/proc/{self.pid}/stat") as f:
+            parts = f.read().rsplit(")", 1)[1].split()
+        return int(parts[11]) + int(parts[12])   # utime + stime
+
+    def _rss(self):
+        with open(f"/proc/{self.pid}/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1])
+        return 0
+
+    def run(self):
+        try:
+            last_t, last_c = time.monotonic(), self._cpu_ticks()
+            while not self._quit.wait(self.every):
+                t, c = time.monotonic(), self._cpu_ticks()
+                self.cpu.append(100.0 * (c - last_c) / self._tick / (t - last_t))
+                self.rss_kb.append(self._rss())
+                last_t, last_c = t, c
+        except OSError:
+            pass
+
+    def stop(self):
+        self._quit.set()
+
+# ---------- helpers ----------
+def pct(xs, p):
+    if not xs:
+        return float("nan")
+    xs = sorted(xs)
+    return xs[min(len(xs) - 1, int(p / 100 * len(xs)))]
+
+def fmt_ms(xs) -> str:
+    if not xs:
+        return "n/a"
+    ms = [x * 1000 for x in xs]
+    return (f"n={len(ms)}  p50={pct(ms, 50):.1f}  p90={pct(ms, 90):.1f}  "
+            f"p99={pct(ms, 99):.1f}  max={max(ms):.1f} ms")
+
+def start_server(port: int, workdir: Path):
+    fake = workdir / "fake_listen.sh"
+    fake.write_text(FAKE_LISTENER)
+    env = os.environ.copy()
+    env.update({
+        "PORT": str(port),
+        "LISTEN_SH": str(fake),
+        "SESSION_DIR": str(workdir / "session"),
+        "SESSION_RESTORE": "0",
+        "TTS_CACHE_DIR": str(workdir / "tts"),
+        "AUDIO_DEV": env.get("AUDIO_DEV", "null"),
+    })
+    log = open(workdir / "server.log", "w")
+    proc = subprocess.Popen([sys.executable, str(APP_DIR / "bingo_app.py")],
+                            cwd=str(APP_DIR), env=env, stdout=log, stderr=subprocess.STDOUT)
+    return proc
+
+def wait_ready(api: Api, timeout: float = 30.0):
+    t0 = time.monotonic()
+    while time.monotonic() - t0 < timeout:
+        try:
+            if api.get("/api/state")[0] == 200:
+                return True
+        except Exception:
+            time.sleep(0.2)
+    return False
+
+def ball_order():
+    balls = [f"{LETTERS[(n - 1) // 15]}{n}" for n in range(1, 76)]
+    random.shuffle(balls)
+    return balls
+
+# ---------- scenario ----------
+def run_session(api: Api, displays, args):
+    sent = {}                   # call key -> monotonic send time
+    http_lat = []
+    api.post("/api/set_session_games", {"count": args.games})
+    programs = [k for k in (args.programs or "CLASSIC").split(",") if k]
+    api.post("/api/session/lineup", {"lineup": [programs[i % len(programs)] for i in range(args.games)]})
+    st, body = api.post("/api/session/start")
+    if st != 200:
+        raise SystemExit(f"session start failed: {body}")
+    interval = 1.0 / args.rate if args.rate > 0 else 0.0
+    for g in range(args.games):
+        balls = ball_order()[:args.calls]
+        next_t = time.monotonic()
+        for key in balls:
+            if interval:
+                delay = next_t - time.monotonic()
+                if delay > 0:
+                    time.sleep(delay)
+                next_t += interval
+            sent[f"{g}:{key}"] = t0 = time.monotonic()
+            api.post("/api/sim_call", {"letter": key[0], "number": int(key[1:])})
+            http_lat.append(time.monotonic() - t0)
+        time.sleep(args.settle)
+        # a key can repeat across games; take this game's receive times
+        for d in displays:
+            for key in balls:
+                if key in d.received:
+                    d.game_received[f"{g}:{key}"] = d.received.pop(key)
+        if g < args.games - 1:
+            api.post("/api/game/next")
+    return sent, http_lat
+
+def main():
+    ap = argparse.ArgumentParser(description="Load-test bingo_app's HTTP/WebSocket layer.")
+    ap.add_argument("--url", help="use a running server (e.g. http://pi.local:5000) instead of starting one")
+    ap.add_argument("--port", type=int, default=5099, help="port for the server we start")
+    ap.add_argument("--displays", type=int, default=4, help="simulated WebSocket displays")
+    ap.add_argument("--rate", type=float, default=2.0, help="calls per second (0 = as fast as possible)")
+    ap.add_argument("--games", type=int, default=2)
+    ap.add_argument("--calls", type=int, default=30, help="calls per game (max 75)")
+    ap.add_argument("--programs", default="CLASSIC", help="comma-separated lineup keys, repeated as needed")
+    ap.add_argument("--settle", type=float, default=1.0, help="seconds to wait for stragglers after each game")
+    ap.add_argument("--session", default="", help="table id to drive (served under /s/<id>/)")
+    ap.add_argument("--enc", choices=("json", "bin"), default="json", help="display wire format")
+    ap.add_argument("--no-ack", action="store_true", help="displays don't send render ACKs")
+    ap.add_argument("--json", action="store_true", help="print the report as JSON")
+    args = ap.parse_args()
+    args.calls = max(1, min(75, args.calls))
+
+    workdir = Path(tempfile.mkdtemp(prefix="betty_load_"))
+    proc = None
+    base = args.url or f"http://127.0.0.1:{args.port}"
+    if not args.url:
+        proc = start_server(args.port, workdir)
+    prefix = f"/s/{args.session}" if args.session else ""
+    api = Api(base, prefix)
+    sampler = None
+    displays = []
+    try:
+        if not wait_ready(api):
+            raise SystemExit(f"server not ready; see {workdir / 'server.log'}")
+        if proc is not None:
+            sampler = ProcSampler(proc.pid)
+            sampler.start()
+        u = urlparse(base)
+        for i in range(args.displays):
+            d = Display(u.hostname, u.port or 80, i, ack=not args.no_ack, prefix=prefix, enc=args.enc)
+            d.connect()
+            d.start()
+            displays.append(d)
+        t0 = time.monotonic()
+        sent, http_lat = run_session(api, displays, args)
+        wall = time.monotonic() - t0
+    finally:
+        if sampler:
+            sampler.stop()
+        for d in displays:
+            d.close()
+        if proc is not None:
+            proc.terminate()
+            try:
+                proc.wait(timeout=5)
+            except subprocess.TimeoutExpired:
+                proc.kill()
+
+    delivery, missing = [], 0
+    for d in displays:
+        got = d.game_received
+        for k, ts in sent.items():
+            if k in got:
+                delivery.append(got[k] - ts)
+            else:
+                missing += 1
+    report = {
+        "displays": args.displays,
+        "calls_sent": len(sent),
+        "wall_s": round(wall, 2),
+        "delivery_ms": {p: round(pct(delivery, p) * 1000, 1) for p in (50, 90, 99)} if delivery else {},
+        "delivery_max_ms": round(max(delivery) * 1000, 1) if delivery else None,
+        "missing_deliveries": missing,
+        "sim_call_http_ms": {p: round(pct(http_lat, p) * 1000, 1) for p in (50, 90, 99)} if http_lat else {},
+        "ws_frames": sum(d.frames for d in displays),
+        "ws_enc": args.enc,
+        "ws_bytes": sum(d.bytes for d in displays),
+    }
+    if sampler and sampler.cpu:
+        report["server_cpu_pct"] = {"avg": round(sum(sampler.cpu) / len(sampler.cpu), 1),
+                                    "max": round(max(sampler.cpu), 1)}
+        report["server_rss_mb"] = {"last": round(sampler.rss_kb[-1] / 1024, 1),
+                                   "max": round(max(sampler.rss_kb) / 1024, 1)}
+    if args.json:
+        print(json.dumps(report, indent=2))
+        return
+    print(f"displays={args.displays} rate={args.rate}/s games={args.games} calls/game={args.calls} wall={wall:.1f}s")
+    print(f"call→delivery  {fmt_ms(delivery)}  missing={missing}")
+    print(f"sim_call HTTP  {fmt_ms(http_lat)}")
+    print(f"ws ({args.enc}) frames={report['ws_frames']} bytes={report['ws_bytes']}")
+    if "server_cpu_pct" in report:
+        print(f"server CPU avg={report['server_cpu_pct']['avg']}% max={report['server_cpu_pct']['max']}%  "
+              f"RSS last={report['server_rss_mb']['last']}MB max={report['server_rss_mb']['max']}MB")
+    errs = [d.error for d in displays if d.error]
+    if errs:
+        print(f"display errors: {errs[:3]}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,142 @@
+# /opt/bettybot/metrics.py
+from __future__ import annotations
+import bisect
+import threading
+import time
+from collections import OrderedDict, deque
+
+# ---------- call latency tracing ----------
+# A trace follows one call ("B12") through the pipeline as wall-clock stamps
+# (time.time(); listen.sh and the parser run in other processes, so a shared
+# clock is needed):
+#   vad_start, vad_end        captured segment (listen.sh)
+#   whisper_start/_end        whisper-cli run (listen.sh)
+#   parse                     bingo_parse.py emitted the CALL
+#   mark_call                 game actor applied it
+#   send                      update written to the WebSocket clients
+#   render                    first display acked after painting it
+# Stage durations between pairs of stamps go into histograms. Traces that
+# never get a render ack (no displays) are closed with what they have.
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+STAGES = (
+    ("vad",        "vad_start",     "vad_end"),
+    ("prep",       "vad_end",       "whisper_start"),
+    ("whisper",    "whisper_start", "whisper_end"),
+    ("parse",      "whisper_end",   "parse"),
+    ("ingest",     "parse",         "mark_call"),
+    ("apply",      "mark_call",     "send"),
+    ("render",     "send",          "render"),
+    ("call_to_render", "mark_call", "render"),
+    ("end_to_end", "vad_end",       "render"),
+)
+
+class Histogram:
+    def __init__(self, buckets=LATENCY_BUCKETS, keep: int = 200):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)   # last slot is +Inf
+        self.sum = 0.0
+        self.count = 0
+        self.recent = deque(maxlen=keep)
+
+    def observe(self, v: float):
+        self.counts[bisect.bisect_left(self.buckets, v)] += 1
+        self.sum += v
+        self.count += 1
+        self.recent.append(v)
+
+    def percentile(self, p: float):
+        if not self.recent:
+            return None
+        xs = sorted(self.recent)
+        return xs[min(len(xs) - 1, int(p / 100 * len(xs)))]
+
+    def prometheus(self, name: str, labels: str) -> list:
+        out, acc = [], 0
+        for le, n in zip(self.buckets + ("+Inf",), self.counts):
+            acc += n
+            out.append(f'{name}_bucket{{{labels},le="{le}"}} {acc}')
+        out.append(f"{name}_sum{{{labels}}} {self.sum:.6f}")
+        out.append(f"{name}_count{{{labels}}} {self.count}")
+        return out
+
+
+class LatencyTracer:
+    def __init__(self, max_pending: int = 64):
+        self.max_pending = max_pending
+        self.hist = {name: Histogram() for name, _, _ in STAGES}
+        self.recent = deque(maxlen=20)      # finished traces, newest last
+        self._pending = OrderedDict()       # call key -> {stage: ts}
+        self._lock = threading.Lock()
+
+    def begin(self, key: str, stamps: dict | None = None):
+        """Start a trace, seeded with stamps from upstream (listen.sh/parser)."""
+        clean = {}
+        for k, v in (stamps or {}).items():
+            try:
+                clean[k] = float(v)
+            except (TypeError, ValueError):
+                pass
+        with self._lock:
+            old = self._pending.pop(key, None)
+            if old is not None:
+                self._close(key, old)
+            self._pending[key] = clean
+            while len(self._pending) > self.max_pending:
+                self._close(*self._pending.popitem(last=False))
+
+    def stamp(self, key: str, stage: str, ts: float | None = None):
+        """Record a stage for a pending trace (opens one if needed, e.g. simulated calls)."""
+        ts = time.time() if ts is None else ts
+        with self._lock:
+            tr = self._pending.get(key)
+            if tr is None:
+                tr = self._pending[key] = {}
+            tr.setdefault(stage, ts)
+
+    def finish(self, key: str, stage: str = "render", ts: float | None = None):
+        ts = time.time() if ts is None else ts
+        with self._lock:
+            tr = self._pending.pop(key, None)
+            if tr is None:
+                return
+            tr.setdefault(stage, ts)
+            self._close(key, tr)
+
+    def _close(self, key: str, tr: dict):
+        stages = {}
+        for name, a, b in STAGES:
+            if a in tr and b in tr and tr[b] >= tr[a]:
+                d = tr[b] - tr[a]
+                self.hist[name].observe(d)
+                stages[name] = round(d * 1000, 1)
+        if stages:
+            self.recent.append({"call": key, "ms": stages})
+
+    # ---------- export ----------
+    def prometheus(self, gauges: dict | None = None) -> str:
+        with self._lock:
+            lines = ["# HELP betty_latency_seconds Per-stage call latency.",
+                     "# TYPE betty_latency_seconds histogram"]
+            for name, h in self.hist.items():
+                lines += h.prometheus("betty_latency_seconds", f'stage="{name}"')
+        for name, (kind, value) in (gauges or {}).items():
+            lines.append(f"# TYPE {name} {kind}")
+            lines.append(f"{name} {value}")
+        return "\n".join(lines) + "\n"
+
+    def summary(self) -> dict:
+        """Percentiles (ms) over recent samples per stage, plus the last traces."""
+        with self._lock:
+            stages = {}
+            for name, h in self.hist.items():
+                if not h.count:
+                    continue
+                stages[name] = {
+                    "count": h.count,
+                    "p50": round(h.percentile(50) * 1000, 1),
+                    "p95": round(h.percentile(95) * 1000, 1),
+                    "max": round(max(h.recent) * 1000, 1),
+                }
+            return {"stages": stages, "recent": list(self.recent)}
@@ -55,6 +55,8 @@ PRESET_PATTERNS = {
 #   - fixed_shape    -> just draw this shape (uses preview_cells)
 #   - special_number -> needs first ball; premark numbers containing its digits; then coverall
 #   - odd_even       -> needs first ball parity; premark odd/even; then coverall on opposite
+# premark (optional): declarative number rule applied to the first ball; see
+#   program_compiler.premark_mask() for the rule forms.
 PROGRAMS = {
     "CLASSIC": {
         "name": "Classic Bingo",
@@ -82,6 +84,7 @@ PROGRAMS = {
         "desc": "After first ball, pre-mark all numbers containing any of its digits; then coverall.",
         "kind": "special_number",
         "params": {"digits": []},  # set at runtime
+        "premark": {"attr": "digits", "intersects": "$value", "record": "digits"},
         "preview_cells": []        # varies by first ball
     },
     "ODD_EVEN": {
@@ -89,6 +92,7 @@ PROGRAMS = {
         "desc": "If first ball is odd, pre-mark all odd numbers (or even if even). Then coverall with the opposite.",
         "kind": "odd_even",
         "params": {"first": None},  # "odd" | "even"
+        "premark": {"attr": "parity", "equals": "$value", "record": "first"},
         "preview_cells": []
     },
     "GIANT_X": {
@@ -136,29 +140,62 @@ PROGRAMS = {
 }
 
 # ---------- file I/O ----------
+# patterns.json is read-mostly: it is parsed once, then served from memory
+# (re-read only if its mtime/size change). It's written only when a custom
+# shape is saved/deleted, or when the file is missing, unreadable, or from
+# an older schema. Presets and programs always come from code.
+_CACHE = {"sig": None, "schema": PATTERN_SCHEMA_VERSION, "custom": {}}
+
+def _signature():
+    try:
+        st = PATTERN_FILE.stat()
+        return (st.st_mtime_ns, st.st_size)
+    except OSError:
+        return None
+
+def _write(custom: dict):
+    data = {
+        "schema": PATTERN_SCHEMA_VERSION,
+        "presets": PRESET_PATTERNS,
+        "custom": custom,
+        "programs": PROGRAMS,
+    }
+    tmp = PATTERN_FILE.with_name(PATTERN_FILE.name + ".tmp")
+    tmp.write_text(json.dumps(data, indent=2))
+    tmp.replace(PATTERN_FILE)
+    _CACHE.update(sig=_signature(), schema=PATTERN_SCHEMA_VERSION, custom=custom)
+
+def _clean_custom(raw) -> dict:
+    custom = {}
+    for name, spec in (raw or {}).items():
+        if not isinstance(spec, dict):
+            continue
+        custom[name] = {
+            "description": (spec.get("description") or "").strip(),
+            "cells": _sanitize_cells(spec.get("cells"))
+        }
+    return custom
+
 def _ensure_file():
-    """Create or refresh patterns.json; keep customs; refresh presets/programs from code."""
-    if PATTERN_FILE.exists():
+    """Make sure the in-memory copy matches patterns.json; create/upgrade the file if needed."""
+    sig = _signature()
+    if sig is not None and sig == _CACHE["sig"]:
+        return
+    data = None
+    if sig is not None:
         try:
             data = json.loads(PATTERN_FILE.read_text())
-            if isinstance(data, dict):
-                data.setdefault("schema", PATTERN_SCHEMA_VERSION)
-                data.setdefault("presets", {})
-                data.setdefault("custom", {})
-                data.setdefault("programs", {})
-                # refresh from code
-                data["presets"] = PRESET_PATTERNS
-                data["programs"] = PROGRAMS
-                PATTERN_FILE.write_text(json.dumps(data, indent=2))
-                return
         except Exception:
-            pass
-    PATTERN_FILE.write_text(json.dumps({
-        "schema": PATTERN_SCHEMA_VERSION,
-        "presets": PRESET_PATTERNS,
-        "custom": {},
-        "programs": PROGRAMS,
-    }, indent=2))
+            data = None
+    if not isinstance(data, dict):
+        _write({})
+        return
+    custom = _clean_custom(data.get("custom"))
+    schema = data.get("schema", 0)
+    if not isinstance(schema, int) or schema < PATTERN_SCHEMA_VERSION:
+        _write(custom)  # one-time upgrade
+        return
+    _CACHE.update(sig=sig, schema=schema, custom=custom)
 
 def _sanitize_cells(cells):
     clean=[]
@@ -172,66 +209,35 @@ def _sanitize_cells(cells):
     return clean
 
 # ---------- public API (back-compat) ----------
+# Returned dicts are shared with the cache; treat them as read-only.
 def load_all():
     """
     Returns presets + custom (shapes). Programs are available via load_programs().
     """
     _ensure_file()
-    try:
-        data = json.loads(PATTERN_FILE.read_text())
-    except Exception:
-        data = {"schema": PATTERN_SCHEMA_VERSION, "presets": PRESET_PATTERNS, "custom": {}, "programs": PROGRAMS}
-    # sanitize custom
-    custom = {}
-    for name, spec in (data.get("custom") or {}).items():
-        custom[name] = {
-            "description": (spec.get("description") or "").strip(),
-            "cells": _sanitize_cells(spec.get("cells"))
-        }
-    return {"schema": data.get("schema", PATTERN_SCHEMA_VERSION),
+    return {"schema": _CACHE["schema"],
             "presets": PRESET_PATTERNS,
-            "custom": custom}
+            "custom": _CACHE["custom"]}
 
 def load_programs():
     """Return dict of program specs keyed by program key (e.g., 'CLASSIC')."""
-    _ensure_file()
-    try:
-        data = json.loads(PATTERN_FILE.read_text())
-        progs = data.get("programs") or PROGRAMS
-    except Exception:
-        progs = PROGRAMS
-    return progs
+    return PROGRAMS
 
 def save_custom(name: str, cells, description: str = ""):
     _ensure_file()
-    try:
-        data = json.loads(PATTERN_FILE.read_text())
-    except Exception:
-        data = {"schema": PATTERN_SCHEMA_VERSION, "presets": PRESET_PATTERNS, "custom": {}, "programs": PROGRAMS}
-    custom = data.get("custom") or {}
+    custom = dict(_CACHE["custom"])
     custom[name] = {"description": (description or "").strip(),
                     "cells": _sanitize_cells(cells)}
-    data["custom"] = custom
-    # preserve presets + programs from code
-    data["presets"] = PRESET_PATTERNS
-    data["programs"] = PROGRAMS
-    PATTERN_FILE.write_text(json.dumps(data, indent=2))
+    _write(custom)
 
 def delete_custom(name: str) -> bool:
     _ensure_file()
-    try:
-        data = json.loads(PATTERN_FILE.read_text())
-    except Exception:
+    if name not in _CACHE["custom"]:
         return False
-    custom = data.get("custom") or {}
-    if name in custom:
-        del custom[name]
-        data["custom"] = custom
-        data["presets"] = PRESET_PATTERNS
-        data["programs"] = PROGRAMS
-        PATTERN_FILE.write_text(json.dumps(data, indent=2))
-        return True
-    return False
+    custom = dict(_CACHE["custom"])
+    del custom[name]
+    _write(custom)
+    return True
 
 def get_spec(name: str):
     """
@@ -244,5 +250,4 @@ def get_program(key: str):
     """
     Look up a PROGRAM by key, e.g., 'CLASSIC', 'HARD_WAYS', 'LUCKY_7', 'SPECIAL_NUMBER', 'ODD_EVEN', etc.
     """
-    progs = load_programs()
-    return progs.get(str(key).upper())
+    return PROGRAMS.get(str(key).upper())
@@ -0,0 +1,335 @@
+# /opt/bettybot/program_compiler.py
+from __future__ import annotations
+import hashlib
+import json
+from typing import NamedTuple
+
+# ---------- bit layouts ----------
+# Card positions: bit (r*5 + c) of a 25-bit int; the FREE square is bit 12.
+# Numbers:        bit n (1..75) of an int; bit 0 is unused.
+FREE_BIT = 1 << 12
+ALL_CELLS = (1 << 25) - 1
+KINDS = {"classic", "fixed_shape", "special_number", "odd_even", "custom"}
+
+def cell_bit(r: int, c: int) -> int:
+    return 1 << (r * 5 + c)
+
+def cells_to_mask(cells) -> int:
+    m = 0
+    for r, c in cells:
+        m |= cell_bit(r, c)
+    return m
+
+def mask_to_cells(mask: int) -> list:
+    return [[i // 5, i % 5] for i in range(25) if mask >> i & 1]
+
+def numbers_to_mask(nums) -> int:
+    m = 0
+    for n in nums:
+        m |= 1 << n
+    return m
+
+# rows, columns, diagonal, anti-diagonal — same order the UI used to scan
+LINE_MASKS = tuple(
+    [cells_to_mask([[r, c] for c in range(5)]) for r in range(5)] +
+    [cells_to_mask([[r, c] for r in range(5)]) for c in range(5)] +
+    [cells_to_mask([[i, i] for i in range(5)]),
+     cells_to_mask([[i, 4 - i] for i in range(5)])]
+)
+
+CORNER_CELLS = {
+    "TL": [[0,0],[0,1],[0,2],[1,0],[2,0]],
+    "TR": [[0,4],[0,3],[0,2],[1,4],[2,4]],
+    "BL": [[4,0],[3,0],[2,0],[4,1],[4,2]],
+    "BR": [[4,4],[3,4],[2,4],[4,3],[4,2]],
+}
+
+# ---------- compiled program ----------
+class CompiledProgram(NamedTuple):
+    hash: str
+    kind: str
+    free_enabled: bool
+    win_masks: tuple        # any one fully-marked mask wins
+    number_allow: int       # 0 = no restriction
+    number_deny: int
+    preview_cells: tuple
+
+    def numbers_ok(self, called: int) -> bool:
+        """Allowed/disallowed number rules against a mask of called numbers."""
+        if called & self.number_deny:
+            return False
+        if self.number_allow and called & ~self.number_allow:
+            return False
+        return True
+
+    def find_win(self, marked: int):
+        """First win mask fully covered by `marked`, else None."""
+        for m in self.win_masks:
+            if marked & m == m:
+                return m
+        return None
+
+    def export(self) -> dict:
+        """JSON-friendly form for the UI (number masks as hex strings)."""
+        return {
+            "hash": self.hash,
+            "win_masks": list(self.win_masks),
+            "number_allow": format(self.number_allow, "x"),
+            "number_deny": format(self.number_deny, "x"),
+        }
+
+# ---------- validation helpers ----------
+def _positions(raw, what: str) -> list:
+    if raw is None:
+        return []
+    if not isinstance(raw, list):
+        raise ValueError(f"{what} must be a list of [row, col]")
+    out = []
+    for pair in raw:
+        try:
+            r, c = int(pair[0]), int(pair[1])
+        except Exception:
+            raise ValueError(f"{what}: bad cell {pair!r}")
+        if not (0 <= r <= 4 and 0 <= c <= 4):
+            raise ValueError(f"{what}: cell {pair!r} is off the card")
+        out.append([r, c])
+    return out
+
+def _numbers(raw, what: str) -> list:
+    if raw is None:
+        return []
+    if not isinstance(raw, list):
+        raise ValueError(f"{what} must be a list of numbers")
+    out = []
+    for n in raw:
+        try:
+            n = int(n)
+        except Exception:
+            raise ValueError(f"{what}: bad number {n!r}")
+        if not 1 <= n <= 75:
+            raise ValueError(f"{what}: {n} is outside 1..75")
+        out.append(n)
+    return out
+
+# ---------- compiler ----------
+_CACHE = {}
+_CACHE_MAX = 256
+
+def spec_hash(spec: dict, key: str = "") -> str:
+    blob = json.dumps({"key": key, "spec": spec}, sort_keys=True, default=str)
+    return hashlib.sha1(blob.encode("utf-8")).hexdigest()[:16]
+
+def compile_program(spec: dict, key: str = "") -> CompiledProgram:
+    """Validate a program/custom game spec and compile it; cached by spec hash. Raises ValueError."""
+    h = spec_hash(spec, key)
+    hit = _CACHE.get(h)
+    if hit is not None:
+        return hit
+    if not isinstance(spec, dict):
+        raise ValueError("program spec must be an object")
+    kind = str(spec.get("kind") or "custom").lower()
+    if kind not in KINDS:
+        raise ValueError(f"unknown program kind {kind!r}")
+    params = spec.get("params") or {}
+    free = spec.get("free_enabled")
+    if free is None:
+        free = params.get("free_enabled", True)
+
+    if kind == "classic":
+        win = LINE_MASKS
+        preview = []
+    elif kind in ("special_number", "odd_even"):
+        win = (ALL_CELLS,)
+        preview = []
+    elif kind == "fixed_shape":
+        cells = _positions(spec.get("preview_cells"), "preview_cells")
+        if key == "FIVE_AROUND_CORNER":
+            cells = CORNER_CELLS.get(params.get("corner", "TL"), cells)
+        win = (cells_to_mask(cells),) if cells else ()
+        preview = cells
+    else:
+        allowed = cells_to_mask(_positions(spec.get("allowed_positions"), "allowed_positions"))
+        denied = cells_to_mask(_positions(spec.get("disallowed_positions"), "disallowed_positions"))
+        patterns = spec.get("patterns") or []
+        if not isinstance(patterns, list):
+            raise ValueError("patterns must be a list")
+        masks = []
+        for i, p in enumerate(patterns):
+            if not isinstance(p, dict):
+                raise ValueError(f"pattern {i+1} must be an object")
+            m = cells_to_mask(_positions(p.get("cells"), f"pattern {i+1} cells"))
+            m &= ~cells_to_mask(_positions(p.get("excluded"), f"pattern {i+1} excluded"))
+            m &= ~denied
+            if allowed:
+                m &= allowed
+            if m:
+                masks.append(m)
+        win = tuple(masks)
+        preview = _positions(spec.get("preview_cells"), "preview_cells")
+
+    if spec.get("premark") is not None:
+        try:
+            premark_mask(spec["premark"], 1)  # validate the rule shape
+        except (TypeError, ValueError) as e:
+            raise ValueError(f"bad premark rule: {e}") from None
+
+    compiled = CompiledProgram(
+        hash=h,
+        kind=kind,
+        free_enabled=bool(free),
+        win_masks=tuple(win),
+        number_allow=numbers_to_mask(_numbers(spec.get("allowed_numbers"), "allowed_numbers")),
+        number_deny=numbers_to_mask(_numbers(spec.get("disallowed_numbers"), "disallowed_numbers")),
+        preview_cells=tuple(tuple(c) for c in preview),
+    )
+    if len(_CACHE) >= _CACHE_MAX:
+        _CACHE.pop(next(iter(_CACHE)))
+    _CACHE[h] = compiled
+    return compiled
+
+# ---------- card helpers ----------
+def card_mask(card: dict) -> int:
+    """25-bit mask of the marked cells on a card dict ({cols, marks})."""
+    cols, marks = card["cols"], card["marks"]
+    m = FREE_BIT if marks.get("FREE") else 0
+    for c, L in enumerate("BINGO"):
+        for r, n in enumerate(cols[L]):
+            if n and marks.get(f"{L}{n}"):
+                m |= cell_bit(r, c)
+    return m
+
+def called_mask(calls) -> int:
+    """Mask of numbers from call keys like 'B12'."""
+    m = 0
+    for k in calls:
+        try:
+            n = int(k[1:])
+        except (TypeError, ValueError):
+            continue
+        if 1 <= n <= 75:
+            m |= 1 << n
+    return m
+
+# ---------- number attributes (premark rules) ----------
+# One entry per ball 1..75 (index 0 unused) plus, for every attribute value,
+# the mask of numbers having it. Premark rules are declarative specs that
+# evaluate to a number mask, e.g.
+#   {"attr": "digits", "intersects": "$value"}   numbers sharing a digit with the ball
+#   {"attr": "parity", "equals": "$value"}       "odd"/"even", or the ball's parity
+#   {"attr": "column", "equals": "G"}            a whole column
+#   {"multiple_of": 7}, {"numbers": [1, 2]}, {"range": [1, 30]}
+#   {"any": [...]}, {"all": [...]}, {"not": {...}}
+# "$value" binds to the value given at premark time: a ball number yields that
+# ball's attribute, anything else is used literally.
+def _number_attrs(n: int) -> dict:
+    return {
+        "n": n,
+        "digits": frozenset(str(n)),
+        "parity": "odd" if n % 2 else "even",
+        "column": "BINGO"[(n - 1) // 15],
+        "tens": n // 10,
+        "ones": n % 10,
+    }
+
+NUMBER_ATTRS = (None,) + tuple(_number_attrs(n) for n in range(1, 76))
+ALL_NUMBERS = numbers_to_mask(range(1, 76))
+
+ATTR_MASKS = {"parity": {}, "column": {}, "tens": {}, "ones": {}, "digit": {}}
+for _a in NUMBER_ATTRS[1:]:
+    for _k in ("parity", "column", "tens", "ones"):
+        ATTR_MASKS[_k][_a[_k]] = ATTR_MASKS[_k].get(_a[_k], 0) | 1 << _a["n"]
+    for _d in _a["digits"]:
+        ATTR_MASKS["digit"][_d] = ATTR_MASKS["digit"].get(_d, 0) | 1 << _a["n"]
+
+def _bind(x, attr: str, value):
+    if x != "$value":
+        return x
+    if isinstance(value, int) and 1 <= value <= 75:
+        return NUMBER_ATTRS[value][attr]
+    if value is None:
+        raise ValueError("this premark needs a value")
+    return value
+
+def premark_mask(rule: dict, value=None):
+    """Evaluate a premark rule. Returns (number_mask, bound_value). Raises ValueError."""
+    if not isinstance(rule, dict):
+        raise ValueError("premark rule must be an object")
+    if "any" in rule or "all" in rule:
+        subs = rule.get("any") if "any" in rule else rule.get("all")
+        if not isinstance(subs, list):
+            raise ValueError("premark any/all must be a list of rules")
+        parts = [premark_mask(r, value) for r in subs]
+        m = 0 if "any" in rule else ALL_NUMBERS
+        for pm, _ in parts:
+            m = (m | pm) if "any" in rule else (m & pm)
+        return m, value
+    if "not" in rule:
+        m, bound = premark_mask(rule["not"], value)
+        return ALL_NUMBERS & ~m, bound
+    if "multiple_of" in rule:
+        k = _bind(rule["multiple_of"], "n", value)
+        if isinstance(k, bool) or not isinstance(k, (int, str)) or not str(k).strip().isdigit():
+            raise ValueError("multiple_of must be a whole number")
+        k = int(k)
+        if k < 1:
+            raise ValueError("multiple_of must be >= 1")
+        return numbers_to_mask(range(k, 76, k)), k
+    if "numbers" in rule:
+        nums = _numbers(rule["numbers"], "numbers")
+        return numbers_to_mask(nums), nums
+    if "range" in rule:
+        r = rule["range"]
+        if not isinstance(r, (list, tuple)) or len(r) != 2 or not all(isinstance(x, int) and not isinstance(x, bool) for x in r):
+            raise ValueError("range must be [low, high]")
+        lo, hi = r
+        return numbers_to_mask(range(max(1, lo), min(75, hi) + 1)), [lo, hi]
+    attr = rule.get("attr")
+    if attr == "digits":
+        if rule.get("intersects") is None:
+            raise ValueError("digits premark needs 'intersects'")
+        digits = _bind(rule.get("intersects"), "digits", value)
+        if not isinstance(digits, (str, int, list, tuple, set, frozenset)):
+            raise ValueError("intersects must be digits")
+        digits = frozenset(str(d) for d in (digits if not isinstance(digits, (str, int)) else str(digits)))
+        m = 0
+        for d in digits:
+            m |= ATTR_MASKS["digit"].get(d, 0)
+        return m, sorted(digits)
+    if attr in ("parity", "column", "tens", "ones"):
+        x = _bind(rule.get("equals"), attr, value)
+        if attr == "parity":
+            x = "odd" if str(x).lower().startswith("o") else "even"
+        elif attr == "column":
+            x = str(x).upper()
+        else:
+            try:
+                x = int(x)
+            except (TypeError, ValueError):
+                raise ValueError(f"{attr} must be a number") from None
+        return ATTR_MASKS[attr].get(x, 0), x
+    raise ValueError(f"unknown premark rule {rule!r}")
+
+def card_number_mask(card: dict) -> int:
+    """Mask of the numbers printed on a card (FREE excluded)."""
+    m = 0
+    for L in "BINGO":
+        for n in card["cols"][L]:
+            if n:
+                m |= 1 << n
+    return m
+
+def apply_number_mask(cards, mask: int) -> int:
+    """Mark every card number in `mask`; returns how many cells were newly marked."""
+    marked = 0
+    for card in cards:
+        hits = card_number_mask(card) & mask
+        marks = card["marks"]
+        while hits:
+            low = hits & -hits
+            n = low.bit_length() - 1
+            key = NUMBER_ATTRS[n]["column"] + str(n)
+            if not marks.get(key):
+                marks[key] = True
+                marked += 1
+            hits ^= low
+    return marked
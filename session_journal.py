@@ -0,0 +1,89 @@
+# /opt/bettybot/session_journal.py
+from __future__ import annotations
+import json
+import os
+from pathlib import Path
+
+# ---------- append-only session journal ----------
+# journal.log  : one JSON line per applied command {"seq", "cmd", "args"}
+# snapshot.json: compact copy of the game state at some seq
+# Recovery = load snapshot, then replay journal lines with a higher seq.
+# Writing a snapshot truncates the journal (compaction).
+
+class SessionJournal:
+    def __init__(self, directory: Path, compact_every: int = 100):
+        self.dir = Path(directory)
+        self.journal_path = self.dir / "journal.log"
+        self.snapshot_path = self.dir / "snapshot.json"
+        self.compact_every = max(1, int(compact_every))
+        self.seq = 0
+        self._since_snapshot = 0
+        self._fh = None
+
+    # ---------- recovery ----------
+    def load(self):
+        """Return (snapshot_state | None, [(cmd, args), ...]) and set self.seq."""
+        state, snap_seq = None, 0
+        try:
+            snap = json.loads(self.snapshot_path.read_text(encoding="utf-8"))
+            state, snap_seq = snap.get("state"), int(snap.get("seq", 0))
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            print(f"[journal] snapshot unreadable, ignoring: {e}")
+        entries = []
+        self.seq = snap_seq
+        try:
+            with open(self.journal_path, "r", encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        rec = json.loads(line)
+                    except Exception:
+                        continue  # torn tail write after power loss
+                    if int(rec.get("seq", 0)) <= snap_seq:
+                        continue
+                    entries.append((rec["cmd"], rec.get("args", [])))
+                    self.seq = max(self.seq, int(rec["seq"]))
+        except FileNotFoundError:
+            pass
+        self._since_snapshot = len(entries)
+        return state, entries
+
+    # ---------- writing ----------
+    def append(self, entries) -> bool:
+        """Append applied commands; returns True when a compaction is due."""
+        if not entries:
+            return False
+        if self._fh is None:
+            self.dir.mkdir(parents=True, exist_ok=True)
+            self._fh = open(self.journal_path, "a", encoding="utf-8")
+        for cmd, args in entries:
+            self.seq += 1
+            self._fh.write(json.dumps({"seq": self.seq, "cmd": cmd, "args": list(args)}) + "\n")
+        self._fh.flush()
+        os.fsync(self._fh.fileno())
+        self._since_snapshot += len(entries)
+        return self._since_snapshot >= self.compact_every
+
+    def snapshot(self, state: dict):
+        """Atomically write a snapshot at the current seq and truncate the journal."""
+        self.dir.mkdir(parents=True, exist_ok=True)
+        self.seq += 1  # snapshot supersedes everything up to and including this seq
+        tmp = self.snapshot_path.with_suffix(".tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({"seq": self.seq, "state": state}, f, separators=(",", ":"))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, self.snapshot_path)
+        if self._fh is not None:
+            self._fh.close()
+        self._fh = open(self.journal_path, "w", encoding="utf-8")
+        self._since_snapshot = 0
+
+    def close(self):
+        if self._fh is not None:
+            try:
+                self._fh.close()
+            except Exception:
+                pass
+            self._fh = None
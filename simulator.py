@@ -0,0 +1,172 @@
+# /opt/bettybot/simulator.py
+from __future__ import annotations
+import random
+import threading
+from collections import OrderedDict
+
+try:
+    import numpy as np
+except ImportError:          # pure-Python fallback below (fewer games)
+    np = None
+
+from program_compiler import CompiledProgram, premark_mask
+
+# ---------- Monte Carlo game simulator ----------
+# How many balls does a program take with N cards on the sheet? Plays many
+# random games at once: every game gets a random call order and random card
+# faces, each cell gets the call index at which it is marked (FREE: 0,
+# premarked numbers: 1, i.e. right after the first ball), a pattern completes
+# at the max over its cells, a card wins at the min over patterns and the
+# sheet at the min over cards. Only allowed (not disallowed) numbers are drawn,
+# as a caller would for such a game.
+#
+# Results are cached by (compiled program hash, cards, games, seed).
+
+MAX_GAMES = 100_000
+FALLBACK_MAX_GAMES = 2_000   # without NumPy
+CHUNK = 5_000                # games per vectorized block, at most
+CHUNK_ELEMENTS = 1_500_000   # cap on games × cards × 75 per block (~12 MB per float64/int64 array)
+NEVER = 255                  # "not within the calls" sentinel (uint8)
+
+_CACHE = OrderedDict()
+_CACHE_MAX = 64
+_LOCK = threading.Lock()
+
+def _pool(compiled: CompiledProgram) -> list:
+    nums = [n for n in range(1, 76) if not compiled.number_deny >> n & 1]
+    if compiled.number_allow:
+        nums = [n for n in nums if compiled.number_allow >> n & 1]
+    return nums
+
+def _premark_table(rule) -> list | None:
+    """For each first ball 1..75, the mask of numbers its premark marks."""
+    if not rule:
+        return None
+    return [0] + [premark_mask(rule, b)[0] for b in range(1, 76)]
+
+def _cells(mask: int) -> list:
+    return [i for i in range(25) if mask >> i & 1]
+
+def _summary(first_win, pattern_wins, n_games: int, n_calls: int, compiled, cards: int, seed) -> dict:
+    """first_win: calls to the first win per game (NEVER = none); pattern_wins: per pattern, #games it won."""
+    dist = [0] * (n_calls + 1)
+    won = sorted(x for x in first_win if x != NEVER)
+    for x in won:
+        dist[x] += 1
+    def pct(p):
+        return won[min(len(won) - 1, int(p / 100 * len(won)))] if won else None
+    return {
+        "hash": compiled.hash,
+        "cards": cards,
+        "games": n_games,
+        "seed": seed,
+        "balls": n_calls,
+        "engine": "numpy" if np is not None else "python",
+        "win_rate": round(len(won) / n_games, 4),
+        "mean": round(sum(won) / len(won), 2) if won else None,
+        "p10": pct(10), "p50": pct(50), "p90": pct(90), "p99": pct(99),
+        "distribution": dist,      # index = calls, value = games first won on that call
+        "patterns": [{"index": i, "cells": _cells(m), "win_share": round(k / n_games, 4)}
+                     for i, (m, k) in enumerate(zip(compiled.win_masks, pattern_wins))],
+    }
+
+# ---------- NumPy engine ----------
+def _simulate_numpy(compiled, cards: int, games: int, seed, premark_rule) -> dict:
+    rng = np.random.default_rng(seed)
+    pool = np.array(_pool(compiled), dtype=np.int64)
+    n_calls = len(pool)
+    table = _premark_table(premark_rule)
+    if table is not None:
+        pm = np.zeros((76, 76), dtype=bool)    # [first ball, number] → premarked
+        for b, m in enumerate(table):
+            pm[b] = [(m >> n) & 1 for n in range(76)]
+    masks = [np.array(_cells(m)) for m in compiled.win_masks]
+    first_win = np.empty(games, dtype=np.uint8)
+    pattern_wins = np.zeros(len(masks), dtype=np.int64)
+    offsets = np.arange(5) * 15 + 1                      # column c holds 15c+1 .. 15c+15
+    chunk = max(1, min(CHUNK, CHUNK_ELEMENTS // (cards * 75)))   # faces draw dominates memory
+
+    for lo in range(0, games, chunk):
+        g = min(chunk, games - lo)
+        # call order: position (1-based) of each number; numbers never drawn stay NEVER
+        order = pool[np.argsort(rng.random((g, n_calls)), axis=1)]
+        when = np.full((g, 76), NEVER, dtype=np.uint8)
+        np.put_along_axis(when, order, np.broadcast_to(np.arange(1, n_calls + 1, dtype=np.uint8), (g, n_calls)), axis=1)
+        # faces: 5 of 15 per column → (g, cards, 25) numbers in row-major cell order
+        picks = np.argsort(rng.random((g, cards, 5, 15)), axis=3)[..., :5] + offsets[None, None, :, None]
+        faces = picks.transpose(0, 1, 3, 2).reshape(g, cards, 25)
+        t = np.take_along_axis(when[:, None, :], faces, axis=2)
+        if table is not None:
+            first = order[:, 0]
+            hit = np.take_along_axis(pm[first][:, None, :], faces, axis=2)
+            t = np.where(hit, np.minimum(t, 1), t)
+        t[:, :, 12] = 0 if compiled.free_enabled else NEVER
+        if not masks:
+            first_win[lo:lo + g] = NEVER
+            continue
+        done = np.stack([t[:, :, m].max(axis=2) for m in masks], axis=2)   # (g, cards, patterns)
+        best = done.min(axis=(1, 2))
+        first_win[lo:lo + g] = best
+        winners = (done.min(axis=1) == best[:, None]) & (best[:, None] != NEVER)
+        pattern_wins += winners.sum(axis=0)
+    return _summary(first_win.tolist(), pattern_wins.tolist(), games, n_calls, compiled, cards, seed)
+
+# ---------- pure-Python engine ----------
+def _simulate_python(compiled, cards: int, games: int, seed, premark_rule) -> dict:
+    rng = random.Random(seed)
+    pool = _pool(compiled)
+    n_calls = len(pool)
+    table = _premark_table(premark_rule)
+    masks = [_cells(m) for m in compiled.win_masks]
+    first_win, pattern_wins = [], [0] * len(masks)
+    for _ in range(games):
+        order = pool[:]
+        rng.shuffle(order)
+        when = [NEVER] * 76
+        for i, n in enumerate(order, 1):
+            when[n] = i
+        pre = table[order[0]] if table is not None and order else 0
+        best, done_by_pattern = NEVER, [NEVER] * len(masks)
+        for _c in range(cards):
+            face = [0] * 25
+            for col in range(5):
+                for row, n in enumerate(rng.sample(range(15 * col + 1, 15 * col + 16), 5)):
+                    face[row * 5 + col] = n
+            t = [min(when[n], 1) if pre >> n & 1 else when[n] for n in face]
+            t[12] = 0 if compiled.free_enabled else NEVER
+            for j, cells in enumerate(masks):
+                d = max(t[i] for i in cells)
+                if d < done_by_pattern[j]:
+                    done_by_pattern[j] = d
+        if masks:
+            best = min(done_by_pattern)
+            if best != NEVER:
+                for j, d in enumerate(done_by_pattern):
+                    if d == best:
+                        pattern_wins[j] += 1
+        first_win.append(best)
+    return _summary(first_win, pattern_wins, games, n_calls, compiled, cards, seed)
+
+def simulate(compiled: CompiledProgram, cards: int = 6, games: int = 10_000,
+             seed: int | None = None, premark_rule: dict | None = None) -> dict:
+    """Calls-to-first-win distribution and per-pattern win shares; cached by program hash."""
+    cards = max(1, min(36, int(cards)))
+    games = max(1, min(MAX_GAMES if np is not None else FALLBACK_MAX_GAMES, int(games)))
+    key = (compiled.hash, cards, games, seed)
+    with _LOCK:
+        hit = _CACHE.get(key)
+        if hit is not None:
+            _CACHE.move_to_end(key)
+            return dict(hit, cached=True)
+    if not _pool(compiled):
+        # allowed minus disallowed leaves nothing to call: no game can be won
+        out = _summary([NEVER] * games, [0] * len(compiled.win_masks), games, 0, compiled, cards, seed)
+    elif np is not None:
+        out = _simulate_numpy(compiled, cards, games, seed, premark_rule)
+    else:
+        out = _simulate_python(compiled, cards, games, seed, premark_rule)
+    with _LOCK:
+        _CACHE[key] = out
+        while len(_CACHE) > _CACHE_MAX:
+            _CACHE.popitem(last=False)
+    return dict(out, cached=False)
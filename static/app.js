@@ -1,3 +1,6 @@
+// Extra tables (sessions) live under /s/<id>/; the main table is at /
+const BASE = (location.pathname.match(/^\/s\/[a-z0-9_-]+/) || [''])[0];
+
 /* ===== DOM refs ===== */
 const viewWelcome     = document.getElementById('view_welcome');
 const viewSetup       = document.getElementById('view_setup');
@@ -73,6 +76,8 @@ let pendingGames = null;
 let drawerOpen = false;
 
 let programsCache = [];
+let programsStale = true;   // refetch /api/programs on entering PROGRAM_PICK or games_updated
+let lastView = null;
 let lineup = [];
 let tempSelectedProgram = null;
 let previewTimer = null;
@@ -116,7 +121,7 @@ function setView(name){
 }
 
 /* ===== Start flow ===== */
-if (btnStart) btnStart.onclick = async ()=>{ await fetch('/api/start', {method:'POST'}); };
+if (btnStart) btnStart.onclick = async ()=>{ await fetch(BASE + '/api/start', {method:'POST'}); };
 
 /* Build 1..20 number buttons */
 (function buildNumGrid(){
@@ -136,7 +141,7 @@ function chooseGames(n){
 }
 if (btnYes) btnYes.onclick = async ()=>{
   if(pendingGames==null) return;
-  await fetch('/api/set_session_games', {
+  await fetch(BASE + '/api/set_session_games', {
     method:'POST', headers:{'Content-Type':'application/json'},
     body: JSON.stringify({count: pendingGames})
   });
@@ -151,7 +156,7 @@ if (btnNo) btnNo.onclick = ()=>{
 
 /* ===== Program pick ===== */
 async function fetchPrograms(){
-  const r = await fetch('/api/programs');
+  const r = await fetch(BASE + '/api/programs');
   const data = await r.json();
   programsCache = data.programs || [];
   if (data.session && Array.isArray(data.session.lineup)) {
@@ -216,23 +221,35 @@ if (btnSavePrev){
     if(!tempSelectedProgram) return;
 
     lineup.push(tempSelectedProgram.key);
+    const chosenNum = lineup.length;
+    const total = state?.session_total_games || 0;
+    const complete = total > 0 && chosenNum >= total;
+    const saved = [`${tempSelectedProgram.name}.`, `Saved for game ${chosenNum}.`];
+    closeProgramPreview();
+
+    if (complete){
+      // lineup + start in one request: one state update, one announcement
+      const first = programsCache.find(p => p.key === lineup[0]);
+      try {
+        await fetch(BASE + '/api/batch',{
+          method:'POST',
+          headers:{'Content-Type':'application/json'},
+          body: JSON.stringify({
+            steps: [{cmd: 'session_lineup', args: [lineup]}, {cmd: 'session_start'}],
+            say: [...saved, 'Starting game 1:', `${first?.name || lineup[0]}.`]
+          })
+        });
+      } catch(e){}
+      return;
+    }
     try {
-      await fetch('/api/session/lineup',{
+      await fetch(BASE + '/api/session/lineup',{
         method:'POST',
         headers:{'Content-Type':'application/json'},
         body: JSON.stringify({lineup})
       });
     } catch(e){}
-
-    const chosenNum = lineup.length;
-    say(`${tempSelectedProgram.name} saved for game ${chosenNum}.`);
-    closeProgramPreview();
-
-    const total = state?.session_total_games || 0;
-    if (total > 0 && chosenNum >= total){
-      try { await fetch('/api/session/start',{method:'POST'}); } catch(e){}
-      return;
-    }
+    say(saved);
     updateProgramPickUI();
   };
 }
@@ -387,170 +404,12 @@ function stopPreviewAnim(){
   if (previewTimer){ clearInterval(previewTimer); previewTimer = null; }
 }
 
-/* ===== Pattern-based win detection ===== */
-const LETTERS = ['B','I','N','G','O'];
-
-function cellIsMarked(card, r, c){
-  if (r===2 && c===2) return !!card.marks['FREE'];
-  const L = LETTERS[c];
-  const n = card.cols[L][r];
-  return !!card.marks[L+String(n)];
-}
-function classicWinCells(card){
-  for (let r=0;r<5;r++){
-    let ok=true; for (let c=0;c<5;c++){ if(!cellIsMarked(card,r,c)) {ok=false; break;} }
-    if (ok) return Array.from({length:5},(_,i)=>[r,i]);
-  }
-  for (let c=0;c<5;c++){
-    let ok=true; for (let r=0;r<5;r++){ if(!cellIsMarked(card,r,c)) {ok=false; break;} }
-    if (ok) return Array.from({length:5},(_,i)=>[i,c]);
-  }
-  let okDiag=true; for (let i=0;i<5;i++){ if(!cellIsMarked(card,i,i)) {okDiag=false; break;} }
-  if (okDiag) return Array.from({length:5},(_,i)=>[i,i]);
-  let okDiag2=true; for (let i=0;i<5;i++){ if(!cellIsMarked(card,i,4-i)) {okDiag2=false; break;} }
-  if (okDiag2) return Array.from({length:5},(_,i)=>[i,4-i]);
-  return null;
-}
-function fixedShapeWinCells(card, shapeCells){
-  if (!Array.isArray(shapeCells) || !shapeCells.length) return null;
-  for (const [r,c] of shapeCells){
-    if(!cellIsMarked(card,r,c)) return null;
-  }
-  return shapeCells.slice();
-}
-function coverallWinCells(card){
-  for (let r=0;r<5;r++){
-    for (let c=0;c<5;c++){
-      if(!cellIsMarked(card,r,c)) return null;
-    }
-  }
-  return Array.from({length:25}, (_,k)=>[Math.floor(k/5), k%5]);
-}
-function customPatternWinCells(card, patterns, allowedPositions, disallowedPositions){
-  if (!Array.isArray(patterns) || !patterns.length) return null;
-  
-  // Check each pattern - return as soon as ONE pattern matches (only 1 pattern needs to win)
-  for (const pattern of patterns){
-    const patternCells = pattern.cells || [];
-    const excluded = pattern.excluded || [];
-    
-    // Check if all pattern cells are marked (excluding excluded positions)
-    let allMarked = true;
-    const matchedCells = [];
-    
-    for (const [r, c] of patternCells){
-      // Skip if position is in excluded list
-      if (excluded.some(([er, ec]) => er === r && ec === c)) continue;
-      
-      // Check if position is disallowed globally
-      if (disallowedPositions && disallowedPositions.length > 0){
-        if (disallowedPositions.some(([dr, dc]) => dr === r && dc === c)) continue;
-      }
-      
-      // Check if position is allowed (if allowed list exists and is not empty)
-      if (allowedPositions && allowedPositions.length > 0){
-        if (!allowedPositions.some(([ar, ac]) => ar === r && ac === c)) continue;
-      }
-      
-      // Check if this cell is marked
-      const isMarked = cellIsMarked(card, r, c);
-      if (!isMarked){
-        console.log(`[DEBUG] Cell [${r},${c}] not marked`);
-        allMarked = false;
-        break;
-      }
-      matchedCells.push([r, c]);
-    }
-    
-    // If all required cells in this pattern are marked, return immediately (only 1 pattern needs to match)
-    if (allMarked && matchedCells.length > 0){
-      return matchedCells;
-    }
-  }
-  return null;
-}
-
+/* ===== Win detection ===== */
+// The server compiles each program into cell bitmasks and checks every card
+// on each state change; a win arrives as state.win = {card, cells}.
 function detectWinOnState(st){
-  if (!st || !st.cards || !st.program) return null;
-  const kind = (st.program.kind||'').toLowerCase();
-  const preview = st.program.preview_cells || [];
-  
-  // For custom games, check allowed numbers first
-  if (kind === 'custom'){
-    const allowedNumbers = st.program.allowed_numbers || [];
-    const disallowedNumbers = st.program.disallowed_numbers || [];
-    
-    // Get all numbers that have been called
-    const calledNumbers = new Set();
-    for (const card of st.cards){
-      for (const call of (card.calls || [])){
-        // Parse call like "B12" -> 12
-        const match = call.match(/^[BINGO](\d+)$/);
-        if (match){
-          const num = parseInt(match[1]);
-          if (num > 0 && num <= 75){
-            calledNumbers.add(num);
-          }
-        }
-      }
-    }
-    
-    // Check if any disallowed numbers were called
-    if (disallowedNumbers.length > 0){
-      for (const num of calledNumbers){
-        if (disallowedNumbers.includes(num)){
-          return null; // Disallowed number was called, no win
-        }
-      }
-    }
-    
-    // Check if all called numbers are in allowed list (if allowed list exists and is not empty)
-    if (allowedNumbers.length > 0){
-      for (const num of calledNumbers){
-        if (!allowedNumbers.includes(num)){
-          return null; // A called number is not in allowed list, no win
-        }
-      }
-    }
-  }
-  
-  // Check each card - return as soon as ONE card wins (only 1 card needs to win)
-  for (let idx=0; idx<st.cards.length; idx++){
-    const card = st.cards[idx];
-    let cells = null;
-    if (kind === 'classic'){
-      cells = classicWinCells(card);
-    } else if (kind === 'fixed_shape'){
-      cells = fixedShapeWinCells(card, preview);
-    } else if (kind === 'special_number' || kind === 'odd_even'){
-      cells = coverallWinCells(card);
-    } else if (kind === 'custom'){
-      // Custom pattern matching - only 1 pattern needs to match on this card
-      const patterns = st.program.patterns || [];
-      const allowedPositions = st.program.allowed_positions || [];
-      const disallowedPositions = st.program.disallowed_positions || [];
-      
-      // Debug logging
-      console.log('[DEBUG] Checking custom pattern win:', {
-        patternsCount: patterns.length,
-        patterns: patterns.map(p => ({cells: p.cells?.length || 0, excluded: p.excluded?.length || 0})),
-        allowedPositions: allowedPositions.length,
-        disallowedPositions: disallowedPositions.length,
-        cardMarks: Object.keys(card.marks || {}).length
-      });
-      
-      cells = customPatternWinCells(card, patterns, allowedPositions, disallowedPositions);
-      
-      if (cells) {
-        console.log('[DEBUG] Win detected! Matched cells:', cells);
-      }
-    }
-    // Return immediately when a win is found on any card (only 1 card needs to win)
-    if (cells && cells.length){
-      return {cardIdx: idx, cells};
-    }
-  }
-  return null;
+  if (!st || !st.win) return null;
+  return {cardIdx: st.win.card, cells: st.win.cells};
 }
 
 /* ===== BINGO overlay, audio, flashing, and actions ===== */
@@ -608,14 +467,14 @@ function hideBingoOverlay(){
 
 async function startWinnerAudioFallback(){
   try{
-    const r = await fetch('/api/winner/start', {method:'POST'});
+    const r = await fetch(BASE + '/api/winner/start', {method:'POST'});
     const j = await r.json();
     if (j && j.ok) return; // server loop engaged
   }catch(e){}
-  try { await fetch('/api/audio/jingle', {method:'POST'}); } catch(e){}
+  try { await fetch(BASE + '/api/audio/jingle', {method:'POST'}); } catch(e){}
   clearInterval(audioLoopTimer);
   audioLoopTimer = setInterval(async ()=>{
-    try { await fetch('/api/audio/jingle', {method:'POST'}); } catch(e){}
+    try { await fetch(BASE + '/api/audio/jingle', {method:'POST'}); } catch(e){}
   }, 3500);
 }
 async function stopWinnerAudioFallback(){
@@ -623,7 +482,7 @@ async function stopWinnerAudioFallback(){
   audioLoopTimer = null;
   // Stop the backend winner.wav loop
   try {
-    await fetch('/api/winner/stop_audio', {method:'POST'});
+    await fetch(BASE + '/api/winner/stop_audio', {method:'POST'});
   } catch(e){}
 }
 
@@ -682,6 +541,7 @@ function stopFlashingLoop(){
   flashingLoop = null;
   clearTimeout(flashingTimer);
   flashingTimer = null;
+  if (focusGrid) focusGrid.querySelectorAll('.cell.win').forEach(el => el.classList.remove('win'));
 }
 
 /* Floating action bar: Next Game / Play Again */
@@ -713,7 +573,7 @@ function showWinnerActionBar(){
       audioLoopTimer = null;
       hideBingoOverlay();
       lineup = []; // Clear lineup so new games can be selected
-      await fetch('/api/start', {method:'POST'});
+      await fetch(BASE + '/api/start', {method:'POST'});
     }
     removeWinnerActionBar();
   };
@@ -731,9 +591,9 @@ function removeWinnerActionBar(){
 /* ===== Next game button (toolbar) ===== */
 async function nextGame(){
   try{
-    await fetch('/api/winner/stop',{method:'POST'}); // on your server this advances
+    await fetch(BASE + '/api/winner/stop',{method:'POST'}); // on your server this advances
   }catch(e){
-    await fetch('/api/game/next',{method:'POST'});
+    await fetch(BASE + '/api/game/next',{method:'POST'});
   }finally{
     // Clear all win state
     bingoShown = false;
@@ -751,7 +611,7 @@ if (btnNextGame) btnNextGame.onclick = nextGame;
 function gainLive(v){ if(gainVal) gainVal.textContent = Number(v).toFixed(1); }
 async function gainSet(v){
   try{
-    const r = await fetch('/api/gain', {
+    const r = await fetch(BASE + '/api/gain', {
       method:'POST', headers:{'Content-Type':'application/json'},
       body: JSON.stringify({gain: Number(v)})
     });
@@ -777,7 +637,7 @@ window.bumpGain = bumpGain;
 function speakerLive(v){ if(speakerVal) speakerVal.textContent = `${Math.round(Number(v))}%`; }
 async function speakerSet(v){
   try{
-    const r = await fetch('/api/volume/speaker', {
+    const r = await fetch(BASE + '/api/volume/speaker', {
       method:'POST', headers:{'Content-Type':'application/json'},
       body: JSON.stringify({speaker: Math.round(Number(v))})
     });
@@ -801,16 +661,16 @@ window.speakerSet  = speakerSet;
 window.bumpSpeaker = bumpSpeaker;
 
 /* ===== API helpers ===== */
-async function newSheet(){ await fetch('/api/new_sheet', {method:'POST'}); }
+async function newSheet(){ await fetch(BASE + '/api/new_sheet', {method:'POST'}); }
 async function setSheetN(n){
-  await fetch('/api/set_sheet_n', {
+  await fetch(BASE + '/api/set_sheet_n', {
     method:'POST', headers:{'Content-Type':'application/json'},
     body: JSON.stringify({n})
   });
 }
 async function toggleMode(){
   const next = (state?.mode || 'PLAY') === 'PLAY' ? 'DEBUG' : 'PLAY';
-  await fetch('/api/mode', {
+  await fetch(BASE + '/api/mode', {
     method:'POST', headers:{'Content-Type':'application/json'},
     body: JSON.stringify({mode: next})
   });
@@ -821,11 +681,13 @@ function simulate(){
   const ranges = {B:[1,15], I:[16,30], N:[31,45], G:[46,60], O:[61,75]};
   const a=ranges[L][0], b=ranges[L][1];
   const n = Math.floor(Math.random()*(b-a+1))+a;
-  fetch('/api/sim_call', {method:'POST', headers:{'Content-Type':'application/json'}, body:JSON.stringify({letter:L, number:n})});
+  fetch(BASE + '/api/sim_call', {method:'POST', headers:{'Content-Type':'application/json'}, body:JSON.stringify({letter:L, number:n})});
 }
-function repeatLast(){ fetch('/api/repeat', {method:'POST'}); }
+function repeatLast(){ fetch(BASE + '/api/repeat', {method:'POST'}); }
 function say(t){
-  fetch('/api/say', {method:'POST', headers:{'Content-Type':'application/json'}, body: JSON.stringify({text: String(t)})});
+  // an array is spoken as separately cached parts (fixed text vs. names/numbers)
+  const body = Array.isArray(t) ? {parts: t.map(String)} : {text: String(t)};
+  fetch(BASE + '/api/say', {method:'POST', headers:{'Content-Type':'application/json'}, body: JSON.stringify(body)});
 }
 window.newSheet = newSheet;
 window.simulate = simulate;
@@ -835,55 +697,77 @@ window.closeDrawer = closeDrawer;
 
 /* ===== Focus helpers ===== */
 async function focusCard(idx){
-  await fetch('/api/focus', {method:'POST', headers:{'Content-Type':'application/json'}, body: JSON.stringify({index: idx})});
+  await fetch(BASE + '/api/focus', {method:'POST', headers:{'Content-Type':'application/json'}, body: JSON.stringify({index: idx})});
 }
 async function focusNone(){
-  await fetch('/api/focus', {method:'POST', headers:{'Content-Type':'application/json'}, body: JSON.stringify({index: -1})});
+  await fetch(BASE + '/api/focus', {method:'POST', headers:{'Content-Type':'application/json'}, body: JSON.stringify({index: -1})});
 }
 if (btnBack) btnBack.onclick = () => focusNone();
 
 
 /* ===== Renderers ===== */
-function renderCardsOverview(){
-  if(!cardsEl || !state) return;
-  const n = (state?.cards || []).length;
-  cardsEl.className = 'cards ' + 'cols-' + Math.min(n,6);
-  cardsEl.innerHTML = '';
-  (state.cards || []).forEach((card, idx)=>{
+// Cards are built once per sheet and kept: a STATE/CALL only toggles the
+// 'marked' class on cells whose mark changed. A full rebuild happens only
+// when the sheet itself changes (new faces or a different card count).
+const LETTERS = ['B','I','N','G','O'];
+let overviewDom = null;   // { key, cards: [{ title, cells: Map(markKey → el) }] }
+let focusDom = null;      // { key, cells: Map(markKey → el) }
+
+function sheetKey(cards){
+  return (cards || []).map(c => c.serial || LETTERS.map(L => c.cols[L].join(',')).join('|')).join(';');
+}
+function buildGrid(grid, card){
+  const cells = new Map();
+  for(let i=0;i<5;i++){
+    const h = document.createElement('div');
+    h.className='cell hdr';
+    h.textContent = LETTERS[i];
+    grid.appendChild(h);
+  }
+  for(let r=0;r<5;r++){
+    for(let c=0;c<5;c++){
+      const L = LETTERS[c];
+      const num = card.cols[L][r];
+      const el = document.createElement('div');
+      el.className='cell';
+      if(L==='N' && r===2){
+        el.textContent='FREE';
+        el.classList.add('free');
+        cells.set('FREE', el);
+      }else{
+        el.textContent=num;
+        cells.set(L+num, el);
+      }
+      el._marked = false;
+      grid.appendChild(el);
+    }
+  }
+  return cells;
+}
+function syncMarks(cells, marks){
+  cells.forEach((el, key)=>{
+    const on = !!marks[key];
+    if(on !== el._marked){
+      el._marked = on;
+      el.classList.toggle('marked', on);
+    }
+  });
+}
+function buildOverview(cards, key){
+  cardsEl.className = 'cards ' + 'cols-' + Math.min(cards.length,6);
+  cardsEl.textContent = '';
+  const frag = document.createDocumentFragment();
+  overviewDom = { key, cards: cards.map((card, idx)=>{
     const wrap = document.createElement('div');
     wrap.className = 'mini';
 
     const title = document.createElement('h4');
-    title.textContent = `Card ${idx+1}`;
     wrap.appendChild(title);
 
     const grid = document.createElement('div');
     grid.className = 'grid';
+    const cells = buildGrid(grid, card);
 
-    const letters = ['B','I','N','G','O'];
-    for(let i=0;i<5;i++){
-      const h = document.createElement('div');
-      h.className='cell hdr';
-      h.textContent = letters[i];
-      grid.appendChild(h);
-    }
-    for(let r=0;r<5;r++){
-      for(let c=0;c<5;c++){
-        const L = letters[c];
-        const num = card.cols[L][r];
-        const el = document.createElement('div');
-        el.className='cell';
-        if(L==='N' && r===2){
-          el.textContent='FREE';
-          el.classList.add('free');
-          if(card.marks['FREE']) el.classList.add('marked');
-        }else{
-          el.textContent=num;
-          if(card.marks[L+num]) el.classList.add('marked');
-        }
-        grid.appendChild(el);
-      }
-    }
     const tap = document.createElement('div');
     tap.className = 'tap';
     tap.textContent = 'Tap to view full screen';
@@ -891,50 +775,143 @@ function renderCardsOverview(){
     wrap.appendChild(grid);
     wrap.appendChild(tap);
     wrap.onclick = ()=> focusCard(idx);
-
-    cardsEl.appendChild(wrap);
+    frag.appendChild(wrap);
+    return { title, cells };
+  })};
+  cardsEl.appendChild(frag);
+}
+function renderCardsOverview(){
+  if(!cardsEl || !state) return;
+  const cards = state.cards || [];
+  const key = sheetKey(cards);
+  if(!overviewDom || overviewDom.key !== key) buildOverview(cards, key);
+  cards.forEach((card, idx)=>{
+    const dom = overviewDom.cards[idx];
+    const t = card.serial ? `#${card.serial}` : `Card ${idx+1}`;
+    if(dom.title.textContent !== t) dom.title.textContent = t;
+    syncMarks(dom.cells, card.marks);
   });
 }
 function renderFocus(){
   if(!focusGrid || !state) return;
   const idx = state.focus_idx ?? 0;
   const card = (state.cards || [])[idx];
-  if(focusTitle) focusTitle.textContent = `Sheet · Card ${idx+1}`;
-  focusGrid.innerHTML = '';
-
-  const letters = ['B','I','N','G','O'];
-  for(let i=0;i<5;i++){
-    const h = document.createElement('div');
-    h.className='cell hdr';
-    h.textContent=letters[i];
-    focusGrid.appendChild(h);
+  if(!card) return;
+  const t = card.serial ? `Sheet · #${card.serial}` : `Sheet · Card ${idx+1}`;
+  if(focusTitle && focusTitle.textContent !== t) focusTitle.textContent = t;
+  const key = sheetKey([card]) + '#' + idx;
+  if(!focusDom || focusDom.key !== key){
+    focusGrid.textContent = '';
+    focusDom = { key, cells: buildGrid(focusGrid, card) };
   }
-  for(let r=0;r<5;r++){
-    for(let c=0;c<5;c++){
-      const L = letters[c];
-      const num = card.cols[L][r];
-      const el = document.createElement('div');
-      el.className='cell';
-      if(L==='N' && r===2){
-        el.textContent='FREE';
-        el.classList.add('free');
-        if(card.marks['FREE']) el.classList.add('marked');
-      }else{
-        el.textContent=num;
-        if(card.marks[L+num]) el.classList.add('marked');
-      }
-      focusGrid.appendChild(el);
+  syncMarks(focusDom.cells, card.marks);
+}
+// A CALL without state (earlier calls of a batch): mark its cells right away
+function markCallInDom(call){
+  (state?.cards || []).forEach((card, idx)=>{
+    if(!(call in card.marks)) return;
+    card.marks[call] = true;
+    const el = overviewDom?.cards[idx]?.cells.get(call);
+    if(el && !el._marked){ el._marked = true; el.classList.add('marked'); }
+    if(focusDom && (state.focus_idx ?? 0) === idx){
+      const f = focusDom.cells.get(call);
+      if(f && !f._marked){ f._marked = true; f.classList.add('marked'); }
     }
-  }
+  });
+}
+
+/* ===== Render timing (shown in the DEBUG panel) ===== */
+// js: synchronous render() time; frame: message → next frame painted.
+const renderTimes = { js: [], frame: [] };
+function noteTime(list, ms){
+  list.push(ms);
+  if(list.length > 100) list.shift();
+}
+function timedRender(){
+  const t0 = performance.now();
+  render();
+  const t1 = performance.now();
+  noteTime(renderTimes.js, t1 - t0);
+  requestAnimationFrame(()=> setTimeout(()=> noteTime(renderTimes.frame, performance.now() - t0), 0));
+}
+function timeStats(list){
+  if(!list.length) return null;
+  const xs = [...list].sort((a,b)=>a-b);
+  const at = p => xs[Math.min(xs.length-1, Math.floor(p/100*xs.length))];
+  return { p50: at(50).toFixed(1), p95: at(95).toFixed(1), max: xs[xs.length-1].toFixed(1), n: xs.length };
+}
+window.bettyRenderStats = ()=> ({ js: timeStats(renderTimes.js), frame: timeStats(renderTimes.frame) });
+
+// Kiosk boot: ms from navigation start to the first painted state, reported
+// once per page load (GET /api/kiosk/boot, betty_kiosk_first_render_ms).
+let bootReported = false;
+function reportBoot(wsStateMs){
+  if(bootReported) return;
+  bootReported = true;
+  requestAnimationFrame(()=> setTimeout(()=>{
+    const nav = performance.getEntriesByType('navigation')[0];
+    const assets = performance.getEntriesByType('resource').filter(r => r.name.includes('/assets/'));
+    const boot = {
+      first_render_ms: performance.now(),
+      ws_state_ms: wsStateMs,
+      html_ms: nav?.responseEnd,
+      dom_ready_ms: nav?.domContentLoadedEventEnd,
+      assets_ms: Math.max(0, ...assets.map(r => r.responseEnd)),
+      cached: assets.length > 0 && assets.every(r => r.transferSize === 0),
+      transfer_bytes: (nav?.transferSize || 0) + assets.reduce((n, r) => n + (r.transferSize || 0), 0),
+    };
+    window.bettyBoot = boot;
+    fetch(BASE + '/api/kiosk/boot', {
+      method:'POST', headers:{'Content-Type':'application/json'}, body: JSON.stringify(boot)
+    }).catch(()=>{});
+  }, 0));
 }
 function applyModeUI(){
   const mode = (state?.mode || 'PLAY').toUpperCase();
+  setLatencyPanel(mode === 'DEBUG');
   const text = `Mode: ${mode==='PLAY'?'Play':'Debug'}`;
   if (modeBtn)       modeBtn.textContent = text;
   if (modeBtnDrawer) modeBtnDrawer.textContent = text;
   if (modeBtn)       modeBtn.setAttribute('aria-pressed', String(mode!=='PLAY'));
   if (modeBtnDrawer) modeBtnDrawer.setAttribute('aria-pressed', String(mode!=='PLAY'));
 }
+/* ===== DEBUG latency panel ===== */
+let latencyPanel = null, latencyTimer = null;
+function setLatencyPanel(on){
+  if(!on){
+    if(latencyTimer){ clearInterval(latencyTimer); latencyTimer = null; }
+    if(latencyPanel) latencyPanel.style.display = 'none';
+    return;
+  }
+  if(!latencyPanel){
+    latencyPanel = document.createElement('div');
+    latencyPanel.className = 'latency-panel';
+    latencyPanel.setAttribute('aria-label', 'Call latency');
+    document.body.appendChild(latencyPanel);
+  }
+  latencyPanel.style.display = '';
+  if(!latencyTimer){
+    refreshLatency();
+    latencyTimer = setInterval(refreshLatency, 2000);
+  }
+}
+async function refreshLatency(){
+  try{
+    const r = await fetch(BASE + '/api/metrics/latency');
+    const d = await r.json();
+    const rows = Object.entries(d.stages || {}).map(([name, v]) =>
+      `<tr><td>${name}</td><td>${v.p50}</td><td>${v.p95}</td><td>${v.max}</td><td>${v.count}</td></tr>`).join('');
+    const last = (d.recent || []).slice(-1)[0];
+    const local = Object.entries(window.bettyRenderStats()).filter(([,v]) => v).map(([name, v]) =>
+      `<tr><td>ui ${name}</td><td>${v.p50}</td><td>${v.p95}</td><td>${v.max}</td><td>${v.n}</td></tr>`).join('');
+    const boot = window.bettyBoot;
+    latencyPanel.innerHTML =
+      `<div class="lp-title">Latency (ms)</div>` +
+      (boot ? `<div class="lp-last">boot: first render ${boot.first_render_ms.toFixed(0)} · ${boot.cached ? 'cached' : boot.transfer_bytes + ' B'}</div>` : '') +
+      `<table><tr><th>stage</th><th>p50</th><th>p95</th><th>max</th><th>n</th></tr>${rows}${local}</table>` +
+      (last ? `<div class="lp-last">last ${last.call}: ${Object.entries(last.ms).map(([k,v])=>`${k} ${v}`).join(' · ')}</div>` : '');
+  }catch(e){}
+}
 function applyOverviewHeader(){
   if(programNameEl && state?.program?.name){
     programNameEl.textContent = state.program.name;
@@ -970,9 +947,16 @@ function render(){
   }
 
   setView(state.view || 'WELCOME');
+  const enteredView = state.view !== lastView;
+  lastView = state.view;
 
   if(state.view === 'PROGRAM_PICK'){
-    fetchPrograms();
+    if (enteredView || programsStale){
+      programsStale = false;
+      fetchPrograms();
+    } else {
+      updateProgramPickUI();
+    }
   }else if(state.view === 'OVERVIEW'){
     renderCardsOverview();
     applyOverviewHeader();
@@ -995,18 +979,69 @@ function showHeardOverlay(text, ms=1100){
 }
 
 /* ===== WebSocket ===== */
-const ws = new WebSocket((location.protocol==='https:'?'wss://':'ws://') + location.host + '/ws');
+// Calls are acked once the frame showing them has been painted (latency tracing).
+let pendingAcks = [];
+function ackRendered(){
+  if(!pendingAcks.length) return;
+  const calls = pendingAcks; pendingAcks = [];
+  requestAnimationFrame(()=> setTimeout(()=>{
+    if(ws.readyState === WebSocket.OPEN) ws.send(JSON.stringify({type:'ACK', calls}));
+  }, 0));
+}
+// Open the page with ?enc=bin (or ?enc=json) to pick the wire format;
+// otherwise the server's WS_ENCODING applies. Layout: see ws_codec.py.
+const WS_ENC = new URLSearchParams(location.search).get('enc');
+const textDecoder = new TextDecoder();
+const CALL_KEYS = Array.from({length: 76}, (_, n)=> n ? LETTERS[Math.floor((n - 1) / 15)] + n : 'FREE');
+function decodeFrame(buf){
+  const dv = new DataView(buf);
+  if(dv.getUint32(0, true) !== 0x31545342) throw new Error('not a BST1 frame');   // "BST1"
+  const n = dv.getUint32(4, true);
+  const msg = JSON.parse(textDecoder.decode(new Uint8Array(buf, 8, n)));
+  let off = 8 + n;
+  const count = dv.getUint16(off, true); off += 2;
+  const bytes = new Uint8Array(buf);
+  const cards = new Array(count);
+  for(let k=0;k<count;k++){
+    const cols = {}, marks = {};
+    const mask = dv.getUint32(off + 25, true);
+    for(let c=0;c<5;c++){
+      const L = LETTERS[c], col = cols[L] = new Array(5);
+      for(let r=0;r<5;r++){
+        const i = c*5 + r, num = bytes[off + i];
+        col[r] = num;
+        marks[i === 12 ? 'FREE' : CALL_KEYS[num]] = (mask >>> i & 1) === 1;
+      }
+    }
+    const serial = dv.getUint32(off + 29, true);
+    const nCalls = bytes[off + 33];
+    off += 34;
+    const calls = new Array(nCalls);
+    for(let j=0;j<nCalls;j++) calls[j] = CALL_KEYS[bytes[off + j]];
+    off += nCalls;
+    cards[k] = serial ? { cols, marks, calls, serial } : { cols, marks, calls };
+  }
+  msg.state.cards = cards;
+  return msg;
+}
+const ws = new WebSocket((location.protocol==='https:'?'wss://':'ws://') + location.host + BASE + '/ws'
+                         + (WS_ENC ? '?enc=' + encodeURIComponent(WS_ENC) : ''));
+ws.binaryType = 'arraybuffer';
 ws.onmessage = (e)=>{
-  const msg = JSON.parse(e.data);
+  const msg = typeof e.data === 'string' ? JSON.parse(e.data) : decodeFrame(e.data);
 
   if(msg.type==='STATE'){
+    const t = performance.now();
     state = msg.state;
-    render();
+    timedRender();
+    reportBoot(t);
   }
   if(msg.type==='CALL'){
-    state = msg.state;
-    render();
-    if((state.mode||'PLAY')==='PLAY' && msg.call){
+    // Batched calls only carry state on the last CALL of the batch
+    if(msg.call) pendingAcks.push(msg.call);
+    if(msg.state){ state = msg.state; timedRender(); ackRendered(); }
+    else if(msg.call){ markCallInDom(msg.call); }
+    if((state?.mode||'PLAY')==='PLAY' && msg.call){
       showHeardOverlay(String(msg.call));
     }
   }
@@ -1020,6 +1055,10 @@ ws.onmessage = (e)=>{
     gainSlider.value = Number(msg.value).toFixed(1);
     gainVal.textContent = Number(msg.value).toFixed(1);
   }
+  if(msg.type==='CONFIG' && msg.key==='games_updated'){
+    programsStale = true;
+    if (state?.view === 'PROGRAM_PICK') render();
+  }
   if(msg.type==='CONFIG' && msg.key==='speaker' && speakerSlider && speakerVal){
     speakerSlider.value = Number(msg.value);
     speakerVal.textContent = `${Number(msg.value)}%`;
@@ -1074,7 +1113,7 @@ document.querySelectorAll('.tab-btn').forEach(btn => {
 
 async function loadGamesList(){
   try {
-    const r = await fetch('/api/games/editor');
+    const r = await fetch(BASE + '/api/games/editor');
     const data = await r.json();
     gameEditorState.games = data.games || [];
     renderGamesList();
@@ -1106,7 +1145,7 @@ function renderGamesList(){
 
 async function editGame(key){
   try {
-    const r = await fetch(`/api/games/editor/${key}`);
+    const r = await fetch(BASE + `/api/games/editor/${key}`);
     const data = await r.json();
     if (!data.ok) {
       alert('Failed to load game: ' + (data.error || 'Unknown error'));
@@ -1511,7 +1550,7 @@ function closePatternEditor(){
   gameEditorState.editingPattern = null;
 }
 
-async function saveGame(){
+function editorGameData(){
   const key = document.getElementById('editor_key').value.trim().toUpperCase();
   const name = document.getElementById('editor_name').value.trim();
   const desc = document.getElementById('editor_desc').value.trim();
@@ -1543,15 +1582,6 @@ async function saveGame(){
   const allowedNumbers = parseNumbers(document.getElementById('editor_allowed_numbers').value);
   const disallowedNumbers = parseNumbers(document.getElementById('editor_disallowed_numbers').value);
   
-  if (!key && !gameEditorState.currentGame?.key){
-    alert('Game key is required');
-    return;
-  }
-  if (!name){
-    alert('Game name is required');
-    return;
-  }
-  
   // Get free_enabled from toggle button or gameEditorState
   const freeEnabledBtn = document.getElementById('editor_free_enabled');
   const freeEnabled = freeEnabledBtn?.classList.contains('active') || gameEditorState.currentGame?.free_enabled !== false;
@@ -1568,6 +1598,20 @@ async function saveGame(){
     free_enabled: freeEnabled,
     params: { free_enabled: freeEnabled }
   };
+  return gameData;
+}
+
+async function saveGame(){
+  const key = document.getElementById('editor_key').value.trim().toUpperCase();
+  const gameData = editorGameData();
+  if (!key && !gameEditorState.currentGame?.key){
+    alert('Game key is required');
+    return;
+  }
+  if (!gameData.name){
+    alert('Game name is required');
+    return;
+  }
   
   console.log('[DEBUG] Saving game:', gameData.key, 'with', gameData.patterns.length, 'patterns');
   
@@ -1579,7 +1623,7 @@ async function saveGame(){
     if (isNewGame) {
       // New game - use POST to create
       console.log('[DEBUG] Creating new game with POST');
-      r = await fetch('/api/games/editor', {
+      r = await fetch(BASE + '/api/games/editor', {
         method: 'POST',
         headers: {'Content-Type': 'application/json'},
         body: JSON.stringify(gameData)
@@ -1587,7 +1631,7 @@ async function saveGame(){
     } else {
       // Existing game - use PUT to update
       console.log('[DEBUG] Updating existing game with PUT');
-      r = await fetch(`/api/games/editor/${finalKey}`, {
+      r = await fetch(BASE + `/api/games/editor/${finalKey}`, {
         method: 'PUT',
         headers: {'Content-Type': 'application/json'},
         body: JSON.stringify(gameData)
@@ -1606,6 +1650,29 @@ async function saveGame(){
   }
 }
 
+// How many balls this game takes on the current sheet size (server-side Monte Carlo)
+async function simulateGame(){
+  const out = document.getElementById('editor_sim');
+  out.textContent = 'Simulating…';
+  try {
+    const r = await fetch(BASE + '/api/games/simulate', {
+      method: 'POST',
+      headers: {'Content-Type': 'application/json'},
+      body: JSON.stringify({game: editorGameData(), games: 10000})
+    });
+    const d = await r.json();
+    if (!d.ok){ out.textContent = 'Simulation failed: ' + (d.error || 'Unknown error'); return; }
+    if (!d.win_rate){ out.textContent = 'No card can win this game.'; return; }
+    const shares = d.patterns.length > 1
+      ? ' · patterns: ' + d.patterns.map(p => `#${p.index + 1} ${Math.round(p.win_share * 100)}%`).join(', ')
+      : '';
+    out.textContent = `${d.cards} cards: first win after ~${d.p50} calls ` +
+      `(10–90%: ${d.p10}–${d.p90}, mean ${d.mean})${shares}`;
+  } catch(e){
+    out.textContent = 'Simulation failed: ' + e.message;
+  }
+}
+
 function cancelEdit(){
   gameEditorState.currentGame = null;
   stopPatternsPreview();
@@ -1615,7 +1682,7 @@ function cancelEdit(){
 async function confirmDeleteGame(key){
   if (!confirm('Are you sure you want to delete this game?')) return;
   try {
-    const r = await fetch(`/api/games/editor/${key}`, {method: 'DELETE'});
+    const r = await fetch(BASE + `/api/games/editor/${key}`, {method: 'DELETE'});
     const data = await r.json();
     if (!data.ok){
       alert('Failed to delete game: ' + (data.error || 'Unknown error'));
@@ -1634,7 +1701,7 @@ function deleteGame(){
 
 async function saveAllGames(){
   try {
-    const r = await fetch('/api/games/editor/save', {method: 'POST'});
+    const r = await fetch(BASE + '/api/games/editor/save', {method: 'POST'});
     const data = await r.json();
     if (data.ok){
       alert('All games saved successfully!');
@@ -1666,7 +1733,7 @@ window.saveAllGames = saveAllGames;
 /* ===== Initial load ===== */
 (async function init(){
   try {
-    const r = await fetch('/api/state');
+    const r = await fetch(BASE + '/api/state');
     state = await r.json();
   } catch (e) {
     state = null;
@@ -0,0 +1,145 @@
+# /opt/bettybot/static_assets.py
+from __future__ import annotations
+import gzip
+import hashlib
+import mimetypes
+import os
+import threading
+import time
+from pathlib import Path
+
+try:
+    import brotli
+except ImportError:          # gzip only
+    brotli = None
+
+# ---------- fingerprinted static assets ----------
+# Built at startup, no build step: every file under static/ is read once,
+# hashed and compressed (gzip, plus brotli when the module is installed).
+# Templates link /assets/<stem>.<hash><ext> via asset_url(), so a URL never
+# changes meaning and browsers may cache it forever ("immutable"). Editing a
+# file changes its hash; the cache notices on the next url() after a short
+# stat interval and rebuilds.
+
+CACHE_FOREVER = "public, max-age=31536000, immutable"
+MIN_COMPRESS = 256           # smaller files aren't worth a Content-Encoding
+STAT_INTERVAL = 1.0          # seconds between mtime checks
+
+def compress(data: bytes) -> dict:
+    """{"gzip": bytes, "br": bytes} for whichever encoding actually saves bytes."""
+    out = {}
+    if len(data) < MIN_COMPRESS:
+        return out
+    gz = gzip.compress(data, compresslevel=9, mtime=0)
+    if len(gz) < len(data):
+        out["gzip"] = gz
+    if brotli is not None:
+        br = brotli.compress(data, quality=11)
+        if len(br) < len(data):
+            out["br"] = br
+    return out
+
+def pick_encoding(variants: dict, accept_encoding: str) -> str | None:
+    """Best of br/gzip the client accepts (q=0 excluded), or None for identity."""
+    accepted = set()
+    for part in (accept_encoding or "").lower().split(","):
+        name, _, params = part.strip().partition(";")
+        if params.replace(" ", "") in ("q=0", "q=0.0"):
+            continue
+        accepted.add(name.strip())
+    for enc in ("br", "gzip"):
+        if enc in variants and (enc in accepted or "*" in accepted):
+            return enc
+    return None
+
+
+class Asset:
+    __slots__ = ("name", "url_name", "etag", "mimetype", "data", "variants", "mtime_ns")
+
+    def __init__(self, name: str, data: bytes, mtime_ns: int):
+        digest = hashlib.sha256(data).hexdigest()[:12]
+        stem, dot, ext = name.rpartition(".")
+        self.name = name
+        self.url_name = f"{stem}.{digest}.{ext}" if dot else f"{name}.{digest}"
+        self.etag = f'"{digest}"'
+        self.mimetype = mimetypes.guess_type(name)[0] or "application/octet-stream"
+        if self.mimetype.startswith("text/") or self.mimetype == "application/javascript":
+            self.mimetype += "; charset=utf-8"
+        self.data = data
+        self.variants = compress(data)
+        self.mtime_ns = mtime_ns
+
+
+class AssetCache:
+    def __init__(self, root, prefix: str = "/assets"):
+        self.root = Path(root)
+        self.prefix = prefix.rstrip("/")
+        self.version = 0             # bumped on every rebuild (for derived caches)
+        self.build_ms = 0.0
+        self._by_name = {}           # "app.js" → Asset
+        self._by_url = {}            # "app.<hash>.js" → Asset
+        self._checked = 0.0
+        self._lock = threading.Lock()
+        self.build()
+
+    def build(self):
+        t0 = time.perf_counter()
+        by_name = {}
+        for path in sorted(self.root.rglob("*")):
+            if not path.is_file() or any(p.startswith(".") for p in path.relative_to(self.root).parts):
+                continue
+            name = path.relative_to(self.root).as_posix()
+            old = self._by_name.get(name)
+            st = path.stat()
+            if old is not None and old.mtime_ns == st.st_mtime_ns:
+                by_name[name] = old
+                continue
+            by_name[name] = Asset(name, path.read_bytes(), st.st_mtime_ns)
+        with self._lock:
+            self._by_name = by_name
+            self._by_url = {a.url_name: a for a in by_name.values()}
+            self.version += 1
+            self._checked = time.monotonic()
+        self.build_ms = (time.perf_counter() - t0) * 1000
+
+    def _stale(self) -> bool:
+        for name, a in list(self._by_name.items()):
+            try:
+                if os.stat(self.root / name).st_mtime_ns != a.mtime_ns:
+                    return True
+            except OSError:
+                return True
+        return False
+
+    def refresh(self):
+        """Rebuild if any file changed (checked at most every STAT_INTERVAL)."""
+        now = time.monotonic()
+        if now - self._checked < STAT_INTERVAL:
+            return
+        self._checked = now
+        if self._stale():
+            self.build()
+            print(f"[assets] rebuilt ({self.build_ms:.0f} ms)")
+
+    def url(self, name: str) -> str:
+        """Fingerprinted URL for a file under static/ (template helper)."""
+        self.refresh()
+        a = self._by_name.get(name)
+        if a is None:
+            raise KeyError(f"no static asset {name!r}")
+        return f"{self.prefix}/{a.url_name}"
+
+    def lookup(self, url_name: str) -> Asset | None:
+        return self._by_url.get(url_name)
+
+    def info(self) -> dict:
+        with self._lock:
+            assets = list(self._by_name.values())
+        return {
+            "version": self.version,
+            "build_ms": round(self.build_ms, 1),
+            "brotli": brotli is not None,
+            "files": {a.name: {"url": f"{self.prefix}/{a.url_name}", "bytes": len(a.data),
+                               **{enc: len(v) for enc, v in a.variants.items()}}
+                      for a in assets},
+        }
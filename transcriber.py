@@ -0,0 +1,401 @@
+#!/usr/bin/env python3
+# /opt/bettybot/transcriber.py — one whisper worker for several capture streams
+"""
+Multi-mic listening without one whisper per mic. Started by bingo_app in place
+of listen.sh when LISTEN_STREAMS is set, e.g.
+
+    LISTEN_STREAMS="hall=plughw:2,0;table2=plughw:4,0"
+
+Each stream gets a listen.sh in capture-only mode (SPOOL_DIR set): it does
+VAD, echo gating and gain as usual, then drops the segment into
+SPOOL_ROOT/<stream>/ instead of running whisper. This worker collects the
+pending segments round-robin across streams (one per stream per turn, so a
+chatty mic can't starve a quiet one), runs them through a single whisper-cli
+invocation (model loaded once, all cores for one job), and feeds each
+transcript to that stream's own long-lived bingo_parse.py, so a split call
+("B ... twelve") is assembled per mic. Parser events go to stdout tagged
+with "stream", plus heartbeats for the supervisor, like listen.sh.
+
+bingo_app routes by that tag: a stream named after a table ("table2" above)
+feeds only that table, any other ("hall") feeds every table, and a call a
+table already got from another stream in the last CALL_DEDUP_S seconds is
+dropped, so two mics hearing one caller mark each call once.
+
+Segments that arrive while a batch is running form the next batch, so
+batching costs no extra wait when things are quiet.
+
+    python3 transcriber.py bench --streams 3 --per-stream 4 seg1.wav seg2.wav
+
+compares aggregate throughput against one whisper-cli per stream.
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import threading
+import time
+from collections import deque
+from pathlib import Path
+
+APP_DIR = Path(__file__).resolve().parent
+
+# ---------- Config ----------
+WHISPER_BIN   = os.environ.get("WHISPER_BIN", "/opt/bettybot/whisper.cpp/build/bin/whisper-cli")
+MODEL_PATH    = os.environ.get("WHISPER_MODEL", "/opt/bettybot/whisper.cpp/models/ggml-tiny.en.bin")
+THREADS       = int(os.environ.get("WHISPER_THREADS", "4"))
+FAST_DECODE   = os.environ.get("FAST_DECODE", "1") == "1"
+BATCH_MAX     = int(os.environ.get("TRANSCRIBE_BATCH_MAX", "8"))
+SPOOL_ROOT    = Path(os.environ.get("SPOOL_ROOT", "/tmp/betty_spool"))
+LISTEN_SH     = os.environ.get("LISTEN_SH", str(APP_DIR / "listen.sh"))
+MODE_FILE     = Path("/tmp/betty_parse_mode.txt")   # same file listen.sh reads
+# whisper-cli time limit per batch: base + per segment. tiny.en on a Pi 4 is
+# roughly 2-4 s per ~3 s segment, so a full batch of 8 can take 20-35 s.
+BATCH_TIMEOUT_S = float(os.environ.get("TRANSCRIBE_TIMEOUT_S", "20"))
+SEGMENT_TIMEOUT_S = float(os.environ.get("TRANSCRIBE_SEGMENT_TIMEOUT_S", "10"))
+HB_EVERY_S    = 5.0     # "whisper" heartbeats while a batch runs (supervisor stall check)
+
+PROMPT_PLAY = os.environ.get("PROMPT_PLAY", (
+    'You will hear bingo calls spoken twice, e.g., "B twelve, B one two". Output a single '
+    'normalized call in the format "<LETTER> <NUMBER>" (e.g., "B 12"). Valid letters: '
+    'B,I,N,G,O. Valid ranges: B 1–15, I 16–30, N 31–45, G 46–60, O 61–75. Output only the call.'))
+PROMPT_SETUP = os.environ.get("PROMPT_SETUP", (
+    'You will hear very short answers. Transcribe only “yes”, “no”, or a number 1–20 '
+    '(digits preferred). Do not add extra words.'))
+
+_out_lock = threading.Lock()
+
+def emit(obj: dict):
+    with _out_lock:
+        print(json.dumps(obj, ensure_ascii=False), flush=True)
+
+def hb(phase: str, n: int = 0):
+    emit({"type": "heartbeat", "phase": phase, "chunk": n})
+
+def read_mode() -> str:
+    try:
+        return MODE_FILE.read_text().strip().upper() or "PLAY"
+    except OSError:
+        return "PLAY"
+
+# ---------- whisper ----------
+def whisper_cmd(files, threads: int = THREADS, prompt: str = PROMPT_PLAY) -> list:
+    cmd = [WHISPER_BIN, "-m", MODEL_PATH, "-t", str(threads), "--language", "en",
+           "--no-timestamps", "-np", "-otxt", "--suppress-nst", "--prompt", prompt]
+    if FAST_DECODE:
+        cmd += ["-bo", "1", "-bs", "1", "-nf"]
+    for f in files:
+        cmd += ["-f", str(f)]
+    return cmd
+
+def transcribe(files, threads: int = THREADS, prompt: str = PROMPT_PLAY) -> list:
+    """Run whisper-cli once over all files; returns one transcript (lines) per file (empty on timeout)."""
+    files = [str(f) for f in files]
+    for f in files:
+        try:
+            os.unlink(f + ".txt")
+        except OSError:
+            pass
+    limit = BATCH_TIMEOUT_S + SEGMENT_TIMEOUT_S * len(files)
+    try:
+        subprocess.run(whisper_cmd(files, threads, prompt), stdout=subprocess.DEVNULL,
+                       stderr=subprocess.DEVNULL, timeout=limit)
+    except subprocess.TimeoutExpired:
+        # run() has killed whisper-cli; whatever it finished is still read below
+        print(f"[transcriber] whisper-cli over {len(files)} segments timed out after {limit:.0f}s; "
+              f"dropping what it didn't finish", file=sys.stderr)
+    out = []
+    for f in files:
+        try:
+            text = Path(f + ".txt").read_text(encoding="utf-8", errors="replace")
+        except OSError:
+            text = ""
+        out.append([ln.strip() for ln in text.splitlines()
+                    if ln.strip() and not ln.startswith(("whisper_", "system_info"))])
+    return out
+
+# ---------- scheduling ----------
+class Segment:
+    def __init__(self, stream: str, wav: Path, meta: dict):
+        self.stream = stream
+        self.wav = wav
+        self.meta = meta
+        self.queued_at = time.time()
+
+
+class FairQueue:
+    """Per-stream FIFOs drained round-robin into batches."""
+    def __init__(self, streams):
+        self.q = {s: deque() for s in streams}
+        self._order = list(streams)
+        self._cond = threading.Condition()
+
+    def put(self, seg: Segment):
+        with self._cond:
+            self.q.setdefault(seg.stream, deque()).append(seg)
+            if seg.stream not in self._order:
+                self._order.append(seg.stream)
+            self._cond.notify()
+
+    def pending(self) -> int:
+        with self._cond:
+            return sum(len(d) for d in self.q.values())
+
+    def batch(self, max_n: int, timeout: float | None = None) -> list:
+        """Up to max_n segments, one per stream per turn; rotates who goes first."""
+        with self._cond:
+            if not any(self.q.values()):
+                self._cond.wait(timeout)
+            out = []
+            while len(out) < max_n and any(self.q.values()):
+                for s in self._order:
+                    if self.q[s] and len(out) < max_n:
+                        out.append(self.q[s].popleft())
+            if out:
+                self._order.append(self._order.pop(0))
+            return out
+
+# ---------- per-stream parsers ----------
+class StreamParser:
+    """A long-lived bingo_parse.py for one stream; its events are tagged and forwarded."""
+    def __init__(self, stream: str):
+        self.stream = stream
+        self._spawn()
+
+    def _spawn(self):
+        self.proc = subprocess.Popen(
+            [sys.executable, "-u", str(APP_DIR / "bingo_parse.py")],
+            stdin=subprocess.PIPE, stdout=subprocess.PIPE, text=True, bufsize=1)
+        threading.Thread(target=self._read, args=(self.proc,), daemon=True,
+                         name=f"parse-{self.stream}").start()
+
+    def _read(self, proc):
+        for line in proc.stdout:
+            try:
+                evt = json.loads(line)
+            except Exception:
+                continue
+            evt["stream"] = self.stream
+            emit(evt)
+
+    def feed(self, lines, trace: dict):
+        if not lines:
+            return
+        stamps = ",".join(f"{k}={v:.3f}" for k, v in trace.items())
+        try:
+            self.proc.stdin.write(f"#trace {stamps}\n" + "".join(ln + "\n" for ln in lines))
+            self.proc.stdin.flush()
+        except (BrokenPipeError, OSError):
+            print(f"[transcriber] parser for {self.stream} died; restarting", file=sys.stderr)
+            self._spawn()
+
+# ---------- worker ----------
+def parse_streams(spec: str) -> dict:
+    """'hall=plughw:2,0;table2=plughw:4,0' → {"hall": "plughw:2,0", ...}"""
+    out = {}
+    for part in spec.split(";"):
+        name, _, dev = part.strip().partition("=")
+        if name.strip():
+            out[name.strip()] = dev.strip()
+    return out
+
+class Transcriber:
+    def __init__(self, streams: dict):
+        self.streams = streams
+        self.queue = FairQueue(streams)
+        self.parsers = {s: StreamParser(s) for s in streams}
+        self.captures = {}
+        self.batches = 0
+
+    def start_captures(self):
+        for name, dev in self.streams.items():
+            spool = SPOOL_ROOT / name
+            spool.mkdir(parents=True, exist_ok=True)
+            env = os.environ.copy()
+            env.update({"SPOOL_DIR": str(spool), "STREAM": name, "STANDBY": "0",
+                        "BETTY_CACHE_DIR": str(Path(env.get("BETTY_CACHE_DIR", "/opt/bettybot/cache")) / "streams" / name)})
+            if dev:
+                env["ALSA_DEV"] = dev
+            p = subprocess.Popen(["bash", LISTEN_SH], stdout=subprocess.PIPE, text=True,
+                                 bufsize=1, env=env, cwd=str(APP_DIR))
+            self.captures[name] = p
+            threading.Thread(target=self._read_capture, args=(name, p), daemon=True,
+                             name=f"capture-{name}").start()
+
+    def _read_capture(self, name: str, p):
+        for line in p.stdout:
+            try:
+                evt = json.loads(line)
+            except Exception:
+                continue
+            if evt.get("type") != "heartbeat":   # echo_suppressed etc.
+                evt["stream"] = name
+                emit(evt)
+        print(f"[transcriber] capture for {name} exited ({p.wait()})", file=sys.stderr)
+        os._exit(1)   # let the supervisor restart the whole set
+
+    def scan(self, seen: set):
+        found = set()
+        for name in self.streams:
+            for meta_path in sorted((SPOOL_ROOT / name).glob("*.json")):
+                found.add(meta_path)
+                if meta_path in seen:
+                    continue
+                seen.add(meta_path)
+                try:
+                    meta = json.loads(meta_path.read_text())
+                except Exception:
+                    meta = {}
+                self.queue.put(Segment(name, meta_path.with_suffix(".wav"), meta))
+        seen &= found   # forget segments that have been transcribed and removed
+
+    def _spool_watch(self):
+        seen = set()
+        while True:
+            self.scan(seen)
+            time.sleep(0.05)
+
+    def _busy_heartbeat(self, busy: threading.Event):
+        while not busy.wait(HB_EVERY_S):
+            hb("whisper", self.batches)
+
+    def run(self):
+        threading.Thread(target=self._spool_watch, daemon=True, name="spool").start()
+        hb("rec")
+        while True:
+            batch = self.queue.batch(BATCH_MAX, timeout=5.0)
+            if not batch:
+                hb("rec", self.batches)
+                continue
+            self.batches += 1
+            mode = read_mode()
+            hb("whisper", self.batches)
+            t0 = time.time()
+            # keep heartbeating while whisper works: a long batch isn't a stall,
+            # and transcribe() has its own time limit
+            busy = threading.Event()
+            threading.Thread(target=self._busy_heartbeat, args=(busy,), daemon=True).start()
+            try:
+                texts = transcribe([s.wav for s in batch], THREADS,
+                                   PROMPT_SETUP if mode == "SETUP" else PROMPT_PLAY)
+            except Exception as e:
+                print(f"[transcriber] batch {self.batches} failed: {e}", file=sys.stderr)
+                texts = [[] for _ in batch]
+            finally:
+                busy.set()
+            t1 = time.time()
+            print(f"[transcriber] batch {self.batches}: {len(batch)} segments "
+                  f"({', '.join(s.stream for s in batch)}) in {t1 - t0:.2f}s", file=sys.stderr)
+            for seg, lines in zip(batch, texts):
+                trace = {k: float(v) for k, v in seg.meta.items() if isinstance(v, (int, float))}
+                trace.update(whisper_start=t0, whisper_end=t1)
+                self.parsers[seg.stream].feed(lines, trace)
+                for f in (seg.wav, seg.wav.with_suffix(".json"), Path(str(seg.wav) + ".txt")):
+                    try:
+                        f.unlink()
+                    except OSError:
+                        pass
+            hb("rec", self.batches)
+
+def serve():
+    streams = parse_streams(os.environ.get("LISTEN_STREAMS", ""))
+    if not streams:
+        print("❌ LISTEN_STREAMS is empty (name=alsa_dev;name2=alsa_dev2)", file=sys.stderr)
+        sys.exit(1)
+    hb("start")
+    if os.environ.get("STANDBY", "0") == "1":   # same handshake as listen.sh
+        try:
+            with open(MODEL_PATH, "rb") as f:
+                while f.read(1 << 20):
+                    pass
+        except OSError:
+            pass
+        hb("standby")
+        if not sys.stdin.readline():
+            return
+        hb("start")
+    w = Transcriber(streams)
+    w.start_captures()
+    w.run()
+
+# ---------- benchmark ----------
+def _pct(xs, p):
+    xs = sorted(xs)
+    return xs[min(len(xs) - 1, int(p / 100 * len(xs)))] if xs else 0.0
+
+def bench(args):
+    files = [Path(f) for f in args.wavs]
+    work = {f"s{i + 1}": [files[(i + j) % len(files)] for j in range(args.per_stream)]
+            for i in range(args.streams)}
+    total = args.streams * args.per_stream
+    report = {"streams": args.streams, "segments": total}
+
+    # a) one whisper-cli per stream, each working through its own segments
+    lat = []
+    def one_stream(segs):
+        for f in segs:
+            t = time.time()
+            transcribe([f], args.threads)
+            lat.append(time.time() - t0 if args.arrive_together else time.time() - t)
+    t0 = time.time()
+    ths = [threading.Thread(target=one_stream, args=(segs,)) for segs in work.values()]
+    for t in ths:
+        t.start()
+    for t in ths:
+        t.join()
+    wall = time.time() - t0
+    report["per_stream"] = {"wall_s": round(wall, 2), "segments_per_s": round(total / wall, 2),
+                            "latency_p50_s": round(_pct(lat, 50), 2), "latency_p95_s": round(_pct(lat, 95), 2)}
+
+    # b) one worker, fair batches across streams
+    q = FairQueue(work)
+    for j in range(args.per_stream):
+        for s, segs in work.items():
+            q.put(Segment(s, segs[j], {}))
+    lat, sizes = [], []
+    t0 = time.time()
+    while True:
+        batch = q.batch(args.batch, timeout=0)
+        if not batch:
+            break
+        t = time.time()
+        transcribe([s.wav for s in batch], args.threads)
+        done = time.time()
+        sizes.append(len(batch))
+        lat += [done - (t0 if args.arrive_together else t)] * len(batch)
+    wall = time.time() - t0
+    report["batched"] = {"wall_s": round(wall, 2), "segments_per_s": round(total / wall, 2),
+                         "latency_p50_s": round(_pct(lat, 50), 2), "latency_p95_s": round(_pct(lat, 95), 2),
+                         "batches": len(sizes), "avg_batch": round(sum(sizes) / len(sizes), 1)}
+    report["speedup"] = round(report["per_stream"]["wall_s"] / report["batched"]["wall_s"], 2)
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+        return
+    print(f"{total} segments over {args.streams} streams, {args.threads} threads per whisper")
+    for k in ("per_stream", "batched"):
+        r = report[k]
+        print(f"  {k:<10} {r['wall_s']:>7.2f}s  {r['segments_per_s']:>6.2f} seg/s  "
+              f"p50 {r['latency_p50_s']:.2f}s  p95 {r['latency_p95_s']:.2f}s")
+    print(f"  batched is {report['speedup']}x the per-stream throughput")
+
+def main():
+    ap = argparse.ArgumentParser(description="Batched whisper worker for several capture streams.")
+    sub = ap.add_subparsers(dest="cmd")
+    b = sub.add_parser("bench", help="compare one worker vs one whisper-cli per stream")
+    b.add_argument("wavs", nargs="+", help="16 kHz mono WAV segments to cycle through")
+    b.add_argument("--streams", type=int, default=3)
+    b.add_argument("--per-stream", type=int, default=4, help="segments per stream")
+    b.add_argument("--batch", type=int, default=BATCH_MAX, help="max segments per whisper run")
+    b.add_argument("--threads", type=int, default=THREADS, help="whisper threads per process")
+    b.add_argument("--arrive-together", action="store_true",
+                   help="measure latency from the start (all segments queued at once)")
+    b.add_argument("--json", action="store_true", help="print the report as JSON")
+    args = ap.parse_args()
+    if args.cmd == "bench":
+        bench(args)
+    else:
+        serve()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,223 @@
+# /opt/bettybot/tts.py
+from __future__ import annotations
+import hashlib
+import io
+import itertools
+import os
+import queue
+import subprocess
+import threading
+import wave
+from collections import OrderedDict
+from pathlib import Path
+from shutil import which as shutil_which
+
+# ---------- text-to-speech with a phrase cache ----------
+# Rendered phrases are keyed by (engine, voice, rate, text) and kept in a
+# small in-memory LRU, backed by files in cache_dir. With a `convert` hook
+# (the audio engine's) they are stored as raw PCM in the output format, so a
+# hit is played as is; without one they stay WAV bytes. The directory is
+# capped at disk_bytes: the least recently used files go first (a disk hit
+# bumps the file's mtime, since the SD card is usually mounted noatime).
+# One worker thread synthesizes (on a miss) and plays queued utterances in
+# order, so callers never block on pico2wave/espeak and playback never
+# overlaps; warm-up phrases are rendered only while nothing is waiting to
+# be said.
+
+class TTSCache:
+    def __init__(self, cache_dir: Path, mem_bytes: int = 8 << 20, convert=None, fmt: str = "wav",
+                 disk_bytes: int = 64 << 20):
+        self.dir = Path(cache_dir)
+        self.mem_bytes = int(mem_bytes)
+        self.disk_bytes = int(disk_bytes)
+        self._disk_used = None        # bytes in cache_dir, scanned on first write
+        self.convert = convert        # WAV bytes → stored form (e.g. engine PCM)
+        self.fmt = fmt                # names the stored form in the key
+        self.suffix = ".pcm" if convert else ".wav"
+        self._mem = OrderedDict()
+        self._used = 0
+        self._lock = threading.Lock()
+        self._disk_lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.engine = self._pick_engine()
+
+    @staticmethod
+    def _pick_engine():
+        if shutil_which("pico2wave"):
+            return ("pico2wave", "en-US", None)
+        if shutil_which("espeak"):
+            return ("espeak", "en-us+f3", 150)
+        return None
+
+    def _key(self, text: str) -> str:
+        name, voice, rate = self.engine
+        blob = f"{name}|{voice}|{rate}|{self.fmt}|{text}"
+        return hashlib.sha1(blob.encode("utf-8")).hexdigest()[:20]
+
+    def _remember(self, key: str, data: bytes):
+        with self._lock:
+            if key in self._mem:
+                self._mem.move_to_end(key)
+                return
+            self._mem[key] = data
+            self._used += len(data)
+            while self._used > self.mem_bytes and len(self._mem) > 1:
+                _, old = self._mem.popitem(last=False)
+                self._used -= len(old)
+
+    def get(self, text: str):
+        """Stored bytes for text (memory → disk → synthesize), or None if no engine."""
+        if self.engine is None:
+            return None
+        key = self._key(text)
+        with self._lock:
+            data = self._mem.get(key)
+            if data is not None:
+                self._mem.move_to_end(key)
+                self.hits += 1
+                return data
+        path = self.dir / f"{key}{self.suffix}"
+        try:
+            data = path.read_bytes()
+            self.hits += 1
+            try:
+                os.utime(path)        # recently used: evicted last
+            except OSError:
+                pass
+        except OSError:
+            self.misses += 1
+            data = self._synthesize(text, path)
+        if data:
+            self._remember(key, data)
+        return data
+
+    def _synthesize(self, text: str, path: Path):
+        name, voice, rate = self.engine
+        self.dir.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_name(f"{path.stem}.{threading.get_ident()}.tmp.wav")
+        if name == "pico2wave":
+            cmd = ["pico2wave", "-w", str(tmp), "-l", voice, text]
+        else:
+            cmd = ["espeak", "-s", str(rate), "-v", voice, "-w", str(tmp), text]
+        try:
+            subprocess.run(cmd, check=False, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+            data = tmp.read_bytes()
+            if self.convert:
+                data = self.convert(data)
+                tmp.write_bytes(data)
+            os.replace(tmp, path)
+            self._trim(len(data))
+            return data
+        except Exception:
+            try:
+                tmp.unlink()
+            except OSError:
+                pass
+            return None
+
+    def _trim(self, added: int):
+        """Evict least recently used files once cache_dir is over disk_bytes."""
+        with self._disk_lock:
+            if self._disk_used is None:
+                self._disk_used = sum(f.stat().st_size for f in self.dir.iterdir() if f.is_file())
+            else:
+                self._disk_used += added
+            if self._disk_used <= self.disk_bytes:
+                return
+            files = []
+            for f in self.dir.iterdir():
+                try:
+                    st = f.stat()
+                except OSError:
+                    continue
+                if f.is_file() and not f.name.endswith(".tmp.wav"):
+                    files.append((st.st_mtime_ns, st.st_size, f))
+            files.sort()
+            used = sum(size for _, size, _ in files)
+            evicted = 0
+            for _, size, f in files[:-1]:            # never the file just written
+                if used <= self.disk_bytes * 9 // 10:
+                    break
+                try:
+                    f.unlink()
+                except OSError:
+                    continue
+                used -= size
+                evicted += 1
+            self._disk_used = used
+            print(f"[tts] disk cache over {self.disk_bytes >> 20} MB: evicted {evicted} phrase(s)")
+
+    def join(self, chunks):
+        """One utterance from several stored phrases."""
+        if self.convert:
+            return b"".join(c for c in chunks if c) or None
+        return join_wavs(chunks)
+
+    def stats(self) -> dict:
+        return {"hits": self.hits, "misses": self.misses,
+                "mem_items": len(self._mem), "mem_bytes": self._used,
+                "disk_bytes": self._disk_used}
+
+
+def join_wavs(chunks):
+    """Concatenate WAV byte strings that share a format into one WAV."""
+    chunks = [c for c in chunks if c]
+    if len(chunks) == 1:
+        return chunks[0]
+    out = io.BytesIO()
+    params = None
+    frames = []
+    for c in chunks:
+        with wave.open(io.BytesIO(c), "rb") as w:
+            if params is None:
+                params = w.getparams()
+            elif w.getparams()[:3] != params[:3]:
+                continue  # different format; skip rather than garble
+            frames.append(w.readframes(w.getnframes()))
+    if params is None:
+        return None
+    with wave.open(out, "wb") as w:
+        w.setparams(params)
+        for f in frames:
+            w.writeframes(f)
+    return out.getvalue()
+
+
+SAY, WARM = 0, 1    # queue priorities: utterances jump ahead of warm-up phrases
+
+class SpeechQueue(threading.Thread):
+    """Single worker: render (cached) and play utterances one after another."""
+    def __init__(self, cache: TTSCache, play_bytes):
+        super().__init__(daemon=True, name="speech")
+        self.cache = cache
+        self.play_bytes = play_bytes     # play_bytes(cached bytes) blocks until done
+        self._q = queue.PriorityQueue()  # (priority, seq, parts); seq keeps FIFO order
+        self._seq = itertools.count()
+
+    def say(self, *parts: str):
+        """Queue one utterance made of cached parts (e.g. prefix + program name)."""
+        parts = [str(p or "").strip() for p in parts]
+        parts = [p for p in parts if p]
+        if parts:
+            self._q.put((SAY, next(self._seq), parts))
+
+    def prerender(self, phrases):
+        """Warm the cache in the background, one phrase at a time, after anything to be said."""
+        for p in phrases:
+            p = str(p or "").strip()
+            if p:
+                self._q.put((WARM, next(self._seq), [p]))
+
+    def run(self):
+        while True:
+            prio, _, parts = self._q.get()
+            try:
+                if prio == WARM:
+                    self.cache.get(parts[0])
+                    continue
+                data = self.cache.join([self.cache.get(p) for p in parts])
+                if data:
+                    self.play_bytes(data)
+            except Exception as e:
+                print(f"[tts] {'warm' if prio == WARM else 'say'} failed: {e}")
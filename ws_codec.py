@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+# /opt/bettybot/ws_codec.py — compact binary WebSocket frames for card state
+"""
+Displays get JSON by default (easy to read in devtools). A display that
+connects with /ws?enc=bin instead gets STATE/CALL messages that carry a
+state as one binary frame, with the cards packed:
+
+    magic     4 bytes   b"BST1"
+    json_len  u32       length of the JSON part
+    json      ...       the message, with state.cards left out
+    n_faces   u16
+    per face  25 bytes  numbers column-major (B1..B5, I1..I5, ..., N3 = 0 = FREE)
+              u32       marks, bit i = cell i in the same order
+              u32       serial (0 = random face)
+              u8 + n    call ledger: count, then one byte per call (1..75)
+
+All integers little-endian. Every other message stays a JSON text frame.
+static/app.js decodes the same layout back into the JSON shape.
+
+    python3 ws_codec.py bench
+"""
+from __future__ import annotations
+import json
+import random
+import struct
+import sys
+import time
+
+MAGIC = b"BST1"
+LETTERS = "BINGO"
+_HEAD = struct.Struct("<4sI")
+_FACE = struct.Struct("<25sIIB")
+_N = struct.Struct("<H")
+
+def _ledger_byte(call: str) -> int:
+    n = int(call[1:])
+    if call[:1] != LETTERS[min(4, (n - 1) // 15)] or not 1 <= n <= 75:
+        raise ValueError(f"can't pack call {call!r}")
+    return n
+
+def pack_card(card: dict) -> bytes:
+    cols = card["cols"]
+    nums = bytes(n for L in LETTERS for n in cols[L])
+    marks = card["marks"]
+    mask = 0
+    for i, n in enumerate(nums):
+        key = "FREE" if i == 12 else f"{LETTERS[i // 5]}{n}"
+        if marks.get(key):
+            mask |= 1 << i
+    ledger = bytes(_ledger_byte(c) for c in card.get("calls", [])[-255:])
+    return _FACE.pack(nums, mask, int(card.get("serial") or 0), len(ledger)) + ledger
+
+def unpack_card(buf, off: int) -> tuple[dict, int]:
+    nums, mask, serial, n_calls = _FACE.unpack_from(buf, off)
+    off += _FACE.size
+    cols = {L: list(nums[c * 5:c * 5 + 5]) for c, L in enumerate(LETTERS)}
+    marks = {}
+    for i, n in enumerate(nums):
+        key = "FREE" if i == 12 else f"{LETTERS[i // 5]}{n}"
+        marks[key] = bool(mask >> i & 1)
+    calls = [f"{LETTERS[(n - 1) // 15]}{n}" for n in buf[off:off + n_calls]]
+    card = {"cols": cols, "marks": marks, "calls": calls}
+    if serial:
+        card["serial"] = serial
+    return card, off + n_calls
+
+def encode(msg: dict) -> bytes | None:
+    """Binary frame for a message carrying a state, else None (send it as JSON)."""
+    state = msg.get("state")
+    if not isinstance(state, dict) or "cards" not in state:
+        return None
+    try:
+        faces = b"".join(pack_card(c) for c in state["cards"])
+    except (KeyError, TypeError, ValueError):
+        return None   # something the layout can't hold: JSON still works
+    head = dict(msg, state={k: v for k, v in state.items() if k != "cards"})
+    js = json.dumps(head, separators=(",", ":")).encode("utf-8")
+    return _HEAD.pack(MAGIC, len(js)) + js + _N.pack(len(state["cards"])) + faces
+
+def decode(buf: bytes) -> dict:
+    magic, n = _HEAD.unpack_from(buf, 0)
+    if magic != MAGIC:
+        raise ValueError("not a BST1 frame")
+    off = _HEAD.size
+    msg = json.loads(buf[off:off + n])
+    off += n
+    (count,) = _N.unpack_from(buf, off)
+    off += _N.size
+    cards = []
+    for _ in range(count):
+        card, off = unpack_card(buf, off)
+        cards.append(card)
+    msg["state"]["cards"] = cards
+    return msg
+
+# ---------- benchmark ----------
+def _sample_state(faces: int, calls: int = 30, seed: int = 1) -> dict:
+    rng = random.Random(seed)
+    drawn = rng.sample(range(1, 76), calls)
+    ledger = [f"{LETTERS[(n - 1) // 15]}{n}" for n in drawn]
+    cards = []
+    for i in range(faces):
+        cols = {L: rng.sample(range(c * 15 + 1, c * 15 + 16), 5) for c, L in enumerate(LETTERS)}
+        cols["N"][2] = 0
+        marks = {f"{L}{n}": n in drawn for L in LETTERS for n in cols[L] if n}
+        marks["FREE"] = True
+        cards.append({"cols": cols, "marks": marks, "calls": ledger[-12:], "serial": 12000 + i})
+    # the rest of public_state, roughly as big as a live one
+    return {"view": "GAME", "session_total_games": 10, "session_lineup": ["CLASSIC"] * 10,
+            "current_game_idx": 3, "sheet_n": faces, "cards": cards, "focus_idx": None,
+            "gain": 1.0, "speaker": 80, "mode": "PLAY", "status": "LISTENING",
+            "last_heard": "B 12", "program": {"key": "CLASSIC", "name": "Classic", "desc": "",
+                                               "kind": "classic", "params": {}, "preview_cells": []},
+            "win": None, "free_enabled": True, "session_id": "default"}
+
+def _time(fn, reps: int) -> float:
+    t0 = time.perf_counter()
+    for _ in range(reps):
+        fn()
+    return (time.perf_counter() - t0) / reps * 1e6
+
+def bench(sizes=(6, 36, 90), reps: int = 500):
+    print(f"{'faces':>5} {'json B':>8} {'bin B':>7} {'ratio':>6} {'json dec µs':>12} {'bin dec µs':>11} {'bin enc µs':>11}")
+    for faces in sizes:
+        msg = {"type": "CALL", "call": "B12", "state": _sample_state(faces)}
+        js = json.dumps(msg)
+        bin_ = encode(msg)
+        assert decode(bin_) == json.loads(js), "round trip differs"
+        t_json = _time(lambda: json.loads(js), reps)
+        t_bin = _time(lambda: decode(bin_), reps)
+        t_enc = _time(lambda: encode(msg), reps)
+        print(f"{faces:>5} {len(js):>8} {len(bin_):>7} {len(bin_) / len(js):>6.2f} "
+              f"{t_json:>12.0f} {t_bin:>11.0f} {t_enc:>11.0f}")
+
+def main():
+    if sys.argv[1:2] != ["bench"]:
+        print(__doc__.strip())
+        sys.exit(2)
+    bench()
+
+if __name__ == "__main__":
+    main()